@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+图表 HTML 模板基准测试
+对柱状图、饼图、地图三种典型配置，测量每生成一个图表文件的模板渲染耗时、
+渲染+写文件耗时以及文件大小（不包含 ECharts 配置的生成）
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.tools import html_chart_utils
+from src.tools.html_chart_utils import generate_echarts_config
+
+# 每个场景的重复次数
+ITERATIONS = 2000
+
+CASES = {
+    "bar(120点x3系列)": {
+        "x_data": [f"第{i}周" for i in range(120)],
+        "series": [
+            {"name": name, "data": [i * 1.5 + k for i in range(120)], "type": kind, "y_unit": "万元"}
+            for k, (name, kind) in enumerate([("投资", "bar"), ("成本", "bar"), ("增长率", "line")])
+        ]
+    },
+    "pie(8项)": {
+        "chart_type": "pie",
+        "data": [
+            {"name": name, "value": value} for name, value in zip(
+                ["临沂", "济南", "青岛", "烟台", "潍坊", "淄博", "济宁", "泰安"],
+                [5000, 3000, 8000, 6000, 4000, 3500, 2500, 2800])
+        ]
+    },
+    "map(山东16市)": {
+        "chart_type": "map",
+        "regions": [
+            {"name": name, "value": value} for value, name in enumerate(
+                ["济南", "青岛", "淄博", "枣庄", "东营", "烟台", "潍坊", "济宁",
+                 "泰安", "威海", "日照", "临沂", "德州", "聊城", "滨州", "菏泽"], 1)
+        ]
+    }
+}
+
+
+def render(config, title, map_type):
+    """返回要写入文件的文本片段"""
+    if hasattr(html_chart_utils, "render_chart_html"):
+        return html_chart_utils.render_chart_html(config, title, map_type)
+    return [html_chart_utils.create_html_template(config, title, map_type)]
+
+
+def bench(func, iterations=ITERATIONS):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.median(samples) * 1e6, samples[int(len(samples) * 0.95) - 1] * 1e6
+
+
+def main():
+    output_dir = tempfile.mkdtemp(prefix="chart_bench_")
+    path = os.path.join(output_dir, "chart.html")
+    print(f"{'场景':<16}{'渲染 p50':>12}{'渲染 p95':>12}{'渲染+写入 p50':>16}{'文件大小':>12}")
+    for name, data in CASES.items():
+        config = generate_echarts_config(data, name, "X轴")
+        map_type = "shandong" if data.get("chart_type") == "map" else "china"
+
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(render(config, name, map_type))
+
+        render_p50, render_p95 = bench(lambda: render(config, name, map_type))
+        write_p50, _ = bench(write)
+        size = os.path.getsize(path)
+        print(f"{name:<16}{render_p50:>10.1f}us{render_p95:>10.1f}us{write_p50:>14.1f}us{size:>10,d} B")
+
+
+if __name__ == "__main__":
+    main()
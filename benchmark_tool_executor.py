@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+工具执行池基准测试
+模拟多个 SSE 会话并发调用工具，对比"在事件循环内直接执行阻塞工具"
+与"通过 ToolExecutor 分派到执行池"两种方式下，轻量请求的延迟变化
+"""
+
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.runtime.tool_executor import ToolExecutor
+
+# 模拟一次阻塞的图表调用（文件写入 + 外部消息推送）
+HEAVY_CALL_SECONDS = 0.2
+# 每个会话发起的轻量请求数量
+LIGHT_CALLS_PER_SESSION = 10
+# 轻量请求之间的间隔
+LIGHT_CALL_INTERVAL = 0.01
+# 并发的重负载会话数量
+LOAD_LEVELS = [0, 2, 4, 8]
+
+
+def heavy_tool():
+    """阻塞型工具，模拟 draw_html_chart + send_external_message"""
+    time.sleep(HEAVY_CALL_SECONDS)
+    return "ok"
+
+
+def light_tool():
+    """轻量工具，模拟一次小查询"""
+    return "ok"
+
+
+async def heavy_session(run_tool, stop: asyncio.Event):
+    while not stop.is_set():
+        await run_tool("drawChart", heavy_tool)
+        # 模拟会话之间的网络往返，让出事件循环
+        await asyncio.sleep(0.001)
+
+
+async def light_session(run_tool, latencies):
+    for _ in range(LIGHT_CALLS_PER_SESSION):
+        started = time.perf_counter()
+        await run_tool("getDataFromDatabase", light_tool)
+        await asyncio.sleep(LIGHT_CALL_INTERVAL)
+        # 扣除固定间隔，剩余部分即为事件循环被阻塞造成的额外延迟
+        latencies.append(time.perf_counter() - started - LIGHT_CALL_INTERVAL)
+
+
+async def run_scenario(run_tool, heavy_sessions: int, light_sessions: int = 4):
+    stop = asyncio.Event()
+    latencies = []
+    heavy_tasks = [asyncio.create_task(heavy_session(run_tool, stop)) for _ in range(heavy_sessions)]
+    # 让重负载先跑起来
+    await asyncio.sleep(0.05)
+    await asyncio.gather(*(light_session(run_tool, latencies) for _ in range(light_sessions)))
+    stop.set()
+    await asyncio.gather(*heavy_tasks, return_exceptions=True)
+    return latencies
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    return f"p50={p50:8.2f} ms  p95={p95:8.2f} ms  max={latencies[-1] * 1000:8.2f} ms"
+
+
+async def main():
+    async def inline(tool_name, func):
+        # 旧实现：同步工具直接在事件循环中执行
+        return func()
+
+    executor = ToolExecutor({
+        'pools': {'io': {'type': 'thread', 'max_workers': 32}},
+        'defaults': {'pool': 'io', 'max_concurrency': 16, 'max_queue': 64, 'timeout': 30},
+        'tools': {'getDataFromDatabase': {'max_concurrency': 8}}
+    })
+
+    print("🚀 工具执行池基准测试")
+    print(f"阻塞调用耗时: {HEAVY_CALL_SECONDS * 1000:.0f} ms, 每会话轻量请求: {LIGHT_CALLS_PER_SESSION}")
+    print("=" * 80)
+
+    for mode, run_tool in (("事件循环内执行", inline), ("ToolExecutor", executor.run)):
+        print(f"\n📊 {mode}")
+        for heavy in LOAD_LEVELS:
+            latencies = await run_scenario(run_tool, heavy)
+            print(f"   并发阻塞会话 {heavy:3d}: {summarize(latencies)}")
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
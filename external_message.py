@@ -6,17 +6,41 @@
 
 import requests
 import json
+import logging
 import time
 import random
 from datetime import datetime
+from src.config.config_loader import ConfigLoader
+from src.messaging.message_dispatcher import MessageDispatcher
 
 # 配置
-WEB_SERVER_URL = "http://localhost:5000"  # 修改为您的Web服务器地址
+config = ConfigLoader()
+WEB_SERVER_URL = config.external_message_config.get('url', "http://localhost:5000")  # 修改为您的Web服务器地址
 EXTERNAL_MESSAGE_API = f"{WEB_SERVER_URL}/api/external-message"
 
-def send_external_message(message, sender="算法系统", message_type="info"):
+# 后台投递器：消息入队后立即返回，由后台线程批量投递
+# 消息先写入项目数据库中的发件箱，Web 服务不可用时不会丢失
+dispatcher = MessageDispatcher(EXTERNAL_MESSAGE_API, config.external_message_config, config.database_path,
+                               health_url=WEB_SERVER_URL)
+
+def send_external_message(message, sender="算法系统", message_type="info", wait=True):
+    """
+    发送外部消息到聊天界面（入队后由后台线程写入发件箱并投递）
+    
+    Args:
+        message (str): 消息内容
+        sender (str): 发送者名称
+        message_type (str): 消息类型 (info, success, warning, error)
+        wait (bool): 是否等消息写入发件箱后返回，在事件循环中调用时传 False
+    
+    Returns:
+        dict: 入队结果，包含消息ID
+    """
+    return dispatcher.enqueue(message, sender, message_type, wait)
+
+def post_external_message(message, sender="算法系统", message_type="info"):
     """
-    发送外部消息到聊天界面
+    同步发送外部消息到聊天界面（等待Web服务器响应）
     
     Args:
         message (str): 消息内容
@@ -33,8 +57,17 @@ def send_external_message(message, sender="算法系统", message_type="info"):
         "timestamp": datetime.now().isoformat()
     }
     
+    # 熔断打开时直接失败，不再等待连接超时
+    if not dispatcher.breaker.allow_request():
+        print(f"❌ Web服务器不可用（熔断中）: {WEB_SERVER_URL}")
+        return None
+    
     try:
         response = requests.post(EXTERNAL_MESSAGE_API, json=data, timeout=10)
+        if response.status_code < 500:
+            dispatcher.breaker.record_success()
+        else:
+            dispatcher.breaker.record_failure()
         result = response.json()
         
         if response.status_code == 200:
@@ -46,10 +79,12 @@ def send_external_message(message, sender="算法系统", message_type="info"):
         return result
         
     except requests.exceptions.ConnectionError:
+        dispatcher.breaker.record_failure()
         print(f"❌ 连接失败: 无法连接到 {WEB_SERVER_URL}")
         print("请确保Web服务器正在运行")
         return None
     except requests.exceptions.Timeout:
+        dispatcher.breaker.record_failure()
         print("❌ 请求超时")
         return None
     except Exception as e:
@@ -211,6 +246,7 @@ def main():
     """主函数"""
     print("🚀 外部消息推送测试工具")
     print("=" * 50)
+    dispatcher.start()
     
     # 检查服务器连接
     try:
@@ -260,4 +296,5 @@ def main():
             print(f"❌ 执行时出错: {str(e)}")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     main() 
\ No newline at end of file
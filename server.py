@@ -8,17 +8,31 @@ import os
 import sys
 import json
 from pathlib import Path
+from typing import List, Optional
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from external_message import send_external_message
+from external_message import send_external_message, dispatcher
 from src.database.db_reader import DatabaseReader
+from src.database.connection_pool import get_pool
+from src.database.migrations import apply_migrations
+from src.database.schema_catalog import get_catalog
+from src.database.index_advisor import get_advisor
+from src.database.result_cache import ResultCache
+from src.database.result_formatter import check_format
 from src.tools.chart_utils import draw_chart
 from src.tools.web_control import open_website
-from src.tools.html_chart_utils import draw_html_chart
+from src.tools.html_chart_utils import draw_html_chart, chart_cache, geo_store, vendor_assets
+from src.tools.vendor_assets import ASSETS as VENDOR_ASSETS, CONTENT_TYPES
+from src.tools.table_chart import draw_table_chart
+from src.tools.page_index import PageIndex
+from src.runtime.tool_executor import ToolExecutor
+from src.runtime.singleflight import SingleFlight, call_key
 from fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, RedirectResponse, Response
 from src.config.config_loader import ConfigLoader
 
 # 获取配置
@@ -61,11 +75,92 @@ mcp_calls_logger.addHandler(mcp_calls_handler)
 mcp_calls_logger.setLevel(logging.INFO)
 mcp_calls_logger.propagate = False  # 防止重复记录
 
+def _compact_json(data) -> str:
+    """工具返回值序列化为紧凑 JSON（默认序列化带缩进，查询结果体积会明显增大）"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str)
+
 # 创建 MCP 实例
-mcp = FastMCP("AIKnowledgeStorage MCP Server")
+mcp = FastMCP("AIKnowledgeStorage MCP Server", tool_serializer=_compact_json)
+
+# 工具执行池：阻塞的工具函数在池中执行，不占用 SSE 事件循环
+executor = ToolExecutor()
+
+# 合并同时进行中的相同调用，共享一次查询/渲染
+singleflight = SingleFlight()
+
+# 查询结果缓存：表数据未变化时直接返回上次的格式化结果
+result_cache = ResultCache.from_config(config.database_path, config.database_config.get('result_cache', {}))
+
+# sponge_city_urls 页面索引，保存在结果缓存中，表数据变化后自动重建
+page_index = PageIndex(result_cache)
+
+def _query_table(table_name: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                 columns: Optional[List[str]] = None, output_format: str = "text",
+                 max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> dict:
+    """在执行池中查询数据表"""
+    def load():
+        with DatabaseReader() as db:
+            return db.read_page(table_name, limit, cursor, columns, output_format, max_chars, max_tokens)
+    params = {"limit": limit, "cursor": cursor, "columns": columns, "max_chars": max_chars, "max_tokens": max_tokens}
+    return result_cache.get_or_load(table_name, params, output_format, load)
+
+def _run_query(table_name: str, columns: Optional[List[str]], filters: Optional[List[dict]],
+               order_by: Optional[List[str]], limit: Optional[int], output_format: str) -> dict:
+    """在执行池中执行结构化查询"""
+    loaded = []
+    def load():
+        loaded.append(True)
+        with DatabaseReader() as db:
+            return db.query_table(table_name, columns, filters, order_by, limit, output_format)
+    params = {"columns": columns, "filters": filters, "order_by": order_by, "limit": limit}
+    result = result_cache.get_or_load(table_name, params, f"query:{output_format}", load)
+    if not loaded:
+        # 缓存命中时没有执行查询，也计入索引顾问的查询模式统计
+        get_advisor(config.database_path).record_hit(table_name, filters, order_by=order_by)
+    return result
+
+def _run_aggregate(table_name: str, group_by: Optional[List[str]], aggregates: Optional[List[dict]],
+                   filters: Optional[List[dict]], order_by: Optional[List[str]], limit: Optional[int],
+                   buckets: Optional[dict]) -> dict:
+    """在执行池中执行聚合查询"""
+    loaded = []
+    def load():
+        loaded.append(True)
+        with DatabaseReader() as db:
+            return db.aggregate(table_name, group_by, aggregates, filters, order_by, limit, buckets)
+    params = {"group_by": group_by, "aggregates": aggregates, "filters": filters,
+              "order_by": order_by, "limit": limit, "buckets": buckets}
+    result = result_cache.get_or_load(table_name, params, "columnar", load)
+    if not loaded:
+        get_advisor(config.database_path).record_hit(table_name, filters, group_by=group_by)
+    return result
+
+def _run_search(query: str, table_name: Optional[str], limit: int) -> list:
+    """在执行池中执行全文检索"""
+    def load():
+        with DatabaseReader() as db:
+            return db.search(query, table_name, limit)
+    if table_name is None:
+        # 跨表检索的结果依赖多张表，不做缓存
+        return load()
+    return result_cache.get_or_load(table_name, {"query": query, "limit": limit}, "search", load)
+
+def _resolve_and_open(query: str, open_page: bool) -> dict:
+    """在执行池中查找页面并打开"""
+    matches = page_index.resolve(query)
+    candidates = [
+        {"page_name": m.entry.page_name, "subpage_name": m.entry.subpage_name, "url": m.entry.url,
+         "match": m.match_type, "score": m.score}
+        for m in matches
+    ]
+    best = page_index.pick(matches)
+    if best is None:
+        return {"opened": False, "candidates": candidates}
+    result = open_website(best.entry.url) if open_page else None
+    return {"opened": open_page, "page": candidates[matches.index(best)], "result": result}
 
 @mcp.tool()
-def openWebsite(url: str) -> dict:
+async def openWebsite(url: str) -> dict:
     """打开网页工具
     
     Args:
@@ -75,7 +170,7 @@ def openWebsite(url: str) -> dict:
         dict: 操作结果
     """
     try:
-        result = open_website(url)
+        result = await executor.run("openWebsite", open_website, url)
         logger.info(f"成功打开网页: {url}")
         return {"success": True, "result": result}
     except Exception as e:
@@ -83,20 +178,151 @@ def openWebsite(url: str) -> dict:
         return {"success": False, "error": str(e)}
 
 @mcp.tool()
-def getDataFromDatabase(table_name: str) -> dict:
+async def getDataFromDatabase(table_name: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                              columns: Optional[List[str]] = None, format: str = "text",
+                              max_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> dict:
     """For get url from database, always use this tool to get url data, table_name: sponge_city_urls.
-    For get project information from database, always use this tool to get data, table_name: 项目统计."""
+    For get project information from database, always use this tool to get data, table_name: 项目统计.
+    Large tables are returned page by page: limit sets the page size, columns selects the returned columns,
+    and when the result contains next_cursor, pass it as cursor to read the next page.
+    format: "text" (aligned table, default), "json" (one object per row), "columnar" (one array per column,
+    smallest) or "csv".
+    max_chars / max_tokens: size budget for the result. Long cells are truncated, less useful columns dropped
+    and fewer rows returned to fit; if even a few rows do not fit, whole-table column statistics (row count,
+    min, max, distinct and null counts, trimmed to the budget) are returned instead and next_cursor is the
+    cursor you passed, so retry with fewer columns, a smaller limit or a larger budget.
+    The "elided" field says what was left out."""
     try:
-        db = DatabaseReader()
-        result = db.read_data_by_table(table_name)
+        output_format = check_format(format)
+        arguments = {"table_name": table_name, "limit": limit, "cursor": cursor, "columns": columns,
+                     "format": output_format, "max_chars": max_chars, "max_tokens": max_tokens}
+        page = await singleflight.do(
+            call_key("getDataFromDatabase", arguments),
+            lambda: executor.run("getDataFromDatabase", _query_table, table_name, limit, cursor, columns,
+                                 output_format, max_chars, max_tokens)
+        )
         logger.info(f"成功查询数据表: {table_name}")
-        return {"success": True, "result": result}
+        response = {"success": True, "result": page["result"]}
+        if page["next_cursor"]:
+            response["next_cursor"] = page["next_cursor"]
+        if page["elided"]:
+            response["elided"] = page["elided"]
+        return response
+    except Exception as e:
+        logger.error(f"数据库查询失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def queryTable(table_name: str, columns: Optional[List[str]] = None, filters: Optional[List[dict]] = None,
+                     order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+                     format: str = "text") -> dict:
+    """Query only the rows and columns you need from a database table (项目统计 or sponge_city_urls).
+
+    columns: columns to return, default all columns.
+    filters: conditions joined with AND, each {"column": "...", "op": "...", "value": ...}.
+        op: "=", "!=", "<", "<=", ">", ">=", "in" (value is a list), "between" (value is [low, high]),
+        "like" (value is a LIKE pattern such as "%海绵%"), "is_null", "not_null".
+    order_by: sort columns, prefix with "-" for descending, e.g. ["-项目投资金额"].
+    limit: maximum number of rows.
+    format: "text" | "json" | "columnar" | "csv", same as getDataFromDatabase.
+
+    Example: {"table_name": "项目统计", "columns": ["项目名称", "项目投资金额"],
+              "filters": [{"column": "项目投资金额", "op": ">", "value": 1000}], "order_by": ["-项目投资金额"], "limit": 5}"""
+    try:
+        output_format = check_format(format)
+        arguments = {"table_name": table_name, "columns": columns, "filters": filters,
+                     "order_by": order_by, "limit": limit, "format": output_format}
+        result = await singleflight.do(
+            call_key("queryTable", arguments),
+            lambda: executor.run("queryTable", _run_query, table_name, columns, filters, order_by, limit,
+                                 output_format)
+        )
+        logger.info(f"成功查询数据表: {table_name}")
+        return {"success": True, "result": result["result"], "truncated": result["truncated"]}
     except Exception as e:
         logger.error(f"数据库查询失败: {str(e)}")
         return {"success": False, "error": str(e)}
 
 @mcp.tool()
-def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "Unknown") -> dict:
+async def aggregateTable(table_name: str, group_by: Optional[List[str]] = None,
+                         aggregates: Optional[List[dict]] = None, filters: Optional[List[dict]] = None,
+                         order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+                         buckets: Optional[dict] = None) -> dict:
+    """Compute GROUP BY aggregates in the database instead of reading the whole table.
+
+    group_by: columns to group by, e.g. ["对接人"].
+    aggregates: list of {"func": "sum"|"avg"|"count"|"min"|"max", "column": "...", "as": "optional name"},
+        default [{"func": "count"}]. Text numbers such as 项目进度 "45%" are converted automatically.
+    filters: same format as queryTable.
+    order_by: group columns or aggregate names, prefix "-" for descending.
+    buckets: group a numeric column into ranges, e.g. {"项目进度": 20} gives "0-20", "20-40", ...
+
+    Returns columnar data {"columns": [...], "data": {column: [values]}}; the group column can be used
+    directly as drawChart x_data and each aggregate column as a series.
+
+    Example: {"table_name": "项目统计", "group_by": ["对接人"],
+              "aggregates": [{"func": "sum", "column": "项目投资金额", "as": "总投资"}, {"func": "count"}]}"""
+    try:
+        arguments = {"table_name": table_name, "group_by": group_by, "aggregates": aggregates,
+                     "filters": filters, "order_by": order_by, "limit": limit, "buckets": buckets}
+        result = await singleflight.do(
+            call_key("aggregateTable", arguments),
+            lambda: executor.run("aggregateTable", _run_aggregate, table_name, group_by, aggregates,
+                                 filters, order_by, limit, buckets)
+        )
+        logger.info(f"成功聚合数据表: {table_name}")
+        # 执行计划只在 /metrics 中汇总，不返回给调用方
+        return {"success": True, "columns": result["columns"], "data": result["data"],
+                "row_count": result["row_count"]}
+    except Exception as e:
+        logger.error(f"数据库聚合失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def searchDatabase(query: str, table_name: Optional[str] = None, limit: int = 10) -> dict:
+    """Full-text search in the database, returns ranked hits with snippets instead of whole tables.
+    Use it to find pages in sponge_city_urls (page_name, subpage_name, description, remarks) or projects
+    in 项目统计 (项目名称, 项目简介, 项目难点, 对接人, 项目执行情况).
+
+    query: search words separated by spaces, all must match, e.g. "监测" or "管网 改造".
+    table_name: optional, "sponge_city_urls" or "项目统计"; default searches both.
+    limit: maximum number of hits.
+
+    Each hit has table, id, snippet (matches marked with []) and the main columns (url for pages)."""
+    try:
+        arguments = {"query": query, "table_name": table_name, "limit": limit}
+        hits = await singleflight.do(
+            call_key("searchDatabase", arguments),
+            lambda: executor.run("searchDatabase", _run_search, query, table_name, limit)
+        )
+        logger.info(f"全文检索 '{query}': {len(hits)} 条命中")
+        return {"success": True, "hits": hits}
+    except Exception as e:
+        logger.error(f"全文检索失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def resolveAndOpenWebsite(query: str, open: bool = True) -> dict:
+    """Find a sponge city platform page by name and open it in one call, no need to read sponge_city_urls first.
+
+    query: page name, subpage name or a short phrase, e.g. "监测数据", "项目管理 技术审查", "登录".
+    open: set false to only look up the url.
+
+    If the name is ambiguous, nothing is opened and "candidates" lists the matching pages;
+    call again with a more specific name (e.g. page + subpage)."""
+    try:
+        result = await executor.run("resolveAndOpenWebsite", _resolve_and_open, query, open)
+        if result["opened"]:
+            logger.info(f"成功打开网页: {result['page']['url']}")
+        elif not result.get("page"):
+            logger.info(f"页面 '{query}' 匹配不唯一: {len(result['candidates'])} 个候选")
+        return {"success": True, **result}
+    except Exception as e:
+        logger.error(f"查找页面失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+@mcp.tool()
+async def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "Unknown") -> dict:
     """
     绘制各种类型的动态交互式图表，支持11种图表类型
     
@@ -302,12 +528,25 @@ def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "U
          ],
          "max_value": 1000
      }
-     → 自动识别为单城市数据，显示日照市地图，市内区域用颜色填充
+     → 自动识别为单城市数据，显示日照市地图，市内区域用颜色填充（全国任一地级市均可，如 "成都"、"延边"）
+     
+     e) 城市内区县地图（自动识别区县所属城市，也可以用 map_type 指定城市）：
+     {
+         "chart_type": "map",
+         "regions": [
+             {"name": "武侯", "value": 300},
+             {"name": "锦江", "value": 500}
+         ],
+         "max_value": 600
+     }
+     → 自动识别为成都市区县数据，显示成都市地图，区县名称自动与地图数据对齐（"武侯" -> "武侯区"）
+     同名区县较多（如 "鼓楼"、"朝阳区"）且无法确定所属城市时显示全国地图，此时请用 map_type 指定城市
      
      🗺️ 支持的地图层级：
      - 国家级：中国地图（多省份数据时自动选择）
-     - 省级：34个省/直辖市/自治区（山东、青海、北京、上海、广东、四川、江苏、浙江、河北、河南、湖北、湖南、安徽、福建、江西、辽宁、吉林、黑龙江、内蒙古、山西、陕西、甘肃、青海、宁夏、新疆、西藏、云南、贵州、重庆、天津、广西、海南等）
-     - 市级：山东省16个市（济南、青岛、烟台、潍坊、临沂、淄博、济宁、泰安、聊城、威海、枣庄、德州、东营、菏泽、日照、滨州）
+     - 省级：34个省/直辖市/自治区/特别行政区（山东、青海、北京、上海、广东、四川、江苏、浙江、河北、河南、湖北、湖南、安徽、福建、江西、辽宁、吉林、黑龙江、内蒙古、山西、陕西、甘肃、宁夏、新疆、西藏、云南、贵州、重庆、天津、广西、海南、台湾、香港、澳门）
+     - 市级：全国所有地级市、自治州、地区、盟（如 "成都"、"苏州"、"延边"、"阿坝州"），直辖市的区县（如 "海淀"、"浦东"）显示在直辖市地图上
+     - 区县级：同一城市的区县自动显示该市地图，也可以通过 map_type 指定城市
      
      📊 地图数据显示方式：
      - 区域填充：根据数值大小用渐变色填充对应区域（蓝色→黄色→红色）
@@ -321,7 +560,7 @@ def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "U
        - name: 区域名称（省份名、城市名或区县名）
        - value: 数值，用于颜色深浅映射
      - max_value: 可选，最大值用于颜色映射范围
-     - map_type: 可选，通常不需要指定，系统会智能检测
+     - map_type: 可选，通常不需要指定，系统会智能检测；需要指定时传地名、拼音或行政区划代码（如 "成都"、"chengdu"、"510100"）
      
      💡 地图使用场景：
      - 全国业务分布：多省份销售数据对比
@@ -351,7 +590,7 @@ def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "U
       * 单省份展示 → 自动显示省级地图 + 区域填充
       * 省内多城市对比 → 自动显示省级地图 + 城市区域填充  
       * 单城市详情 → 自动显示市级地图 + 区域填充
-      * 支持34个省份和山东省16个市的智能识别
+      * 支持34个省级行政区和全国所有地级行政区的智能识别
     
     title: 图表标题（建议使用描述性标题）
     x_label: X轴标签（仅适用于有X轴的图表）
@@ -417,8 +656,14 @@ def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "U
     mcp_calls_logger.info("-" * 100)
     
     try:
-        result = draw_html_chart(data_input, title, x_label)
-        send_external_message(result, userName, "success")
+        # 渲染结果与调用者无关，userName 不参与合并
+        chart_args = {"data_input": data_input, "title": title, "x_label": x_label, "userName": userName}
+        result = await singleflight.do(
+            call_key("drawChart", chart_args, ignore=("userName",)),
+            lambda: executor.run("drawChart", draw_html_chart, data_input, title, x_label)
+        )
+        # 每个调用者各自收到通知；只放入内存队列，不等待发件箱提交，不阻塞事件循环
+        send_external_message(result, userName, "success", wait=False)
         logger.info(f"✅ 图表创建成功: {title}")
         logger.info(f"📁 文件路径: {result}")
         logger.info("=" * 80)
@@ -429,24 +674,146 @@ def drawChart(data_input, title="多系列图表", x_label="X轴", userName = "U
         logger.error("=" * 80)
         return {"success": False, "error": str(e)}
 
+@mcp.tool()
+async def chartFromTable(table_name: str, x_column: str, value_columns: List[str],
+                         aggregation: Optional[str] = None, chart_type: str = "bar",
+                         title: Optional[str] = None, filters: Optional[List[dict]] = None,
+                         order_by: Optional[List[str]] = None, limit: Optional[int] = None,
+                         y_unit: str = "数值", userName: str = "Unknown") -> dict:
+    """Draw a chart directly from a database table, without reading the rows first.
+    Prefer this over getDataFromDatabase + drawChart when the chart data comes from the database.
+
+    x_column: column used as the x axis (names for pie/rose/funnel), e.g. "对接人" or "项目名称".
+    value_columns: numeric columns, one series each, e.g. ["项目投资金额"]; pie/rose/funnel use the first one.
+    aggregation: optional "sum" | "avg" | "count" | "min" | "max", groups rows by x_column.
+        To count rows per group, pass x_column itself as the value column, e.g. value_columns ["对接人"]
+        with aggregation "count"; that series is named "count(对接人)".
+    chart_type: "bar" | "line" | "mixed" (first column bar, others line) | "pie" | "rose" | "funnel".
+    filters / order_by / limit: same format as queryTable.
+
+    Example: {"table_name": "项目统计", "x_column": "对接人", "value_columns": ["项目投资金额"],
+              "aggregation": "sum", "chart_type": "pie", "title": "各对接人项目总投资"}"""
+    try:
+        chart_args = {"table_name": table_name, "x_column": x_column, "value_columns": value_columns,
+                      "aggregation": aggregation, "chart_type": chart_type, "title": title,
+                      "filters": filters, "order_by": order_by, "limit": limit, "y_unit": y_unit,
+                      "userName": userName}
+        result = await singleflight.do(
+            call_key("chartFromTable", chart_args, ignore=("userName",)),
+            lambda: executor.run("chartFromTable", draw_table_chart, table_name, x_column, value_columns,
+                                 aggregation, chart_type, title, filters, order_by, limit, y_unit)
+        )
+        send_external_message(result, userName, "success", wait=False)
+        logger.info(f"✅ 数据表图表创建成功: {table_name}")
+        logger.info(f"📁 文件路径: {result}")
+        return {"success": True, "result": result}
+    except Exception as e:
+        logger.error(f"❌ 数据表图表创建失败: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> JSONResponse:
+    """运行指标，供监控抓取"""
+    return JSONResponse({
+        "executor": executor.stats(),
+        "chart_cache": chart_cache.stats(),
+        "geo_store": geo_store.stats(),
+        "vendor_assets": vendor_assets.stats(),
+        "singleflight": singleflight.stats(),
+        "database_pool": get_pool().stats(),
+        "schema_catalog": get_catalog(get_pool().db_path).stats(),
+        "index_advisor": get_advisor(get_pool().db_path).stats(),
+        "result_cache": result_cache.stats(),
+        "page_index": page_index.stats(),
+        "external_message": dispatcher.stats()
+    })
+
+@mcp.custom_route("/geo/{level}/{code}.json", methods=["GET"])
+async def geo_data(request: Request) -> Response:
+    """本地地图边界数据（页面可能从 file:// 打开，允许跨域）；本地没有时重定向到在线数据源"""
+    level, code = request.path_params["level"], request.path_params["code"]
+    if geo_store.path(code, level) is None:
+        return JSONResponse({"error": "无效的地图数据路径"}, status_code=404)
+    entry = await asyncio.to_thread(geo_store.read, code, level)
+    if entry is None:
+        return RedirectResponse(f"{geo_store.remote_url}/{code}_full.json", status_code=302)
+    body, etag = entry
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=86400",
+        "Access-Control-Allow-Origin": "*"
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@mcp.custom_route("/vendor/{path:path}", methods=["GET"])
+async def vendor_asset(request: Request) -> Response:
+    """固定版本的前端资源（路径带版本号，长期缓存），按 Accept-Encoding 返回预压缩文件；本地没有时重定向到 CDN"""
+    path = request.path_params["path"]
+    if path not in VENDOR_ASSETS:
+        return JSONResponse({"error": "未知的资源"}, status_code=404)
+    resolved = vendor_assets.resolve(path, request.headers.get("accept-encoding", ""))
+    if resolved is None:
+        return RedirectResponse(VENDOR_ASSETS[path], status_code=302)
+    file_path, encoding = resolved
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept-Encoding",
+        "Access-Control-Allow-Origin": "*"
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    media_type = CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+    return FileResponse(file_path, media_type=media_type, headers=headers)
+
+@mcp.custom_route("/status", methods=["GET"])
+async def status(request: Request) -> JSONResponse:
+    """依赖服务状态"""
+    circuit = dispatcher.breaker.stats()
+    return JSONResponse({
+        "external_message": {
+            "url": dispatcher.endpoint,
+            "available": circuit["state"] != "open",
+            "circuit": circuit
+        }
+    })
+
 async def main():
     """启动 MCP 服务器"""
     # 从配置文件读取设置，环境变量优先
-    host = os.getenv("MCP_HOST", config.server_config.get('host', "0.0.0.0"))
-    port = int(os.getenv("MCP_PORT", str(config.server_config.get('port', 8000))))
+    host = config.server_host
+    port = config.server_port
     path = os.getenv("MCP_PATH", config.server_config.get('path', "/sse"))
     
     logger.info(f"启动 MCP 服务器...")
     logger.info(f"地址: http://{host}:{port}{path}")
     
     # 记录已注册的工具
-    logger.info(f"已注册工具: openWebsite, getDataFromDatabase, drawChart")
+    tools = await mcp.get_tools()
+    logger.info(f"已注册工具: {', '.join(tools)}")
+
+    # 执行数据库迁移（只在启动时执行一次，读路径只检查版本）
+    version = await asyncio.to_thread(apply_migrations, config.database_path)
+    logger.info(f"数据库版本: {version}")
+
+    # 打开消息发件箱并启动投递线程（重放上次未投递的消息）
+    await asyncio.to_thread(dispatcher.start)
+
+    # 启动时预先构建页面索引
+    try:
+        await executor.run("resolveAndOpenWebsite", page_index.snapshot)
+    except Exception as e:
+        logger.warning(f"页面索引构建失败: {e}")
     
     try:
         await mcp.run_sse_async(host=host, port=port, path=path)
     except Exception as e:
         logger.error(f"服务器启动失败: {e}")
         raise
+    finally:
+        executor.shutdown(wait=False)
+        dispatcher.stop()
 
 if __name__ == '__main__':
     asyncio.run(main()) 
\ No newline at end of file
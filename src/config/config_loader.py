@@ -58,6 +58,40 @@ class ConfigLoader:
         """获取服务器配置"""
         return self._config.get('server', {})
 
+    @property
+    def server_host(self) -> str:
+        """服务器监听地址，环境变量 MCP_HOST 优先"""
+        return os.getenv("MCP_HOST", self.server_config.get('host', "0.0.0.0"))
+
+    @property
+    def server_port(self) -> int:
+        """服务器端口，环境变量 MCP_PORT 优先"""
+        return int(os.getenv("MCP_PORT", str(self.server_config.get('port', 8000))))
+
+    @property
+    def server_url(self) -> str:
+        """页面访问本服务器的地址：优先使用 server.public_url，否则由监听地址和端口拼出（通配地址换成 localhost）"""
+        public_url = self.server_config.get('public_url')
+        if public_url:
+            return public_url.rstrip('/')
+        host = self.server_host
+        if host in ("", "0.0.0.0", "::"):
+            host = "localhost"
+        elif ':' in host:
+            host = f"[{host}]"
+        return f"http://{host}:{self.server_port}"
+
+    def route_url(self, configured, route: str):
+        """本服务器某个路由的地址
+
+        Args:
+            configured: 配置中的地址，为 None 时使用 server_url + route，为空字符串时返回 None（不使用本地路由）
+            route (str): 路由前缀，如 "/geo"
+        """
+        if configured is None:
+            return self.server_url + route
+        return configured.rstrip('/') or None
+
     @property
     def logging_config(self):
         """获取日志配置"""
@@ -68,6 +102,18 @@ class ConfigLoader:
         """获取数据库配置"""
         return self._config.get('database', {})
 
+    @property
+    def database_path(self):
+        """获取数据库文件的绝对路径"""
+        db_config = self.database_config
+        if db_config.get('path'):
+            if os.path.isabs(db_config['path']):
+                return db_config['path']
+            # 相对路径，从项目根目录开始
+            return str(Path(__file__).parent.parent.parent / db_config['path'])
+        # 未配置路径时使用默认的 Data 目录
+        return str(Path(__file__).parent.parent / 'database' / 'Data' / db_config.get('name', 'project_storage.db'))
+
     @property
     def charts_config(self):
         """获取图表配置"""
@@ -78,6 +124,16 @@ class ConfigLoader:
         """获取MCP管道配置"""
         return self._config.get('mcp_pipe', {})
 
+    @property
+    def executor_config(self):
+        """获取工具执行池配置"""
+        return self._config.get('executor', {})
+
+    @property
+    def external_message_config(self):
+        """获取外部消息推送配置"""
+        return self._config.get('external_message', {})
+
     def get_config(self, key, default=None):
         """获取配置值"""
         return self._config.get(key, default) 
\ No newline at end of file
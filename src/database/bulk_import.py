@@ -0,0 +1,321 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from src.database.migrations import apply_migrations, dedupe_natural_key, ensure_natural_key_index, prepare_tables
+from src.database.schema_catalog import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# 冲突处理方式：update 按自然键更新（upsert），ignore 跳过已存在的行，error 遇到冲突报错
+CONFLICT_MODES = ('update', 'ignore', 'error')
+
+
+class ImportReport(NamedTuple):
+    """导入结果"""
+    table: str
+    rows: int
+    changed: int
+    chunks: int
+    seconds: float
+    ignored_columns: List[str]
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows / self.seconds, 1) if self.seconds > 0 else float(self.rows)
+
+    def summary(self) -> str:
+        text = (f"表 {self.table}: 读取 {self.rows} 行，写入/更新 {self.changed} 行，"
+                f"{self.chunks} 个事务，耗时 {self.seconds:.2f} 秒（{self.rows_per_second} 行/秒）")
+        if self.ignored_columns:
+            text += f"，忽略源文件中不存在于表的列: {', '.join(self.ignored_columns)}"
+        return text
+
+
+def _detect_encoding(path: str) -> str:
+    """Excel 导出的 CSV 可能是带 BOM 的 UTF-8，也可能是 GBK"""
+    with open(path, 'rb') as f:
+        sample = f.read(64 * 1024)
+    try:
+        sample.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # 采样截断在多字节字符中间时也会报错，只有错误出现在采样末尾之前才认为不是 UTF-8
+        if e.start >= len(sample) - 3:
+            return 'utf-8-sig'
+        return 'gb18030'
+
+
+def iter_csv(path: str, encoding: Optional[str] = None, delimiter: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """逐行读取 CSV（包括 Excel 导出的 CSV），空单元格转为 None
+
+    Args:
+        path (str): 文件路径
+        encoding (str, optional): 文件编码，默认自动识别 UTF-8(BOM) / GBK
+        delimiter (str, optional): 分隔符，默认自动识别逗号、分号、制表符
+    """
+    encoding = encoding or _detect_encoding(path)
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        if delimiter is None:
+            sample = f.read(16 * 1024)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+            except csv.Error:
+                delimiter = ','
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            yield {
+                (key or '').strip(): (value if value != '' else None)
+                for key, value in row.items() if key is not None
+            }
+
+
+def iter_jsonl(path: str, encoding: str = 'utf-8-sig') -> Iterator[Dict[str, Any]]:
+    """逐行读取 JSONL，每行一个 JSON 对象，跳过空行"""
+    with open(path, 'r', encoding=encoding) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{path} 第 {line_number} 行不是 JSON 对象")
+            yield record
+
+
+def iter_records(path: str, source_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """根据扩展名（或显式指定的格式 csv / jsonl）流式读取记录"""
+    if source_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        source_format = 'jsonl' if extension in ('.jsonl', '.ndjson') else 'csv'
+    if source_format == 'jsonl':
+        return iter_jsonl(path)
+    if source_format == 'csv':
+        return iter_csv(path)
+    raise ValueError(f"不支持的文件格式: {source_format}，可用: csv, jsonl")
+
+
+def build_insert_sql(table_name: str, columns: Sequence[str], key_columns: Sequence[str] = (),
+                     on_conflict: str = 'update', touch_columns: Sequence[str] = ()) -> str:
+    """生成按自然键处理冲突的 INSERT 语句
+
+    on_conflict 为 update 时生成 ON CONFLICT DO UPDATE，只在非键列内容变化时才更新，
+    touch_columns 中的列随之设为 CURRENT_TIMESTAMP。
+
+    Args:
+        table_name (str): 表名
+        columns (Sequence[str]): 插入的列，参数按此顺序绑定
+        key_columns (Sequence[str]): 自然键列，需要有对应的 UNIQUE 约束；为空时生成普通 INSERT
+        on_conflict (str): update / ignore / error
+        touch_columns (Sequence[str]): 内容变化时更新为当前时间的列
+    """
+    quoted = [quote_identifier(column) for column in columns]
+    sql = (f"INSERT INTO {quote_identifier(table_name)} ({', '.join(quoted)}) "
+           f"VALUES ({', '.join('?' for _ in columns)})")
+    if not key_columns or on_conflict == 'error':
+        return sql
+
+    conflict = f" ON CONFLICT ({', '.join(quote_identifier(column) for column in key_columns)})"
+    updates = [column for column in columns if column not in key_columns and column not in touch_columns]
+    if on_conflict == 'ignore' or not updates:
+        return sql + conflict + " DO NOTHING"
+
+    assignments = [f"{quote_identifier(column)} = excluded.{quote_identifier(column)}" for column in updates]
+    assignments += [f"{quote_identifier(column)} = CURRENT_TIMESTAMP" for column in touch_columns]
+    target = quote_identifier(table_name)
+    current = ", ".join(f"{target}.{quote_identifier(column)}" for column in updates)
+    incoming = ", ".join(f"excluded.{quote_identifier(column)}" for column in updates)
+    # 内容没有变化时不更新，避免无意义的写入和时间戳变化
+    return (sql + conflict + f" DO UPDATE SET {', '.join(assignments)}"
+            f" WHERE ({current}) IS NOT ({incoming})")
+
+
+def has_unique_key(conn: sqlite3.Connection, table_name: str, key_columns: Sequence[str]) -> bool:
+    """表上是否有恰好由 key_columns 组成的主键或唯一索引（ON CONFLICT 的前提）"""
+    table = quote_identifier(table_name)
+    wanted = set(key_columns)
+    primary = {row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[5]}
+    if primary and primary == wanted:
+        return True
+    for row in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        name, unique, partial = row[1], row[2], row[4]
+        if unique and not partial:
+            columns = {info[2] for info in conn.execute(f"PRAGMA index_info({quote_identifier(name)})")}
+            if columns == wanted:
+                return True
+    return False
+
+
+def key_index_name(table_name: str, key_columns: Sequence[str]) -> str:
+    """导入时为 --key 建立的唯一索引名"""
+    return f"_uq_{table_name}_{'_'.join(key_columns)}"
+
+
+class BulkImporter:
+    """批量导入器
+
+    记录按 chunk_size 分块，每块在一个事务中用 executemany 写入；导入期间使用
+    WAL + synchronous=NORMAL，结束后恢复原来的 synchronous 设置。
+    """
+
+    def __init__(self, db_path: str, chunk_size: int = 1000):
+        """初始化导入器
+
+        Args:
+            db_path (str): 数据库文件路径
+            chunk_size (int): 每个事务写入的行数
+        """
+        self.db_path = db_path
+        self.chunk_size = max(1, int(chunk_size))
+
+    def import_records(self, table_name: str, records: Iterable[Dict[str, Any]],
+                       key_columns: Optional[Sequence[str]] = None, on_conflict: str = 'update',
+                       touch_columns: Sequence[str] = ()) -> ImportReport:
+        """流式导入记录
+
+        Args:
+            table_name (str): 目标表
+            records (Iterable[Dict[str, Any]]): 记录（列名 -> 值），列以第一条记录为准
+            key_columns (Sequence[str], optional): 自然键列，指定后按 on_conflict 处理冲突；
+                没有对应的 UNIQUE 约束时先建立唯一索引，表中已有重复的键时抛出 DuplicateKeyError
+            on_conflict (str): update / ignore / error
+            touch_columns (Sequence[str]): 行内容实际变化时才设为 CURRENT_TIMESTAMP 的列（如 updated_at）
+
+        Returns:
+            ImportReport: 导入结果
+        """
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"不支持的冲突处理方式: {on_conflict}，可用: {', '.join(CONFLICT_MODES)}")
+
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=5000")
+            table_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")]
+            if not table_columns:
+                raise ValueError(f"表 {table_name} 不存在")
+
+            iterator = iter(records)
+            first = next(iterator, None)
+            if first is None:
+                return ImportReport(table_name, 0, 0, 0, 0.0, [])
+
+            columns = [column for column in first if column in table_columns]
+            ignored = [column for column in first if column not in table_columns]
+            if not columns:
+                raise ValueError(f"源数据中没有表 {table_name} 的列，表的列: {', '.join(table_columns)}")
+            key_columns = list(key_columns or [])
+            missing = [column for column in key_columns if column not in columns]
+            if missing:
+                raise ValueError(f"源数据缺少自然键列: {', '.join(missing)}")
+            unknown = [column for column in touch_columns if column not in table_columns]
+            if unknown:
+                raise ValueError(f"表 {table_name} 没有列: {', '.join(unknown)}")
+            if key_columns and on_conflict != 'error' and not has_unique_key(conn, table_name, key_columns):
+                # ON CONFLICT 需要唯一索引：只为本次导入的键建立，不在迁移中给所有数据库加约束
+                ensure_natural_key_index(conn, table_name, key_columns, key_index_name(table_name, key_columns))
+                logger.info(f"已为表 {table_name} 建立唯一索引 ({', '.join(key_columns)})")
+
+            # 迁移之后新建的表补建变更触发器和全文索引，导入的数据才会使查询缓存失效、能被检索到
+            prepare_tables(conn)
+            sql = build_insert_sql(table_name, columns, key_columns, on_conflict, touch_columns)
+            previous_sync = conn.execute("PRAGMA synchronous").fetchone()[0]
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+            rows = changed = chunks = 0
+            started = time.perf_counter()
+            pending = _prepend(first, iterator)
+            try:
+                while True:
+                    chunk = [tuple(record.get(column) for column in columns)
+                             for record in islice(pending, self.chunk_size)]
+                    if not chunk:
+                        break
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        cursor = conn.executemany(sql, chunk)
+                        conn.execute("COMMIT")
+                    except sqlite3.Error:
+                        conn.execute("ROLLBACK")
+                        raise
+                    rows += len(chunk)
+                    # rowcount 不包含触发器内的修改，内容未变化而跳过的行也不计入
+                    changed += max(cursor.rowcount, 0)
+                    chunks += 1
+            finally:
+                conn.execute(f"PRAGMA synchronous={int(previous_sync)}")
+
+            conn.execute("PRAGMA optimize")
+            report = ImportReport(table_name, rows, changed, chunks, time.perf_counter() - started, ignored)
+            logger.info(report.summary())
+            return report
+        finally:
+            conn.close()
+
+    def import_file(self, table_name: str, path: str, source_format: Optional[str] = None,
+                    **options) -> ImportReport:
+        """从 CSV / JSONL 文件导入，参数同 import_records"""
+        return self.import_records(table_name, iter_records(path, source_format), **options)
+
+
+def _prepend(first: Dict[str, Any], rest: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    yield first
+    yield from rest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：python -m src.database.bulk_import 文件 表名 [--key 列1,列2]"""
+    parser = argparse.ArgumentParser(description="从 CSV / JSONL 批量导入数据")
+    parser.add_argument('path', help="CSV（含 Excel 导出）或 JSONL 文件")
+    parser.add_argument('table', help="目标表名")
+    parser.add_argument('--key', help="自然键列，逗号分隔（没有 UNIQUE 约束时导入前自动建立唯一索引）")
+    parser.add_argument('--on-conflict', choices=CONFLICT_MODES, default='update', help="冲突处理方式")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="导入前删除 --key 重复的行（保留 id 最小的一行）并建立唯一索引")
+    parser.add_argument('--touch', default='', help="内容变化时更新为当前时间的列，逗号分隔，如 updated_at")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="文件格式，默认按扩展名识别")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="每个事务的行数")
+    parser.add_argument('--db', help="数据库文件路径，默认使用配置中的数据库")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = args.db
+    if db_path is None:
+        from src.config.config_loader import ConfigLoader
+        db_path = ConfigLoader().database_path
+
+    key_columns = [column for column in (args.key or '').split(',') if column]
+    if args.dedupe and not key_columns:
+        parser.error("--dedupe 需要同时指定 --key")
+    if args.dedupe:
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                deleted = dedupe_natural_key(conn, args.table, key_columns, key_index_name(args.table, key_columns))
+        finally:
+            conn.close()
+        print(f"表 {args.table} 删除了 {deleted} 条重复行")
+
+    # 导入前补齐迁移，已有表的变更触发器就位后写入才会使查询缓存失效
+    apply_migrations(db_path)
+    importer = BulkImporter(db_path, args.chunk_size)
+    report = importer.import_file(
+        args.table, args.path, args.format,
+        key_columns=key_columns,
+        on_conflict=args.on_conflict,
+        touch_columns=[column for column in args.touch.split(',') if column]
+    )
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from src.config.config_loader import ConfigLoader
+from src.database.migrations import check_schema_version
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """只读 SQLite 连接池
+
+    每个线程持有一个长连接，首次使用时打开并设置好 PRAGMA，之后在该线程内复用。
+    工具执行池的工作线程是长期存在的，因此连接数最多等于工作线程数。
+    """
+
+    def __init__(self, db_path: str, settings: Dict[str, Any] = None):
+        """初始化连接池
+
+        Args:
+            db_path (str): 数据库文件路径
+            settings (Dict[str, Any]): database.pool 配置
+        """
+        settings = settings or {}
+        self.db_path = db_path
+        self.cache_size_kb = settings.get('cache_size_kb', 16384)
+        self.mmap_size = settings.get('mmap_size', 256 * 1024 * 1024)
+        self.cached_statements = settings.get('cached_statements', 256)
+        self.busy_timeout = settings.get('busy_timeout', 5000)
+
+        self._local = threading.local()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.closed = 0
+        self.checkouts = 0
+        self.active = 0
+
+        self._enable_wal()
+
+    def _enable_wal(self):
+        """切换到 WAL 模式（持久化到数据库文件，只需执行一次），读写互不阻塞"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"设置 WAL 模式失败: {e}")
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # 只读连接，防止通过查询接口修改数据
+        conn.execute("PRAGMA query_only=ON")
+
+        with self._lock:
+            self._close_dead_threads_locked()
+            self._connections[threading.get_ident()] = conn
+            self.opened += 1
+        logger.debug(f"打开数据库连接: {self.db_path}")
+        return conn
+
+    def _close_dead_threads_locked(self):
+        """关闭已退出线程遗留的连接"""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in [ident for ident in self._connections if ident not in alive]:
+            try:
+                self._connections.pop(ident).close()
+            except sqlite3.Error:
+                pass
+            self.closed += 1
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出当前线程的连接，退出上下文时归还"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+
+        with self._lock:
+            self.checkouts += 1
+            self.active += 1
+        try:
+            yield conn
+        finally:
+            # 未提交的读事务在归还时结束，避免长期持有 WAL 快照
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """获取连接池统计"""
+        with self._lock:
+            return {
+                'db_path': self.db_path,
+                'open_connections': len(self._connections),
+                'active': self.active,
+                'opened': self.opened,
+                'closed': self.closed,
+                'checkouts': self.checkouts
+            }
+
+    def close_all(self):
+        """关闭所有连接"""
+        with self._lock:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self.closed += len(self._connections)
+            self._connections.clear()
+        self._local = threading.local()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = None) -> ConnectionPool:
+    """获取指定数据库的连接池（进程内共享）
+
+    Args:
+        db_path (str): 数据库文件路径，默认使用配置中的数据库
+
+    Raises:
+        SchemaVersionError: 数据库尚未迁移到当前版本
+    """
+    config = ConfigLoader()
+    if db_path is None:
+        db_path = config.database_path
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            # 只检查版本，不在读路径上执行迁移
+            check_schema_version(db_path)
+            pool = ConnectionPool(db_path, config.database_config.get('pool', {}))
+            _pools[db_path] = pool
+        return pool
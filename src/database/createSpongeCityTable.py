@@ -1,4 +1,11 @@
+import os
+import sys
+
+# 作为脚本运行时也能导入 src 包
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 from db_operations import DatabaseManager
+from src.database.migrations import NATURAL_KEYS, apply_migrations, dedupe_natural_key
 
 def create_sponge_city_table():
     """创建海绵城市平台URL存储表"""
@@ -21,26 +28,35 @@ def create_sponge_city_table():
         db.create_table("sponge_city_urls", table_columns)
         print("海绵城市平台URL存储表创建成功！")
         
-        # 插入数据
+        # (page_name, subpage_name) 为自然键：清理历史重复行并建立唯一索引（迁移 3 只合并完全相同的行，内容不同的重复键在这里按 id 保留第一行）
+        db.connect()
+        dedupe_natural_key(db.conn, "sponge_city_urls", NATURAL_KEYS["sponge_city_urls"])
+        db.conn.commit()
+
+        # 写入数据，重复运行时只更新内容有变化的行
+        url_columns = ["page_name", "subpage_name", "url", "description", "remarks"]
         url_data = [
-            (None, "首页", "登录页面", "http://159.75.69.88:9301/#/login", "平台登录入口", "需要账号密码", None, None),
-            (None, "项目管理", "项目库管理", "http://159.75.69.88:9301/#/project/library", "项目信息管理", "包含项目基本信息", None, None),
-            (None, "项目管理", "技术审查", "http://159.75.69.88:9301/#/project/designApproval", "项目技术审查", "包含设计审查信息", None, None),
-            (None, "监测监控", "监测数据", "http://159.75.69.88:9301/#/monitoring/monitorData", "实时监测数据", "包含各类监测指标", None, None),
-            (None, "监测监控", "数据分析", "http://159.75.69.88:9301/#/monitoring/monitorAnalyze", "数据统计分析", "包含数据分析结果", None, None),
-            (None, "绩效考核", "总体成效", "http://159.75.69.88:9301/#/performanceEvaluation/constructionEffectiveness/constructionEffectiveness", "建设成效评估", "包含总体评估结果", None, None),
-            (None, "绩效考核", "片区成效", "http://159.75.69.88:9301/#/performanceEvaluation/regionalAssessment/regionalAssessment", "片区评估", "包含片区评估结果", None, None),
-            (None, "系统管理", "用户管理", "http://159.75.69.88:9301/#/sys/user/list", "用户权限管理", "包含用户信息管理", None, None),
-            (None, "系统管理", "机构管理", "http://159.75.69.88:9301/#/sys/organizationManage/list", "组织机构管理", "包含机构信息管理", None, None),
-            (None, "海绵一张图", "全域总览", "http://47.93.136.18:8098/#/", "全域监测总览", "包含全域监测数据", None, None),
-            (None, "海绵一张图", "城市特征", "http://47.93.136.18:8098/#/urbanCharacteristics", "城市特征分析", "包含城市特征数据", None, None),
-            (None, "问禹AI", "问禹AI", "http://localhost:5000/modern-full", "AI助手", "可以帮助回答水务问题以及绘制表格/查询数据库等", None, None)
+            ("首页", "登录页面", "http://159.75.69.88:9301/#/login", "平台登录入口", "需要账号密码"),
+            ("项目管理", "项目库管理", "http://159.75.69.88:9301/#/project/library", "项目信息管理", "包含项目基本信息"),
+            ("项目管理", "技术审查", "http://159.75.69.88:9301/#/project/designApproval", "项目技术审查", "包含设计审查信息"),
+            ("监测监控", "监测数据", "http://159.75.69.88:9301/#/monitoring/monitorData", "实时监测数据", "包含各类监测指标"),
+            ("监测监控", "数据分析", "http://159.75.69.88:9301/#/monitoring/monitorAnalyze", "数据统计分析", "包含数据分析结果"),
+            ("绩效考核", "总体成效", "http://159.75.69.88:9301/#/performanceEvaluation/constructionEffectiveness/constructionEffectiveness", "建设成效评估", "包含总体评估结果"),
+            ("绩效考核", "片区成效", "http://159.75.69.88:9301/#/performanceEvaluation/regionalAssessment/regionalAssessment", "片区评估", "包含片区评估结果"),
+            ("系统管理", "用户管理", "http://159.75.69.88:9301/#/sys/user/list", "用户权限管理", "包含用户信息管理"),
+            ("系统管理", "机构管理", "http://159.75.69.88:9301/#/sys/organizationManage/list", "组织机构管理", "包含机构信息管理"),
+            ("海绵一张图", "全域总览", "http://47.93.136.18:8098/#/", "全域监测总览", "包含全域监测数据"),
+            ("海绵一张图", "城市特征", "http://47.93.136.18:8098/#/urbanCharacteristics", "城市特征分析", "包含城市特征数据"),
+            ("问禹AI", "问禹AI", "http://localhost:5000/modern-full", "AI助手", "可以帮助回答水务问题以及绘制表格/查询数据库等")
         
         ]
         
-        # 插入数据
-        db.insert_data("sponge_city_urls", url_data)
-        print("URL数据插入成功！")
+        db.upsert_data("sponge_city_urls", url_columns, url_data,
+                       key_columns=list(NATURAL_KEYS["sponge_city_urls"]), touch_columns=["updated_at"])
+        print("URL数据写入成功！")
+
+        # 表和数据就绪后执行数据库迁移（变更触发器、全文索引等）
+        print(f"数据库版本: {apply_migrations(db.db_name)}")
         
         # 查询并显示数据
         results = db.query_data("sponge_city_urls")
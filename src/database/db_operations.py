@@ -41,6 +41,7 @@ class DatabaseManager:
             table_name (str): 表名
             columns (List[Tuple[str, str]]): 列定义列表，每个元素为(列名, 数据类型)
         """
+        from src.database.migrations import prepare_tables
         if not self.conn:
             self.connect()
             
@@ -49,6 +50,8 @@ class DatabaseManager:
         
         try:
             self.cursor.execute(query)
+            # 已迁移的数据库为新表补建变更触发器和全文索引
+            prepare_tables(self.conn)
             self.conn.commit()
             print(f"表 {table_name} 创建成功")
         except sqlite3.Error as e:
@@ -75,6 +78,62 @@ class DatabaseManager:
         except sqlite3.Error as e:
             print(f"插入数据时出错: {e}")
 
+    def upsert_data(self, table_name: str, columns: List[str], data: List[Tuple[Any, ...]],
+                    key_columns: List[str], touch_columns: List[str] = ()) -> int:
+        """按自然键插入或更新数据，内容未变化的行不会被改写
+
+        Args:
+            table_name (str): 表名
+            columns (List[str]): data 中各值对应的列
+            data (List[Tuple[Any, ...]]): 要写入的数据列表
+            key_columns (List[str]): 自然键列，需要有对应的 UNIQUE 约束
+            touch_columns (List[str]): 行内容变化时更新为当前时间的列，如 updated_at
+
+        Returns:
+            int: 新插入或实际更新的行数
+        """
+        from src.database.bulk_import import build_insert_sql
+
+        if not self.conn:
+            self.connect()
+
+        query = build_insert_sql(table_name, columns, key_columns, 'update', touch_columns)
+        try:
+            changed = self.cursor.executemany(query, data).rowcount
+            self.conn.commit()
+            print(f"{table_name}: {len(data)} 条数据中新增或更新了 {changed} 条")
+            return changed
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            print(f"写入数据时出错: {e}")
+            return 0
+
+    def bulk_import(self, table_name: str, path: str, key_columns: List[str] = None,
+                    on_conflict: str = "update", chunk_size: int = 1000, touch_columns: List[str] = ()):
+        """从 CSV（含 Excel 导出）或 JSONL 文件分块批量导入数据
+
+        Args:
+            table_name (str): 表名
+            path (str): 文件路径，按扩展名识别格式
+            key_columns (List[str], optional): 自然键列，存在时按 on_conflict 处理重复行
+            on_conflict (str): update（更新已有行）/ ignore（跳过）/ error（报错）
+            chunk_size (int): 每个事务写入的行数
+            touch_columns (List[str]): 行内容变化时更新为当前时间的列，如 updated_at
+
+        Returns:
+            ImportReport: 导入结果（行数、事务数、每秒行数）
+        """
+        from src.database.bulk_import import BulkImporter
+
+        # 导入使用独立连接，先提交本连接上未完成的写入，避免互相等待锁
+        if self.conn:
+            self.conn.commit()
+        report = BulkImporter(self.db_name, chunk_size).import_file(
+            table_name, path, key_columns=key_columns, on_conflict=on_conflict, touch_columns=touch_columns
+        )
+        print(report.summary())
+        return report
+
     def query_data(self, table_name: str, conditions: str = None) -> List[Tuple]:
         """查询数据
         
@@ -1,7 +1,40 @@
+import base64
+import json
+import logging
 import sqlite3
-from typing import Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import os
 from src.config.config_loader import ConfigLoader
+from src.database.connection_pool import get_pool
+from src.database.index_advisor import get_advisor
+from src.database.schema_catalog import get_catalog, quote_identifier
+from src.database.query_builder import build_aggregate, build_select
+from src.database.result_formatter import check_format, format_rows, format_text
+from src.database.result_shaper import make_measure, shape_page, shape_stats
+from src.database.search_index import search
+
+logger = logging.getLogger(__name__)
+
+# fetchmany 每批读取的行数
+FETCH_CHUNK_SIZE = 256
+
+
+def encode_cursor(table_name: str, last_key: Any) -> str:
+    """生成分页游标（对调用方不透明）"""
+    payload = json.dumps({"t": table_name, "k": last_key}, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, table_name: str) -> Any:
+    """解析分页游标，返回上一页最后一行的主键值"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if payload["t"] == table_name:
+            return payload["k"]
+    except (ValueError, KeyError, TypeError):
+        pass
+    raise ValueError(f"无效的分页游标: {cursor}")
+
 
 class DatabaseReader:
     def __init__(self, db_name: str = None):
@@ -13,43 +46,52 @@ class DatabaseReader:
         # 获取配置
         config = ConfigLoader()
         
-        # 如果没有指定数据库名，使用配置中的名称
-        if db_name is None:
-            db_name = config.database_config.get('name', 'project_storage.db')
-        
         # 设置数据库文件路径
-        if config.database_config.get('path'):
-            # 如果配置中有绝对路径，使用配置路径
-            if os.path.isabs(config.database_config['path']):
-                self.db_name = config.database_config['path']
-            else:
-                # 相对路径，从项目根目录开始
-                project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-                self.db_name = os.path.join(project_root, config.database_config['path'])
+        if db_name is None or config.database_config.get('path'):
+            self.db_name = config.database_path
         else:
             # 如果配置中没有指定路径，使用默认路径
             current_dir = os.path.dirname(__file__)
             data_dir = os.path.join(current_dir, "Data")
             self.db_name = os.path.join(data_dir, db_name)
             
+        self.page_size = config.database_config.get('page_size', 200)
+        self.max_page_size = config.database_config.get('max_page_size', 1000)
+        self.pool = get_pool(self.db_name)
+        self.catalog = get_catalog(self.db_name)
+        self.advisor = get_advisor(self.db_name)
         self.conn = None
         self.cursor = None
-        print(f"数据库路径: {self.db_name}")
+        self._checkout = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+        return False
 
     def connect(self):
-        """连接到数据库"""
+        """从连接池借出当前线程的数据库连接"""
+        if self.conn:
+            return
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            self._checkout = self.pool.connection()
+            self.conn = self._checkout.__enter__()
             self.cursor = self.conn.cursor()
-            print(f"成功连接到数据库: {self.db_name}")
         except sqlite3.Error as e:
+            self._checkout = None
             print(f"连接数据库时出错: {e}")
 
     def disconnect(self):
-        """断开数据库连接"""
-        if self.conn:
-            self.conn.close()
-            print("数据库连接已关闭")
+        """将数据库连接归还连接池（连接本身保持打开，供后续复用）"""
+        if self._checkout is not None:
+            self.cursor.close()
+            self._checkout.__exit__(None, None, None)
+            self._checkout = None
+            self.conn = None
+            self.cursor = None
 
     def get_all_tables(self) -> List[str]:
         """获取数据库中所有表的名称
@@ -61,13 +103,7 @@ class DatabaseReader:
             self.connect()
             
         try:
-            self.cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' 
-                AND name NOT LIKE 'sqlite_%'
-            """)
-            tables = [table[0] for table in self.cursor.fetchall()]
-            return tables
+            return self.catalog.tables(self.conn)
         except sqlite3.Error as e:
             print(f"获取表列表时出错: {e}")
             return []
@@ -85,19 +121,21 @@ class DatabaseReader:
             self.connect()
             
         try:
-            self.cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = [column[1] for column in self.cursor.fetchall()]
-            return columns
+            return list(self.catalog.require_table(self.conn, table_name).columns)
         except sqlite3.Error as e:
             print(f"获取表列信息时出错: {e}")
             return []
 
-    def query_data(self, table_name: str, conditions: str = None) -> List[Tuple]:
+    def query_data(self, table_name: str, columns: List[str] = None, filters: List[Dict[str, Any]] = None,
+                   order_by: List[str] = None, limit: int = None) -> List[Tuple]:
         """查询数据
         
         Args:
             table_name (str): 表名
-            conditions (str, optional): WHERE条件语句
+            columns (List[str], optional): 返回的列，默认所有列
+            filters (List[Dict[str, Any]], optional): 结构化条件，如 [{"column": "对接人", "op": "=", "value": "张三"}]
+            order_by (List[str], optional): 排序列，列名前加 "-" 表示降序
+            limit (int, optional): 最大行数
             
         Returns:
             List[Tuple]: 查询结果
@@ -105,17 +143,219 @@ class DatabaseReader:
         if not self.conn:
             self.connect()
             
-        query = f"SELECT * FROM {table_name}"
-        if conditions:
-            query += f" WHERE {conditions}"
+        # 表名和列名经过目录校验，条件值全部以参数绑定
+        info = self.catalog.require_table(self.conn, table_name)
+        query, params, _ = build_select(info, columns, filters, order_by, limit)
             
         try:
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+            self.cursor.execute(query, params)
+            return list(self._iter_rows(self.cursor))
         except sqlite3.Error as e:
             print(f"查询数据时出错: {e}")
             return []
 
+    def query_table(self, table_name: str, columns: List[str] = None, filters: List[Dict[str, Any]] = None,
+                    order_by: List[str] = None, limit: int = None, output_format: str = 'text') -> Dict[str, Any]:
+        """按结构化条件查询并格式化结果
+
+        Returns:
+            Dict[str, Any]: result 为格式化后的数据，truncated 表示结果是否被 limit 截断，
+                plan 为执行计划摘要（使用的索引、是否全表扫描、索引建议）
+        """
+        if not self.conn:
+            self.connect()
+
+        output_format = check_format(output_format)
+        info = self.catalog.require_table(self.conn, table_name)
+        limit = max(1, min(int(limit or self.page_size), self.max_page_size))
+        # 多取一行用于判断结果是否被截断
+        query, params, selected = build_select(info, columns, filters, order_by, limit + 1)
+        plan = self.advisor.observe(self.conn, info, query, params, filters=filters, order_by=order_by,
+                                    columns=columns)
+        self.cursor.execute(query, params)
+        page = {"count": 0, "has_more": False}
+        output = format_rows(table_name, selected, self._take(self._iter_rows(self.cursor), limit, page), output_format)
+
+        if page["has_more"] and output_format == 'text':
+            output += f"\n结果超过 {limit} 行已截断，请增加过滤条件或调大 limit"
+        return {"result": output, "truncated": page["has_more"], "plan": plan.to_dict()}
+
+    def aggregate(self, table_name: str, group_by: List[str] = None, aggregates: List[Dict[str, Any]] = None,
+                  filters: List[Dict[str, Any]] = None, order_by: List[str] = None, limit: int = None,
+                  buckets: Dict[str, float] = None) -> Dict[str, Any]:
+        """在 SQLite 中执行 GROUP BY 聚合，按列返回结果
+
+        参数含义见 query_builder.build_aggregate。
+
+        Returns:
+            Dict[str, Any]: columns 为结果列名，data 为 {列名: 值列表}，row_count 为分组数，plan 为执行计划摘要
+        """
+        if not self.conn:
+            self.connect()
+
+        info = self.catalog.require_table(self.conn, table_name)
+        limit = max(1, min(int(limit or self.max_page_size), self.max_page_size))
+        query, params, columns = build_aggregate(info, group_by, aggregates, filters, order_by, limit, buckets)
+        value_columns = [item.get('column') for item in aggregates or [] if isinstance(item, dict)]
+        plan = self.advisor.observe(self.conn, info, query, params, filters=filters, group_by=group_by,
+                                    columns=[column for column in value_columns if column not in (None, '*')])
+        self.cursor.execute(query, params)
+
+        data: Dict[str, List[Any]] = {column: [] for column in columns}
+        row_count = 0
+        for row in self._iter_rows(self.cursor):
+            row_count += 1
+            for column, value in zip(columns, row):
+                if column in (buckets or {}) and value is not None:
+                    # 区间下限转为 "0-20" 形式的标签
+                    value = f"{value:g}-{value + buckets[column]:g}"
+                elif isinstance(value, float):
+                    value = round(value, 4)
+                data[column].append(value)
+        return {"columns": columns, "data": data, "row_count": row_count, "plan": plan.to_dict()}
+
+    def search(self, query: str, table_name: str = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """全文检索（FTS5 trigram，短词退化为 LIKE）
+
+        Args:
+            query (str): 检索词，多个词用空格分隔
+            table_name (str, optional): 只检索指定的表
+            limit (int): 最多返回的命中数
+
+        Returns:
+            List[Dict[str, Any]]: 命中结果，包含表名、id、相关度、片段和主要列
+        """
+        if not self.conn:
+            self.connect()
+        limit = max(1, min(int(limit or 10), self.max_page_size))
+        return search(self.conn, self.catalog, query, table_name, limit)
+
+    def _iter_rows(self, cursor: sqlite3.Cursor) -> Iterator[Tuple]:
+        """按批从游标中读取数据行"""
+        while True:
+            rows = cursor.fetchmany(FETCH_CHUNK_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+    def _take(self, rows: Iterator[Tuple], limit: int, page: Dict[str, Any]) -> Iterator[Tuple]:
+        """最多产出 limit 行，还有剩余行时将 page["has_more"] 置为 True"""
+        for row in rows:
+            if page["count"] == limit:
+                page["has_more"] = True
+                return
+            page["count"] += 1
+            yield row
+
+    def read_page(self, table_name: str, limit: int = None, cursor: str = None,
+                  columns: List[str] = None, output_format: str = 'text',
+                  max_chars: int = None, max_tokens: int = None) -> Dict[str, Any]:
+        """按主键分页读取表数据（keyset 分页）
+
+        每次最多读取 limit 行，内存占用与表的总行数无关。
+        指定 max_chars / max_tokens 时按预算裁剪结果，放不下时改为返回整表的列统计（同样不超过预算）和本页的游标。
+
+        Args:
+            table_name (str): 表名
+            limit (int, optional): 每页行数，默认使用配置中的 page_size
+            cursor (str, optional): 上一页返回的 next_cursor
+            columns (List[str], optional): 要返回的列，默认返回所有列
+            output_format (str): 输出格式 text / json / columnar / csv
+            max_chars (int, optional): 结果的最大字符数
+            max_tokens (int, optional): 结果的最大 token 数（估算）
+
+        Returns:
+            Dict[str, Any]: result 为格式化后的数据（超出预算时为列统计），next_cursor 为下一页游标
+                （没有更多数据时为 None，超出预算时为本页的 cursor），elided 为被省略内容的说明
+        """
+        if not self.conn:
+            self.connect()
+
+        output_format = check_format(output_format)
+        info = self.catalog.require_columns(self.conn, table_name, columns or [])
+        columns = list(columns) if columns else list(info.columns)
+        limit = max(1, min(int(limit or self.page_size), self.max_page_size))
+        key = quote_identifier(info.primary_key or 'rowid')
+
+        query = f"SELECT {key}, {', '.join(quote_identifier(c) for c in columns)} FROM {quote_identifier(table_name)}"
+        params: List[Any] = []
+        if cursor:
+            query += f" WHERE {key} > ?"
+            params.append(decode_cursor(cursor, table_name))
+        # 多取一行用于判断是否还有下一页
+        query += f" ORDER BY {key} LIMIT ?"
+        params.append(limit + 1)
+
+        self.cursor.execute(query, params)
+        page = {"count": 0, "has_more": False, "last_key": None}
+
+        if max_chars is None and max_tokens is None:
+            def page_rows():
+                # 第一列是主键，只用于生成游标
+                for row in self._take(self._iter_rows(self.cursor), limit, page):
+                    page["last_key"] = row[0]
+                    yield row[1:]
+
+            output = format_rows(table_name, columns, page_rows(), output_format)
+            next_cursor = encode_cursor(table_name, page["last_key"]) if page["has_more"] else None
+            if next_cursor and output_format == 'text':
+                output += "\n还有更多数据，使用 next_cursor 读取下一页"
+            return {"result": output, "next_cursor": next_cursor, "elided": []}
+
+        keyed_rows = list(self._take(self._iter_rows(self.cursor), limit, page))
+        budget, measure = make_measure(max_chars, max_tokens)
+        keep = [column for column in columns if column == info.primary_key]
+        keep += [column for column in columns if column not in keep][:1]
+        shaped = shape_page(table_name, columns, [row[1:] for row in keyed_rows], output_format,
+                            budget, measure, keep)
+        if shaped is None:
+            # 放不下时改为返回裁剪到预算以内的整表列统计，游标保持不变，调整参数后可从同一位置重新读取
+            retry = "减少 columns、减小 limit 或提高预算后，用同一 cursor 重新读取"
+            summary = shape_stats(self.column_stats(table_name, columns), budget, measure, keep)
+            if summary is None:
+                return {"result": "", "next_cursor": cursor,
+                        "elided": [f"超出预算，本页 {len(keyed_rows)} 行未返回；{retry}"]}
+            notes = [f"本页 {len(keyed_rows)} 行超出预算，已改为返回整张表的行数和各列的最小值、最大值、"
+                     f"不同值个数、空值个数；{retry}"]
+            omitted = [column for column in columns if column not in summary["columns"]]
+            if omitted:
+                notes.append(f"列统计中已省略列: {', '.join(omitted)}")
+            return {"result": summary, "next_cursor": cursor, "elided": notes}
+
+        has_more = page["has_more"] or shaped.row_count < len(keyed_rows)
+        next_cursor = encode_cursor(table_name, keyed_rows[shaped.row_count - 1][0]) if has_more else None
+        notes = list(shaped.notes)
+        if next_cursor:
+            notes.append("还有更多数据，使用 next_cursor 读取下一页")
+        return {"result": shaped.output, "next_cursor": next_cursor, "elided": notes}
+
+    def column_stats(self, table_name: str, columns: List[str] = None) -> Dict[str, Any]:
+        """统计整张表的行数和各列的最小值、最大值、不同值个数和空值个数
+
+        Returns:
+            Dict[str, Any]: {"row_count": 行数, "columns": {列名: {"min", "max", "distinct", "nulls"}}}
+        """
+        if not self.conn:
+            self.connect()
+
+        info = self.catalog.require_columns(self.conn, table_name, columns or [])
+        columns = list(columns) if columns else list(info.columns)
+        terms = ["COUNT(*)"]
+        for column in columns:
+            quoted = quote_identifier(column)
+            terms += [f"MIN({quoted})", f"MAX({quoted})", f"COUNT(DISTINCT {quoted})", f"COUNT({quoted})"]
+        row = self.conn.execute(f"SELECT {', '.join(terms)} FROM {quote_identifier(table_name)}").fetchone()
+
+        def clip(value):
+            return value[:29] + '…' if isinstance(value, str) and len(value) > 30 else value
+
+        stats = {}
+        for i, column in enumerate(columns):
+            minimum, maximum, distinct, non_null = row[1 + i * 4: 5 + i * 4]
+            stats[column] = {"min": clip(minimum), "max": clip(maximum), "distinct": distinct,
+                             "nulls": row[0] - non_null}
+        return {"row_count": row[0], "columns": stats}
+
     def format_results(self, table_name: str, results: List[Tuple], columns: List[str] = None) -> str:
         """将查询结果转换为格式化的字符串
         
@@ -127,39 +367,10 @@ class DatabaseReader:
         Returns:
             str: 格式化后的字符串
         """
-        if not results:
-            return f"表 {table_name} 没有数据"
-            
         # 如果没有提供列名，则获取列名
         if columns is None:
             columns = self.get_table_columns(table_name)
-            
-        # 计算每列的最大宽度
-        col_widths = [len(col) for col in columns]
-        for row in results:
-            for i, value in enumerate(row):
-                col_widths[i] = max(col_widths[i], len(str(value)))
-                
-        # 创建表头
-        header = " | ".join(f"{col:{width}}" for col, width in zip(columns, col_widths))
-        separator = "-+-".join("-" * width for width in col_widths)
-        
-        # 创建数据行
-        rows = []
-        for row in results:
-            formatted_row = " | ".join(f"{str(value):{width}}" for value, width in zip(row, col_widths))
-            rows.append(formatted_row)
-            
-        # 组合所有部分
-        output = [
-            f"\n表 {table_name} 的数据:",
-            header,
-            separator,
-            *rows,
-            f"\n共 {len(results)} 条记录"
-        ]
-        
-        return "\n".join(output)
+        return format_text(table_name, columns, results)
 
     def read_all_data(self) -> str:
         """读取所有表的所有数据
@@ -197,7 +408,7 @@ class DatabaseReader:
             # 获取列名
             table = table_name
             columns = self.get_table_columns(table)
-            print(f"\n表 {table} 的列: {', '.join(columns)}")
+            logger.debug(f"表 {table} 的列: {', '.join(columns)}")
                 
             # 获取数据
             data = self.query_data(table)
@@ -207,6 +418,7 @@ class DatabaseReader:
                     
         except sqlite3.Error as e:
             print(f"读取表 {table} 数据时出错: {e}")  
+            output = f"读取表 {table} 数据时出错: {e}"
         return output
 
 def main():
@@ -0,0 +1,350 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.config.config_loader import ConfigLoader
+from src.database.migrations import TABLE_VERSIONS_TABLE
+from src.database.schema_catalog import TableInfo, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# 可以用索引定位的条件：等值类排在索引前部，范围类最多一列放在等值列之后
+EQUALITY_OPERATORS = ('=', '==', 'in', 'is_null')
+RANGE_OPERATORS = ('<', '<=', '>', '>=', 'between')
+
+# 自动创建的索引名前缀
+INDEX_PREFIX = "ix_"
+# 缓存的查询计划条数
+PLAN_CACHE_SIZE = 256
+# stats 中列出的查询模式数
+STATS_PATTERNS = 20
+
+_INDEX_PATTERN = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+
+
+class QueryPlan(NamedTuple):
+    """一次查询的执行计划摘要"""
+    indexes: Tuple[str, ...]
+    full_scan: bool
+    suggestion: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        plan = {'indexes': list(self.indexes), 'full_scan': self.full_scan}
+        if self.suggestion:
+            plan['suggestion'] = self.suggestion
+        return plan
+
+
+def index_name(table_name: str, columns: Sequence[str]) -> str:
+    """索引名：ix_表名_列1_列2，过长时用摘要代替列名"""
+    name = f"{INDEX_PREFIX}{table_name}_{'_'.join(columns)}"
+    if len(name) > 64:
+        digest = hashlib.sha1("\x00".join(columns).encode('utf-8')).hexdigest()[:10]
+        name = f"{INDEX_PREFIX}{table_name}_{digest}"
+    return name
+
+
+def create_index_sql(table_name: str, columns: Sequence[str]) -> str:
+    """生成 CREATE INDEX 语句"""
+    return (f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name(table_name, columns))} "
+            f"ON {quote_identifier(table_name)} ({', '.join(quote_identifier(column) for column in columns)})")
+
+
+def predicate_columns(filters: Optional[List[Dict[str, Any]]]) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """从结构化条件中提取可用索引定位的列
+
+    Returns:
+        Tuple: (等值条件列, 范围条件列)，!=、not_in、like 等无法用索引定位的条件不计入
+    """
+    equality: List[str] = []
+    ranges: List[str] = []
+    for condition in filters or []:
+        column = condition.get('column')
+        op = str(condition.get('op', '=')).strip().lower()
+        if op in EQUALITY_OPERATORS and column not in equality:
+            equality.append(column)
+        elif op in RANGE_OPERATORS and column not in ranges:
+            ranges.append(column)
+    ranges = [column for column in ranges if column not in equality]
+    return tuple(equality), tuple(ranges)
+
+
+def pattern_key(table_name: str, filters: Optional[List[Dict[str, Any]]] = None,
+                group_by: Optional[List[str]] = None, order_by: Optional[List[str]] = None) -> Tuple:
+    """查询模式：表名、等值条件列、范围条件列、分组列和排序列，条件的具体取值不计入"""
+    equality, ranges = predicate_columns(filters)
+    return table_name, equality, ranges, tuple(group_by or ()), tuple(order_by or ())
+
+
+class IndexAdvisor:
+    """二级索引顾问
+
+    记录每类查询的条件列、分组列和排序列，用 EXPLAIN QUERY PLAN 检查是否全表扫描。
+    全表扫描且没有合适的索引时给出建议（等值列 + 一个范围列/分组列/排序列 + 覆盖列），
+    配置 database.auto_index.enabled 后，同一建议出现 min_hits 次即自动创建。
+    """
+
+    def __init__(self, db_path: str, settings: Dict[str, Any] = None):
+        """初始化索引顾问
+
+        Args:
+            db_path (str): 数据库文件路径
+            settings (Dict[str, Any], optional): database.auto_index 配置
+        """
+        settings = settings or {}
+        self.db_path = db_path
+        self.auto_create = bool(settings.get('enabled', False))
+        self.min_hits = int(settings.get('min_hits', 3))
+        self.min_rows = int(settings.get('min_rows', 1000))
+        self.max_per_table = int(settings.get('max_per_table', 4))
+        self.max_columns = int(settings.get('max_columns', 6))
+        self._lock = threading.Lock()
+        self._plans: "OrderedDict[str, Tuple[int, List[str]]]" = OrderedDict()
+        self._patterns: Dict[Tuple, Dict[str, Any]] = {}
+        self.created: List[str] = []
+        self.explains = 0
+        # 行数不足 min_rows 的表 -> 计数时的表版本号，版本号不变时不再打开写连接重新计数
+        self._small_tables: Dict[str, Optional[int]] = {}
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params: Sequence[Any]) -> List[str]:
+        """获取查询计划（按 SQL 文本缓存，表结构变化后失效）"""
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            cached = self._plans.get(sql)
+            if cached is not None and cached[0] == version:
+                self._plans.move_to_end(sql)
+                return cached[1]
+        # EXPLAIN 不会检查 schema cookie，先执行一条普通语句让连接加载最新的表结构；
+        # sqlite3 模块按 SQL 文本缓存预编译语句，文本中带上版本号，避免复用旧结构下生成的计划
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        details = [
+            row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql} /* schema {version} */", params).fetchall()
+        ]
+        with self._lock:
+            self.explains += 1
+            self._plans[sql] = (version, details)
+            while len(self._plans) > PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return details
+
+    @staticmethod
+    def summarize(table_name: str, details: List[str]) -> Tuple[Tuple[str, ...], bool]:
+        """从计划中提取使用的索引，以及是否对该表做了不借助索引的全表扫描"""
+        indexes = []
+        full_scan = False
+        for detail in details:
+            match = _INDEX_PATTERN.search(detail)
+            if match and match.group(1) not in indexes:
+                indexes.append(match.group(1))
+            elif 'USING INTEGER PRIMARY KEY' in detail or 'USING ROWID' in detail:
+                if 'PRIMARY KEY' not in indexes:
+                    indexes.append('PRIMARY KEY')
+            if detail == f"SCAN {table_name}":
+                full_scan = True
+        return tuple(indexes), full_scan
+
+    def propose(self, info: TableInfo, filters: Optional[List[Dict[str, Any]]] = None,
+                group_by: Optional[List[str]] = None, order_by: Optional[List[str]] = None,
+                columns: Optional[List[str]] = None) -> Optional[Tuple[str, ...]]:
+        """根据查询形状给出索引列，没有可用索引的条件时返回 None"""
+        equality, ranges = predicate_columns(filters)
+        index_columns = list(equality)
+        if ranges:
+            index_columns.append(ranges[0])
+        elif group_by:
+            index_columns.extend(column for column in group_by if column not in index_columns)
+        elif order_by:
+            index_columns.extend(item.lstrip('-') for item in order_by if item.lstrip('-') not in index_columns)
+        index_columns = [column for column in index_columns if column in info.types and column != 'id']
+        if not index_columns:
+            return None
+
+        # 查询用到的其余列也放进索引（覆盖索引），查询只读索引即可，不用回表
+        covering: List[str] = []
+        for column in list(columns or []) + list(ranges[1:]) + list(group_by or []) + [
+                item.lstrip('-') for item in order_by or []]:
+            if column in info.types and column not in index_columns and column not in covering:
+                covering.append(column)
+        if len(index_columns) + len(covering) <= self.max_columns:
+            index_columns += covering
+        return tuple(index_columns[:self.max_columns])
+
+    @staticmethod
+    def _existing_prefixes(conn: sqlite3.Connection, table_name: str) -> List[Tuple[str, ...]]:
+        indexes = []
+        for row in conn.execute(f"PRAGMA index_list({quote_identifier(table_name)})").fetchall():
+            indexes.append(tuple(
+                info[2] for info in conn.execute(f"PRAGMA index_info({quote_identifier(row[1])})").fetchall()
+            ))
+        return indexes
+
+    def observe(self, conn: sqlite3.Connection, info: TableInfo, sql: str, params: Sequence[Any],
+                filters: Optional[List[Dict[str, Any]]] = None, group_by: Optional[List[str]] = None,
+                order_by: Optional[List[str]] = None, columns: Optional[List[str]] = None) -> QueryPlan:
+        """记录一次查询并检查它的执行计划
+
+        Args:
+            conn (sqlite3.Connection): 执行查询的连接
+            info (TableInfo): 表元数据
+            sql (str): 查询语句
+            params (Sequence[Any]): 查询参数
+            filters / group_by / order_by / columns: 查询的结构化参数，用于提取条件列和覆盖列
+
+        Returns:
+            QueryPlan: 使用的索引、是否全表扫描、索引建议
+        """
+        indexes, full_scan = self.summarize(info.name, self.explain(conn, sql, params))
+        proposal = self.propose(info, filters, group_by, order_by, columns) if full_scan else None
+        if proposal is not None:
+            # 已有以这些列开头的索引但规划器仍选择扫描（表很小或条件选择性差），不再重复建议
+            if any(existing[:len(proposal)] == proposal or proposal[:len(existing)] == existing
+                   for existing in self._existing_prefixes(conn, info.name)):
+                proposal = None
+
+        equality, ranges = predicate_columns(filters)
+        key = pattern_key(info.name, filters, group_by, order_by)
+        with self._lock:
+            pattern = self._patterns.setdefault(key, {
+                'table': info.name,
+                'equality': list(equality),
+                'range': list(ranges),
+                'group_by': list(group_by or []),
+                'order_by': list(order_by or []),
+                'hits': 0,
+                'cache_hits': 0,
+                'full_scans': 0,
+                'indexes': [],
+                'suggestion': None
+            })
+            pattern['hits'] += 1
+            pattern['full_scans'] += int(full_scan)
+            pattern['indexes'] = list(indexes)
+            pattern['suggestion'] = create_index_sql(info.name, proposal) if proposal else None
+            hits = pattern['hits']
+            created_for_table = sum(1 for name in self.created if name.startswith(f"{INDEX_PREFIX}{info.name}_"))
+
+        if (proposal is not None and self.auto_create and hits >= self.min_hits
+                and created_for_table < self.max_per_table and not self._known_small(conn, info.name)):
+            if self.create_index(info.name, proposal):
+                indexes, full_scan = self.summarize(info.name, self.explain(conn, sql, params))
+                proposal = None
+                with self._lock:
+                    pattern['indexes'] = list(indexes)
+                    pattern['suggestion'] = None
+
+        plan = QueryPlan(indexes, full_scan, create_index_sql(info.name, proposal) if proposal else None)
+        logger.debug(f"查询计划 {info.name}: 索引={list(indexes)} 全表扫描={full_scan}")
+        return plan
+
+    def record_hit(self, table_name: str, filters: Optional[List[Dict[str, Any]]] = None,
+                   group_by: Optional[List[str]] = None, order_by: Optional[List[str]] = None) -> bool:
+        """记录一次由结果缓存直接返回的查询：不执行 EXPLAIN，只累加该查询模式的命中次数
+
+        Returns:
+            bool: 该查询模式此前已被 observe 记录过时为 True
+        """
+        with self._lock:
+            pattern = self._patterns.get(pattern_key(table_name, filters, group_by, order_by))
+            if pattern is None:
+                return False
+            pattern['hits'] += 1
+            pattern['cache_hits'] += 1
+            return True
+
+    @staticmethod
+    def _table_version(conn: sqlite3.Connection, table_name: str) -> Optional[int]:
+        try:
+            row = conn.execute(
+                f"SELECT version FROM {TABLE_VERSIONS_TABLE} WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def _known_small(self, conn: sqlite3.Connection, table_name: str) -> bool:
+        """表在上次计数后没有写入且行数不足 min_rows；没有版本记录的表无法判断，每次都重新计数"""
+        with self._lock:
+            if table_name not in self._small_tables:
+                return False
+            counted_version = self._small_tables[table_name]
+        return counted_version is not None and counted_version == self._table_version(conn, table_name)
+
+    @staticmethod
+    def _row_count(conn: sqlite3.Connection, table_name: str) -> int:
+        # 优先使用 ANALYZE 的统计，没有统计时再计数
+        try:
+            row = conn.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? AND idx IS NULL", (table_name,)
+            ).fetchone()
+            if row and row[0]:
+                return int(str(row[0]).split()[0])
+        except sqlite3.Error:
+            pass
+        return conn.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)}").fetchone()[0]
+
+    def create_index(self, table_name: str, columns: Sequence[str]) -> bool:
+        """检查行数后创建索引并更新统计信息
+
+        连接池为只读连接，行数检查和建索引都在单独的写连接上进行，不占用查询连接。
+        行数不足 min_rows 时不创建，并记下当时的表版本号，表有写入之前不再重复计数。
+
+        Returns:
+            bool: 是否创建了索引
+        """
+        name = index_name(table_name, columns)
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=5000")
+            # 行数和版本号在同一个读事务中读取，两者对应同一份数据
+            conn.execute("BEGIN")
+            try:
+                rows = self._row_count(conn, table_name)
+                version = self._table_version(conn, table_name)
+            finally:
+                conn.execute("COMMIT")
+            if rows < self.min_rows:
+                with self._lock:
+                    self._small_tables[table_name] = version
+                logger.debug(f"表 {table_name} 只有 {rows} 行，少于 {self.min_rows} 行，暂不创建索引")
+                return False
+            conn.execute(create_index_sql(table_name, columns))
+            conn.execute(f"ANALYZE {quote_identifier(name)}")
+        except sqlite3.Error as e:
+            logger.warning(f"创建索引 {name} 失败: {e}")
+            return False
+        finally:
+            conn.close()
+        with self._lock:
+            self._small_tables.pop(table_name, None)
+            self.created.append(name)
+        logger.info(f"已自动创建索引 {name} ({', '.join(columns)})")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """获取顾问统计：各查询模式的命中次数、全表扫描次数、使用的索引和建议"""
+        with self._lock:
+            patterns = sorted(self._patterns.values(), key=lambda pattern: -pattern['hits'])
+            return {
+                'auto_create': self.auto_create,
+                'explains': self.explains,
+                'created': list(self.created),
+                'patterns': [dict(pattern) for pattern in patterns[:STATS_PATTERNS]]
+            }
+
+
+_advisors: Dict[str, IndexAdvisor] = {}
+_advisors_lock = threading.Lock()
+
+
+def get_advisor(db_path: str) -> IndexAdvisor:
+    """获取指定数据库的索引顾问（进程内共享）"""
+    with _advisors_lock:
+        advisor = _advisors.get(db_path)
+        if advisor is None:
+            advisor = IndexAdvisor(db_path, ConfigLoader().database_config.get('auto_index', {}))
+            _advisors[db_path] = advisor
+        return advisor
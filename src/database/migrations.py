@@ -0,0 +1,305 @@
+import argparse
+import logging
+import sqlite3
+import sys
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.database.schema_catalog import is_internal_table, quote_identifier
+from src.database.search_index import ensure_search_indexes
+
+logger = logging.getLogger(__name__)
+
+TABLE_VERSIONS_TABLE = "_table_versions"
+
+# 各表的自然键：同一自然键只保留一行，种子数据按自然键 upsert
+NATURAL_KEYS: Dict[str, Tuple[str, ...]] = {
+    'sponge_city_urls': ('page_name', 'subpage_name'),
+}
+
+
+def ensure_change_triggers(conn: sqlite3.Connection) -> int:
+    """为每张对外可见的表创建变更计数触发器
+
+    表上的每次 INSERT/UPDATE/DELETE 都会把 _table_versions 中对应的版本号加一，
+    查询缓存据此判断数据是否变化。已存在的触发器不会重复创建。
+
+    Returns:
+        int: 新建触发器的表数量
+    """
+    tables = [
+        name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        if not is_internal_table(name)
+    ]
+    existing = {
+        name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger'").fetchall()
+    }
+    created = 0
+    for table in tables:
+        conn.execute(
+            f"INSERT OR IGNORE INTO {TABLE_VERSIONS_TABLE} (table_name, version) VALUES (?, 0)",
+            (table,)
+        )
+        literal = table.replace("'", "''")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            trigger = f"_tv_{table}_{event.lower()}"
+            if trigger in existing:
+                continue
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {quote_identifier(trigger)}
+                AFTER {event} ON {quote_identifier(table)}
+                BEGIN
+                    UPDATE {TABLE_VERSIONS_TABLE} SET version = version + 1 WHERE table_name = '{literal}';
+                END
+            """)
+            created += 1
+    return created
+
+
+def prepare_tables(conn: sqlite3.Connection):
+    """为迁移之后新建的表补建变更触发器和全文索引（在写连接上调用，幂等）
+
+    建表、导入和服务器启动（apply_migrations）时调用；读路径不执行 DDL，
+    没有版本记录的表查询时不使用结果缓存，没有全文索引的表检索时使用 LIKE。
+    只补建数据库已执行过的迁移所建立的对象。
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= 1:
+        ensure_change_triggers(conn)
+    if version >= 2:
+        ensure_search_indexes(conn)
+
+
+def _create_table_versions(conn: sqlite3.Connection):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_VERSIONS_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    ensure_change_triggers(conn)
+
+
+def _create_search_indexes(conn: sqlite3.Connection):
+    ensure_search_indexes(conn)
+
+
+def natural_key_index_name(table_name: str) -> str:
+    """自然键唯一索引名"""
+    return f"_uq_{table_name}"
+
+
+class DuplicateKeyError(RuntimeError):
+    """表中存在自然键重复的行，无法建立唯一索引"""
+
+
+def find_duplicate_keys(conn: sqlite3.Connection, table_name: str, key_columns: Sequence[str],
+                        limit: int = 10) -> List[Tuple[Tuple[Any, ...], int]]:
+    """查找自然键重复的键值，返回 [(键值, 行数)]，最多 limit 组"""
+    keys = ", ".join(quote_identifier(column) for column in key_columns)
+    rows = conn.execute(
+        f"SELECT {keys}, COUNT(*) FROM {quote_identifier(table_name)} "
+        f"GROUP BY {keys} HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+    return [(tuple(row[:-1]), row[-1]) for row in rows]
+
+
+def ensure_natural_key_index(conn: sqlite3.Connection, table_name: str, key_columns: Sequence[str],
+                             index_name: Optional[str] = None):
+    """建立自然键唯一索引，不删除任何数据
+
+    Args:
+        index_name (str, optional): 索引名，默认为 natural_key_index_name(table_name)
+
+    Raises:
+        DuplicateKeyError: 表中有重复的键，错误信息中列出重复的键值；
+            用 dedupe_natural_key（或 python -m src.database.migrations --dedupe）清理后重试
+    """
+    duplicates = find_duplicate_keys(conn, table_name, key_columns)
+    if duplicates:
+        report = "; ".join(f"{key} x{count}" for key, count in duplicates)
+        raise DuplicateKeyError(
+            f"表 {table_name} 的自然键 ({', '.join(key_columns)}) 有重复行，无法建立唯一索引: {report}。"
+            f"确认后运行 python -m src.database.migrations --dedupe 删除重复行（保留 id 最小的一行）"
+        )
+    keys = ", ".join(quote_identifier(column) for column in key_columns)
+    conn.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {quote_identifier(index_name or natural_key_index_name(table_name))} "
+        f"ON {quote_identifier(table_name)} ({keys})"
+    )
+
+
+def dedupe_natural_key(conn: sqlite3.Connection, table_name: str, key_columns: Sequence[str],
+                       index_name: Optional[str] = None) -> int:
+    """删除自然键重复的行（保留 id 最小的一行）并建立唯一索引
+
+    会删除数据，只由初始化/导入脚本显式调用，不在迁移中执行。
+    注意 SQLite 的 UNIQUE 约束中 NULL 互不相等，键列为 NULL 的行不参与去重。
+
+    Returns:
+        int: 删除的重复行数
+    """
+    table = quote_identifier(table_name)
+    keys = ", ".join(quote_identifier(column) for column in key_columns)
+    deleted = conn.execute(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {keys})"
+    ).rowcount
+    ensure_natural_key_index(conn, table_name, key_columns, index_name)
+    if deleted:
+        logger.info(f"表 {table_name} 删除了 {deleted} 条自然键重复的行")
+    return deleted
+
+
+def delete_exact_duplicates(conn: sqlite3.Connection, table_name: str) -> int:
+    """删除除 id 外所有列都相同的重复行（保留 id 最小的一行），不会丢失任何数据
+
+    Returns:
+        int: 删除的行数
+    """
+    table = quote_identifier(table_name)
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall() if row[1] != 'id']
+    # GROUP BY 中 NULL 视为相同，NULL 列相同的行也会合并
+    values = ", ".join(quote_identifier(column) for column in columns)
+    deleted = conn.execute(
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY {values})"
+    ).rowcount
+    if deleted:
+        logger.info(f"表 {table_name} 删除了 {deleted} 条完全相同的重复行")
+    return deleted
+
+
+def _create_natural_keys(conn: sqlite3.Connection):
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+    for table_name, key_columns in NATURAL_KEYS.items():
+        if table_name in existing:
+            # 旧的初始化脚本每次运行都会重复插入同样的行，这些行可以直接合并；内容不同的重复键仍然报错
+            delete_exact_duplicates(conn, table_name)
+            ensure_natural_key_index(conn, table_name, key_columns)
+
+
+# 按顺序执行的迁移步骤，版本号记录在 PRAGMA user_version 中，只能追加不能修改
+# 迁移只建表/索引/触发器；迁移 3 只合并完全相同的重复行，自然键相同而内容不同时报错，由 --dedupe 显式清理
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _create_table_versions),
+    (2, _create_search_indexes),
+    (3, _create_natural_keys),
+]
+
+
+# 代码期望的数据库版本
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库版本落后于代码，需要先执行迁移"""
+
+
+def check_schema_version(db_path: str) -> int:
+    """检查数据库是否已迁移到 SCHEMA_VERSION（只读，不执行迁移）
+
+    连接池和结果缓存打开数据库前调用；迁移由服务器启动和导入/初始化脚本显式执行。
+
+    Raises:
+        SchemaVersionError: user_version 低于 SCHEMA_VERSION
+
+    Returns:
+        int: 当前 user_version
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+    if version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"数据库 {db_path} 的版本为 {version}，需要 {SCHEMA_VERSION}，"
+            f"请先运行 python -m src.database.migrations"
+        )
+    return version
+
+
+def apply_migrations(db_path: str) -> int:
+    """执行尚未应用的迁移
+
+    Args:
+        db_path (str): 数据库文件路径
+
+    Returns:
+        int: 迁移后的 user_version
+
+    Raises:
+        DuplicateKeyError: 迁移 3 发现自然键相同而内容不同的行（不会自动删除）
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout=5000")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in MIGRATIONS:
+            if target <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version={int(target)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logger.info(f"数据库迁移完成: user_version {version} -> {target}")
+            version = target
+        # 上次迁移之后新建的表
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            prepare_tables(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+    finally:
+        conn.close()
+
+
+def dedupe_natural_keys(db_path: str) -> Dict[str, int]:
+    """对 NATURAL_KEYS 中已存在的表执行 dedupe_natural_key，返回各表删除的行数"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout=5000")
+        existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+        deleted = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table_name, key_columns in NATURAL_KEYS.items():
+                if table_name in existing:
+                    deleted[table_name] = dedupe_natural_key(conn, table_name, key_columns)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return deleted
+    finally:
+        conn.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：python -m src.database.migrations [--db 路径]"""
+    parser = argparse.ArgumentParser(description="执行数据库迁移")
+    parser.add_argument('--db', help="数据库文件路径，默认使用配置中的数据库")
+    parser.add_argument('--dedupe', action='store_true',
+                        help="迁移前删除自然键重复的行（保留 id 最小的一行）并建立唯一索引")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = args.db
+    if db_path is None:
+        from src.config.config_loader import ConfigLoader
+        db_path = ConfigLoader().database_path
+
+    if args.dedupe:
+        print(f"删除重复行: {dedupe_natural_keys(db_path)}")
+    version = apply_migrations(db_path)
+    print(f"数据库 {db_path} 当前版本: {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.database.schema_catalog import TableInfo, UnknownColumnError, quote_identifier
+
+
+class QueryError(ValueError):
+    """查询参数不合法"""
+
+
+# 比较运算符 -> SQL
+COMPARISON_OPERATORS = {
+    '=': '=',
+    '==': '=',
+    '!=': '!=',
+    '<>': '!=',
+    '<': '<',
+    '<=': '<=',
+    '>': '>',
+    '>=': '>=',
+}
+
+# IN 列表的最大长度
+MAX_IN_VALUES = 1000
+
+
+def _require_column(info: TableInfo, column: Any) -> str:
+    if not isinstance(column, str) or column not in info.types:
+        raise UnknownColumnError(
+            f"表 {info.name} 中不存在列: {column}，可用的列: {', '.join(info.columns)}"
+        )
+    return quote_identifier(column)
+
+
+def _check_value(value: Any, column: str) -> Any:
+    if value is not None and not isinstance(value, (str, int, float, bool)):
+        raise QueryError(f"列 {column} 的条件值必须是字符串或数字: {value!r}")
+    return value
+
+
+def compile_filters(info: TableInfo, filters: Optional[List[Dict[str, Any]]]) -> Tuple[str, List[Any]]:
+    """将结构化条件编译为参数化的 WHERE 子句
+
+    每个条件形如 {"column": "列名", "op": "=", "value": 值}，多个条件之间为 AND。
+    支持的 op: = != < <= > >=、in（value 为列表）、between（value 为 [下限, 上限]）、
+    like（value 为 LIKE 模式）、is_null / not_null（不需要 value）。
+    条件直接作用在列上，不对列做函数变换，已有索引可以被使用。
+
+    Returns:
+        Tuple[str, List[Any]]: WHERE 子句（不含 WHERE 关键字，无条件时为空字符串）和参数列表
+    """
+    clauses = []
+    params: List[Any] = []
+    for condition in filters or []:
+        if not isinstance(condition, dict):
+            raise QueryError(f"条件格式错误，应为 {{\"column\", \"op\", \"value\"}}: {condition!r}")
+        column = condition.get('column')
+        quoted = _require_column(info, column)
+        op = str(condition.get('op', '=')).strip().lower()
+        value = condition.get('value')
+
+        if op in COMPARISON_OPERATORS:
+            if value is None:
+                raise QueryError(f"列 {column} 的条件缺少 value，判断空值请使用 is_null / not_null")
+            clauses.append(f"{quoted} {COMPARISON_OPERATORS[op]} ?")
+            params.append(_check_value(value, column))
+        elif op in ('in', 'not_in'):
+            if not isinstance(value, list) or not value:
+                raise QueryError(f"列 {column} 的 {op} 条件需要非空列表")
+            if len(value) > MAX_IN_VALUES:
+                raise QueryError(f"列 {column} 的 {op} 列表最多 {MAX_IN_VALUES} 个值")
+            # 列表整体作为一个 JSON 参数绑定，语句文本与列表长度无关，可以复用语句缓存
+            keyword = 'IN' if op == 'in' else 'NOT IN'
+            clauses.append(f"{quoted} {keyword} (SELECT value FROM json_each(?))")
+            params.append(json.dumps([_check_value(v, column) for v in value], ensure_ascii=False))
+        elif op == 'between':
+            if not isinstance(value, list) or len(value) != 2:
+                raise QueryError(f"列 {column} 的 between 条件需要 [下限, 上限]")
+            clauses.append(f"{quoted} BETWEEN ? AND ?")
+            params.extend(_check_value(v, column) for v in value)
+        elif op == 'like':
+            if not isinstance(value, str):
+                raise QueryError(f"列 {column} 的 like 条件需要字符串模式")
+            clauses.append(f"{quoted} LIKE ?")
+            params.append(value)
+        elif op == 'is_null':
+            clauses.append(f"{quoted} IS NULL")
+        elif op == 'not_null':
+            clauses.append(f"{quoted} IS NOT NULL")
+        else:
+            raise QueryError(f"不支持的条件运算符: {op}")
+    return " AND ".join(clauses), params
+
+
+def compile_order_by(info: TableInfo, order_by: Optional[List[str]], allowed: Optional[List[str]] = None) -> str:
+    """编译 ORDER BY 子句，列名前加 "-" 表示降序
+
+    Args:
+        info (TableInfo): 表元数据
+        order_by (List[str]): 排序列，如 ["-项目投资金额", "id"]
+        allowed (List[str], optional): 额外允许的排序名（如聚合结果的别名）
+    """
+    terms = []
+    for item in order_by or []:
+        if not isinstance(item, str) or not item.strip('-'):
+            raise QueryError(f"排序列格式错误: {item!r}")
+        descending = item.startswith('-')
+        name = item[1:] if descending else item
+        if allowed and name in allowed:
+            quoted = quote_identifier(name)
+        else:
+            quoted = _require_column(info, name)
+        terms.append(f"{quoted} DESC" if descending else quoted)
+    return ", ".join(terms)
+
+
+def build_select(info: TableInfo, columns: Optional[List[str]] = None,
+                 filters: Optional[List[Dict[str, Any]]] = None,
+                 order_by: Optional[List[str]] = None,
+                 limit: Optional[int] = None) -> Tuple[str, List[Any], List[str]]:
+    """生成参数化的 SELECT 语句
+
+    Args:
+        info (TableInfo): 表元数据（来自表结构目录）
+        columns (List[str], optional): 返回的列，默认所有列
+        filters (List[Dict[str, Any]], optional): 结构化条件，见 compile_filters
+        order_by (List[str], optional): 排序列，见 compile_order_by
+        limit (int, optional): 最大行数
+
+    Returns:
+        Tuple[str, List[Any], List[str]]: SQL、参数列表和结果列名
+    """
+    columns = list(columns) if columns else list(info.columns)
+    projection = ", ".join(_require_column(info, column) for column in columns)
+    sql = f"SELECT {projection} FROM {quote_identifier(info.name)}"
+
+    where, params = compile_filters(info, filters)
+    if where:
+        sql += f" WHERE {where}"
+    order = compile_order_by(info, order_by)
+    if order:
+        sql += f" ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params, columns
+
+
+# 支持的聚合函数
+AGGREGATE_FUNCTIONS = ('sum', 'avg', 'count', 'min', 'max')
+
+# 这些声明类型的列按数值存储，可以直接参与计算
+_NUMERIC_TYPE_MARKERS = ('INT', 'REAL', 'FLOA', 'DOUB', 'NUM', 'DEC')
+
+
+def numeric_expression(info: TableInfo, column: str) -> str:
+    """列的数值表达式
+
+    文本列中的数字可能带有百分号或千分位（如 "45%"、"1,200"），去掉后转为 REAL。
+    """
+    quoted = _require_column(info, column)
+    declared = info.types.get(column, '')
+    if any(marker in declared for marker in _NUMERIC_TYPE_MARKERS):
+        return quoted
+    return f"CAST(REPLACE(REPLACE({quoted}, '%', ''), ',', '') AS REAL)"
+
+
+def build_aggregate(info: TableInfo, group_by: Optional[List[str]] = None,
+                    aggregates: Optional[List[Dict[str, Any]]] = None,
+                    filters: Optional[List[Dict[str, Any]]] = None,
+                    order_by: Optional[List[str]] = None,
+                    limit: Optional[int] = None,
+                    buckets: Optional[Dict[str, float]] = None) -> Tuple[str, List[Any], List[str]]:
+    """生成参数化的 GROUP BY 聚合语句
+
+    Args:
+        info (TableInfo): 表元数据
+        group_by (List[str], optional): 分组列
+        aggregates (List[Dict[str, Any]], optional): 聚合项，如 {"func": "sum", "column": "项目投资金额", "as": "总投资"}，
+            count 的 column 可省略或为 "*"；默认 [{"func": "count"}]
+        filters (List[Dict[str, Any]], optional): 结构化条件，见 compile_filters
+        order_by (List[str], optional): 排序，可使用分组列或聚合别名，"-" 前缀表示降序；默认按分组列排序
+        limit (int, optional): 最大行数
+        buckets (Dict[str, float], optional): 分组列的区间宽度，如 {"项目进度": 20} 按 0-20、20-40… 分组
+
+    Returns:
+        Tuple[str, List[Any], List[str]]: SQL、参数列表和结果列名
+    """
+    group_by = list(group_by or [])
+    buckets = buckets or {}
+    for column in buckets:
+        if column not in group_by:
+            raise QueryError(f"分桶列 {column} 必须同时出现在 group_by 中")
+
+    select_terms = []
+    group_terms = []
+    result_columns = []
+    for column in group_by:
+        quoted = _require_column(info, column)
+        if column in buckets:
+            size = buckets[column]
+            if not isinstance(size, (int, float)) or isinstance(size, bool) or size <= 0:
+                raise QueryError(f"列 {column} 的区间宽度必须是正数")
+            expression = f"CAST({numeric_expression(info, column)} / {float(size)!r} AS INTEGER) * {float(size)!r}"
+        else:
+            expression = quoted
+        select_terms.append(f"{expression} AS {quoted}")
+        group_terms.append(str(len(select_terms)))
+        result_columns.append(column)
+
+    for item in aggregates or [{'func': 'count'}]:
+        if not isinstance(item, dict):
+            raise QueryError(f"聚合项格式错误，应为 {{\"func\", \"column\"}}: {item!r}")
+        func = str(item.get('func', '')).lower()
+        if func not in AGGREGATE_FUNCTIONS:
+            raise QueryError(f"不支持的聚合函数: {func}，可用: {', '.join(AGGREGATE_FUNCTIONS)}")
+        column = item.get('column')
+        if func == 'count':
+            argument = '*' if column in (None, '*') else _require_column(info, column)
+        elif column in (None, '*'):
+            raise QueryError(f"聚合函数 {func} 需要指定 column")
+        else:
+            argument = numeric_expression(info, column)
+        alias = item.get('as')
+        if alias is None:
+            alias = f"{func}({column})" if column not in (None, '*') else func
+        elif not isinstance(alias, str) or not alias.strip():
+            raise QueryError(f"聚合项的 as 必须是非空字符串: {alias!r}")
+        if alias in result_columns:
+            raise QueryError(f"结果列名重复: {alias}")
+        select_terms.append(f"{func.upper()}({argument}) AS {quote_identifier(alias)}")
+        result_columns.append(alias)
+
+    sql = f"SELECT {', '.join(select_terms)} FROM {quote_identifier(info.name)}"
+    where, params = compile_filters(info, filters)
+    if where:
+        sql += f" WHERE {where}"
+    if group_terms:
+        sql += f" GROUP BY {', '.join(group_terms)}"
+    order = compile_order_by(info, order_by, allowed=result_columns) if order_by else ", ".join(group_terms)
+    if order:
+        sql += f" ORDER BY {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params, result_columns
@@ -0,0 +1,189 @@
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.database.migrations import TABLE_VERSIONS_TABLE, check_schema_version
+from src.runtime.singleflight import call_key
+
+logger = logging.getLogger(__name__)
+
+
+def result_size(result: Any) -> int:
+    """缓存条目的字节数：字符串按 UTF-8 编码计算，提供 nbytes 属性的对象（如页面索引）使用该属性，
+    其余结果（dict/list）按 JSON 编码后的长度计算"""
+    if isinstance(result, str):
+        return len(result.encode('utf-8'))
+    nbytes = getattr(result, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return len(json.dumps(result, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class ResultCache:
+    """数据表查询结果缓存
+
+    缓存键为 (表名, 查询参数, 输出格式)，每个条目记录写入时该表的版本号。
+    表版本号由触发器维护在 _table_versions 中；读取前先用专用监视连接检查
+    PRAGMA data_version，数据库没有任何提交时直接复用上次读到的版本号，
+    只有其他连接提交过写入时才重新读取 _table_versions，因此不会返回过期数据。
+    条目数和总字节数都有上限，超出时按 LRU 淘汰。
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 128, max_bytes: int = 16 * 1024 * 1024,
+                 enabled: bool = True):
+        """初始化结果缓存
+
+        Args:
+            db_path (str): 数据库文件路径
+            max_entries (int): 最大条目数
+            max_bytes (int): 缓存结果的最大总字节数
+            enabled (bool): 是否启用缓存
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[int, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._monitor: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+        self._schema_version: Optional[int] = None
+        self._table_versions: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.version_reads = 0
+
+    @classmethod
+    def from_config(cls, db_path: str, cache_config: Dict[str, Any]) -> "ResultCache":
+        """根据 database.result_cache 配置创建缓存"""
+        return cls(
+            db_path,
+            max_entries=cache_config.get('max_entries', 128),
+            max_bytes=cache_config.get('max_bytes', 16 * 1024 * 1024),
+            enabled=cache_config.get('enabled', True)
+        )
+
+    def _table_version_locked(self, table_name: str) -> Optional[int]:
+        """获取表的当前版本号，无法确定时返回 None（不使用缓存）"""
+        try:
+            if self._monitor is None:
+                # 版本落后时抛出 SchemaVersionError，不在读路径上执行迁移
+                check_schema_version(self.db_path)
+                self._monitor = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                self._monitor.execute("PRAGMA busy_timeout=5000")
+
+            schema_version = self._monitor.execute("PRAGMA schema_version").fetchone()[0]
+            if schema_version != self._schema_version:
+                # 表结构变化后重新读取版本号；新表的触发器由建表/导入/迁移在写连接上补建，
+                # 没有版本记录的表不使用缓存
+                self._schema_version = schema_version
+                self._data_version = None
+
+            data_version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._table_versions = dict(
+                    self._monitor.execute(f"SELECT table_name, version FROM {TABLE_VERSIONS_TABLE}").fetchall()
+                )
+                self._data_version = data_version
+                self.version_reads += 1
+        except sqlite3.Error as e:
+            logger.warning(f"读取表版本失败，跳过结果缓存: {e}")
+            self._close_monitor_locked()
+            return None
+        return self._table_versions.get(table_name)
+
+    def _close_monitor_locked(self):
+        if self._monitor is not None:
+            try:
+                self._monitor.close()
+            except sqlite3.Error:
+                pass
+        self._monitor = None
+        self._data_version = None
+        self._schema_version = None
+
+    def get_or_load(self, table_name: str, params: Dict[str, Any], output_format: str,
+                    loader: Callable[[], Any]) -> Any:
+        """返回缓存的查询结果，未命中或已过期时调用 loader 查询并写入缓存
+
+        Args:
+            table_name (str): 表名
+            params (Dict[str, Any]): 查询参数
+            output_format (str): 输出格式
+            loader (Callable[[], Any]): 实际执行查询的函数
+
+        Raises:
+            SchemaVersionError: 数据库尚未迁移到当前版本
+        """
+        if not self.enabled:
+            return loader()
+
+        key = (table_name, call_key("table", params), output_format)
+        with self._lock:
+            version = self._table_version_locked(table_name)
+            entry = self._entries.get(key)
+            if version is not None and entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._remove_locked(key)
+                self.invalidations += 1
+            self.misses += 1
+
+        # 版本号在查询前读取：查询期间若有写入，写入的条目版本偏旧，下次读取时会被淘汰
+        result = loader()
+        if version is not None:
+            self._put(key, version, result)
+        return result
+
+    def _put(self, key: Tuple[str, str, str], version: int, result: Any):
+        size = result_size(result)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove_locked(key)
+            self._entries[key] = (version, result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove_locked(self, key: Tuple[str, str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'version_reads': self.version_reads
+            }
+
+    def close(self):
+        """关闭监视连接"""
+        with self._lock:
+            self._close_monitor_locked()
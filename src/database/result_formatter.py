@@ -0,0 +1,99 @@
+import csv
+import io
+import unicodedata
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+# 支持的输出格式
+# text: 对齐的文本表格（默认）；json: 每行一个对象；columnar: 每列一个数组；csv: CSV 文本
+OUTPUT_FORMATS = ('text', 'json', 'columnar', 'csv')
+
+
+class UnknownFormatError(ValueError):
+    """不支持的输出格式"""
+
+
+def check_format(output_format: str) -> str:
+    """校验输出格式名称"""
+    output_format = (output_format or 'text').lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise UnknownFormatError(f"不支持的输出格式: {output_format}，可用: {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+
+def display_width(text: str) -> int:
+    """字符串在等宽终端中的显示宽度，中文等全角字符占两列"""
+    return sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+
+
+def _pad(text: str, width: int) -> str:
+    return text + ' ' * (width - display_width(text))
+
+
+def format_text(table_name: str, columns: Sequence[str], rows: Iterable[Tuple]) -> str:
+    """对齐的文本表格，列宽按显示宽度计算"""
+    cells = [['' if value is None else str(value) for value in row] for row in rows]
+    if not cells:
+        return f"表 {table_name} 没有数据"
+
+    widths = [display_width(column) for column in columns]
+    for row in cells:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], display_width(value))
+
+    output = [
+        f"\n表 {table_name} 的数据:",
+        " | ".join(_pad(column, width) for column, width in zip(columns, widths)),
+        "-+-".join("-" * width for width in widths),
+        *(" | ".join(_pad(value, width) for value, width in zip(row, widths)) for row in cells),
+        f"\n共 {len(cells)} 条记录"
+    ]
+    return "\n".join(output)
+
+
+def format_json_rows(columns: Sequence[str], rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
+    """每行一个 {列名: 值} 对象"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def format_columnar(columns: Sequence[str], rows: Iterable[Tuple]) -> Dict[str, List[Any]]:
+    """每列一个数组 {列名: [值...]}，列名只出现一次，体积最小"""
+    data: Dict[str, List[Any]] = {column: [] for column in columns}
+    appenders = [data[column].append for column in columns]
+    for row in rows:
+        for append, value in zip(appenders, row):
+            append(value)
+    return data
+
+
+def format_csv(columns: Sequence[str], rows: Iterable[Tuple]) -> str:
+    """CSV 文本，首行为列名"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def format_rows(table_name: str, columns: Sequence[str], rows: Iterable[Tuple],
+                output_format: str = 'text') -> Union[str, List[Dict[str, Any]], Dict[str, List[Any]]]:
+    """按指定格式输出查询结果
+
+    rows 可以是游标上的迭代器；json / columnar / csv 只遍历一次，不保留中间结果。
+
+    Args:
+        table_name (str): 表名
+        columns (Sequence[str]): 列名
+        rows (Iterable[Tuple]): 数据行
+        output_format (str): text / json / columnar / csv
+
+    Returns:
+        text 和 csv 返回字符串，json 返回对象列表，columnar 返回 {列名: 值列表}
+    """
+    output_format = check_format(output_format)
+    if output_format == 'json':
+        return format_json_rows(columns, rows)
+    if output_format == 'columnar':
+        return format_columnar(columns, rows)
+    if output_format == 'csv':
+        return format_csv(columns, rows)
+    return format_text(table_name, columns, rows)
@@ -0,0 +1,185 @@
+import json
+import unicodedata
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.database.result_formatter import format_rows
+
+# 逐级收紧的单元格最大字符数
+CELL_LIMITS = (120, 60, 30)
+
+# 优先省略的列（时间戳、备注等对回答问题帮助较小）
+LOW_VALUE_COLUMNS = ('created_at', 'updated_at', 'remarks', '备注', '创建时间', '更新时间')
+
+# 至少保留的列数 / 行数
+MIN_COLUMNS = 2
+MIN_ROWS = 3
+
+
+class ShapedPage(NamedTuple):
+    """按预算裁剪后的一页数据"""
+    output: Any
+    columns: List[str]
+    row_count: int
+    notes: List[str]
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中文等全角字符约 1 个 token，其余字符约 4 个一个 token"""
+    wide = sum(1 for ch in text if unicodedata.east_asian_width(ch) in ('W', 'F'))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def make_measure(max_chars: Optional[int], max_tokens: Optional[int]) -> Tuple[int, Callable[[str], int]]:
+    """根据预算参数返回 (预算, 计量函数)
+
+    同时给出两个预算时两个都要满足：预算为 max_chars，计量值取字符数和按 max_chars / max_tokens
+    折算成字符的 token 数中较大的一个（向上取整），不超过预算即同时满足两个限制。
+    """
+    if max_tokens is None:
+        return int(max_chars), len
+    if max_chars is None:
+        return int(max_tokens), estimate_tokens
+    max_chars, max_tokens = int(max_chars), max(1, int(max_tokens))
+
+    def measure(text: str) -> int:
+        return max(len(text), -(-estimate_tokens(text) * max_chars // max_tokens))
+    return max_chars, measure
+
+
+def _size(output: Any, measure: Callable[[str], int]) -> int:
+    text = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False, separators=(',', ':'))
+    return measure(text)
+
+
+def _is_url(value: Any) -> bool:
+    return isinstance(value, str) and '://' in value
+
+
+def _truncate_cells(rows: Sequence[Tuple], limit: int) -> Tuple[List[Tuple], List[int]]:
+    """截断超长文本单元格（链接截断后无法使用，保持原样），返回新行和被截断的列下标"""
+    touched = set()
+    result = []
+    for row in rows:
+        cells = []
+        for i, value in enumerate(row):
+            if isinstance(value, str) and len(value) > limit and not _is_url(value):
+                value = value[:limit - 1] + '…'
+                touched.add(i)
+            cells.append(value)
+        result.append(tuple(cells))
+    return result, sorted(touched)
+
+
+def _drop_order(columns: Sequence[str], rows: Sequence[Tuple], keep: Sequence[str]) -> List[int]:
+    """列的省略顺序：全空/常量列 -> 时间戳备注类列 -> 平均长度长的列 -> 链接列"""
+    scored = []
+    for i, column in enumerate(columns):
+        if column in keep:
+            continue
+        values = [row[i] for row in rows]
+        distinct = len({value for value in values})
+        average = sum(len(str(value)) for value in values if value is not None) / max(len(values), 1)
+        if distinct <= 1:
+            rank = 0
+        elif column in LOW_VALUE_COLUMNS:
+            rank = 1
+        elif any(_is_url(value) for value in values):
+            rank = 3
+        else:
+            rank = 2
+        scored.append((rank, -average, i))
+    return [i for _, _, i in sorted(scored)]
+
+
+def shape_page(table_name: str, columns: Sequence[str], rows: Sequence[Tuple], output_format: str,
+               budget: int, measure: Callable[[str], int], keep: Sequence[str] = ()) -> Optional[ShapedPage]:
+    """把一页数据裁剪到预算以内
+
+    依次尝试：截断长文本单元格 -> 省略低价值列 -> 减少行数。
+    减少到 MIN_ROWS 行仍然超出预算时返回 None，由调用方返回超出预算的说明。
+
+    Args:
+        table_name (str): 表名
+        columns (Sequence[str]): 列名
+        rows (Sequence[Tuple]): 本页数据
+        output_format (str): 输出格式
+        budget (int): 预算（字符数或 token 数）
+        measure (Callable[[str], int]): 计量函数，见 make_measure
+        keep (Sequence[str]): 不允许省略的列（如主键、名称列）
+    """
+    columns = list(columns)
+    rows = list(rows)
+    notes: List[str] = []
+
+    output = format_rows(table_name, columns, rows, output_format)
+    if _size(output, measure) <= budget:
+        return ShapedPage(output, columns, len(rows), notes)
+
+    # 1. 截断长文本
+    truncated: List[int] = []
+    for limit in CELL_LIMITS:
+        candidate, truncated = _truncate_cells(rows, limit)
+        output = format_rows(table_name, columns, candidate, output_format)
+        if _size(output, measure) <= budget:
+            break
+    rows = candidate
+    truncated_columns = [columns[i] for i in truncated]
+    if _size(output, measure) <= budget:
+        if truncated_columns:
+            notes.append(f"列 {', '.join(truncated_columns)} 中超过 {limit} 字的内容已截断")
+        return ShapedPage(output, columns, len(rows), notes)
+
+    # 2. 省略低价值列
+    dropped = []
+    for index in _drop_order(columns, rows, keep):
+        if len(columns) - len(dropped) <= MIN_COLUMNS:
+            break
+        dropped.append(index)
+        kept = [i for i in range(len(columns)) if i not in dropped]
+        output = format_rows(table_name, [columns[i] for i in kept], [tuple(row[i] for i in kept) for row in rows],
+                             output_format)
+        if _size(output, measure) <= budget:
+            break
+    if dropped:
+        kept = [i for i in range(len(columns)) if i not in dropped]
+        notes.append(f"已省略列: {', '.join(columns[i] for i in sorted(dropped))}，可通过 columns 参数指定需要的列")
+        columns = [columns[i] for i in kept]
+        rows = [tuple(row[i] for i in kept) for row in rows]
+    truncated_columns = [column for column in truncated_columns if column in columns]
+    if truncated_columns:
+        notes.insert(0, f"列 {', '.join(truncated_columns)} 中超过 {limit} 字的内容已截断")
+    if _size(output, measure) <= budget:
+        return ShapedPage(output, columns, len(rows), notes)
+
+    # 3. 减少行数（二分查找能放下的最大行数）
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _size(format_rows(table_name, columns, rows[:middle], output_format), measure) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low < MIN_ROWS:
+        return None
+    notes.append(f"预算内只能返回 {low} 行（本页共 {len(rows)} 行），其余行请使用 next_cursor 继续读取")
+    return ShapedPage(format_rows(table_name, columns, rows[:low], output_format), columns, low, notes)
+
+
+def shape_stats(stats: Dict[str, Any], budget: int, measure: Callable[[str], int],
+                keep: Sequence[str] = ()) -> Optional[Dict[str, Any]]:
+    """把 DatabaseReader.column_stats 的结果裁剪到预算以内
+
+    依次省略时间戳备注类列、靠后的列，最后才省略 keep 中的列；只剩行数仍然超出预算时返回 None。
+    """
+    columns = dict(stats["columns"])
+    names = list(columns)
+    order = [name for name in names if name in LOW_VALUE_COLUMNS and name not in keep]
+    order += [name for name in reversed(names) if name not in order and name not in keep]
+    order += [name for name in reversed(names) if name in keep]
+    for name in [None] + order:
+        if name is not None:
+            del columns[name]
+        summary = {"row_count": stats["row_count"], "columns": dict(columns)}
+        if _size(summary, measure) <= budget:
+            return summary
+    return None
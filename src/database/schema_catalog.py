@@ -0,0 +1,129 @@
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownTableError(ValueError):
+    """查询的表不存在或不允许访问"""
+
+
+class UnknownColumnError(ValueError):
+    """查询的列不存在"""
+
+
+class TableInfo(NamedTuple):
+    """数据表元数据"""
+    name: str
+    columns: Tuple[str, ...]
+    types: Dict[str, str]
+    primary_key: Optional[str]
+
+
+def quote_identifier(name: str) -> str:
+    """将表名/列名转为 SQL 标识符（双引号转义）"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def is_internal_table(name: str) -> bool:
+    """内部表（下划线开头、SQLite 系统表）不对外暴露"""
+    return name.startswith('_') or name.startswith('sqlite_')
+
+
+class SchemaCatalog:
+    """数据库表结构目录（进程内共享）
+
+    首次使用时加载所有表和列的元数据，之后每次使用只读取一次 PRAGMA schema_version，
+    版本号变化（建表、改表、建索引等）时才重新加载。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._version: Optional[int] = None
+        self._tables: Dict[str, TableInfo] = {}
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.reloads = 0
+
+    def _refresh(self, conn: sqlite3.Connection) -> Dict[str, TableInfo]:
+        """检查 schema_version，表结构变化时重新加载"""
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self._lock:
+            self.checks += 1
+            if version == self._version:
+                return self._tables
+
+        tables = {}
+        names = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY rowid"
+        ).fetchall()
+        for (name,) in names:
+            info = conn.execute(f"PRAGMA table_info({quote_identifier(name)})").fetchall()
+            columns = tuple(row[1] for row in info)
+            primary_keys = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+            tables[name] = TableInfo(
+                name=name,
+                columns=columns,
+                types={row[1]: (row[2] or '').upper() for row in info},
+                primary_key=primary_keys[0] if len(primary_keys) == 1 else None
+            )
+
+        with self._lock:
+            self._tables = tables
+            self._version = version
+            self.reloads += 1
+        logger.debug(f"已加载表结构 (schema_version={version}): {len(tables)} 张表")
+        return tables
+
+    def tables(self, conn: sqlite3.Connection) -> List[str]:
+        """获取所有对外可见的表名"""
+        return [name for name in self._refresh(conn) if not is_internal_table(name)]
+
+    def has_table(self, conn: sqlite3.Connection, table_name: str) -> bool:
+        """表是否存在（包括内部表）"""
+        return table_name in self._refresh(conn)
+
+    def require_table(self, conn: sqlite3.Connection, table_name: str) -> TableInfo:
+        """获取表的元数据，表不存在或为内部表时抛出 UnknownTableError"""
+        info = self._refresh(conn).get(table_name)
+        if info is None or is_internal_table(table_name):
+            raise UnknownTableError(
+                f"表 {table_name} 不存在，可用的表: {', '.join(self.tables(conn))}"
+            )
+        return info
+
+    def require_columns(self, conn: sqlite3.Connection, table_name: str, columns: List[str]) -> TableInfo:
+        """校验列名是否都属于该表，不存在时抛出 UnknownColumnError"""
+        info = self.require_table(conn, table_name)
+        unknown = [column for column in columns if column not in info.types]
+        if unknown:
+            raise UnknownColumnError(
+                f"表 {table_name} 中不存在列: {', '.join(unknown)}，可用的列: {', '.join(info.columns)}"
+            )
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        """获取目录统计"""
+        with self._lock:
+            return {
+                'schema_version': self._version,
+                'tables': len(self._tables),
+                'checks': self.checks,
+                'reloads': self.reloads
+            }
+
+
+_catalogs: Dict[str, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_path: str) -> SchemaCatalog:
+    """获取指定数据库的表结构目录（进程内共享）"""
+    with _catalogs_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None:
+            catalog = SchemaCatalog(db_path)
+            _catalogs[db_path] = catalog
+        return catalog
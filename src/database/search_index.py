@@ -0,0 +1,219 @@
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.database.schema_catalog import SchemaCatalog, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# 参与全文检索的表：columns 为建立索引的文本列，display 为命中结果中附带返回的列
+SEARCH_TABLES: Dict[str, Dict[str, Sequence[str]]] = {
+    'sponge_city_urls': {
+        'columns': ('page_name', 'subpage_name', 'description', 'remarks'),
+        'display': ('page_name', 'subpage_name', 'url'),
+    },
+    '项目统计': {
+        'columns': ('项目名称', '项目简介', '项目难点', '对接人', '项目执行情况'),
+        'display': ('项目名称', '对接人', '项目进度'),
+    },
+}
+
+# trigram 分词器要求每个检索词至少 3 个字符，更短的词改用 LIKE
+MIN_TRIGRAM_LENGTH = 3
+
+# trigram 分词器需要 SQLite 3.34+，更早的版本不建索引，检索全部使用 LIKE
+TRIGRAM_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+# 已提示过缺少索引的表
+_missing_warned = set()
+
+
+def fts_table_name(table_name: str) -> str:
+    """表对应的 FTS5 索引表名（下划线开头，不对外暴露）"""
+    return f"_fts_{table_name}"
+
+
+def ensure_search_index(conn: sqlite3.Connection, table_name: str, columns: Sequence[str]) -> bool:
+    """为表创建 FTS5 trigram 索引（外部内容表）和同步触发器
+
+    索引不保存原文，只保存分词结果；源表的 INSERT/UPDATE/DELETE 通过触发器同步到索引。
+
+    Returns:
+        bool: 是否新建了索引；已有索引、表中没有检索列或 SQLite 不支持 trigram/FTS5 时为 False
+    """
+    fts = fts_table_name(table_name)
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+    if exists:
+        return False
+    if not TRIGRAM_AVAILABLE:
+        logger.warning(f"SQLite {sqlite3.sqlite_version} 不支持 trigram 分词（需要 3.34+），表 {table_name} 的检索使用 LIKE")
+        return False
+    present = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})")}
+    columns = [column for column in columns if column in present]
+    if not columns:
+        return False
+
+    table = quote_identifier(table_name)
+    quoted = ", ".join(quote_identifier(column) for column in columns)
+    new_values = ", ".join(f"new.{quote_identifier(column)}" for column in columns)
+    old_values = ", ".join(f"old.{quote_identifier(column)}" for column in columns)
+    fts_quoted = quote_identifier(fts)
+    content = table_name.replace("'", "''")
+
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {fts_quoted} USING fts5(
+                {quoted}, content='{content}', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        # 没有编译 FTS5 等情况：不建索引，检索使用 LIKE
+        logger.warning(f"无法为表 {table_name} 建立全文索引，检索使用 LIKE: {e}")
+        return False
+    conn.execute(f"""
+        CREATE TRIGGER {quote_identifier(fts + '_insert')} AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_quoted} (rowid, {quoted}) VALUES (new.id, {new_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {quote_identifier(fts + '_delete')} AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_quoted} ({fts_quoted}, rowid, {quoted}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {quote_identifier(fts + '_update')} AFTER UPDATE ON {table} BEGIN
+            INSERT INTO {fts_quoted} ({fts_quoted}, rowid, {quoted}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_quoted} (rowid, {quoted}) VALUES (new.id, {new_values});
+        END
+    """)
+    # 为已有数据建立索引
+    conn.execute(f"INSERT INTO {fts_quoted} ({fts_quoted}) VALUES ('rebuild')")
+    logger.info(f"已为表 {table_name} 建立全文索引 {fts}")
+    return True
+
+
+def ensure_search_indexes(conn: sqlite3.Connection) -> List[str]:
+    """为 SEARCH_TABLES 中已存在但还没有索引的表建立索引（迁移、建表和导入时在写连接上调用）
+
+    Returns:
+        List[str]: 新建了索引的表
+    """
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()}
+    return [table_name for table_name, settings in SEARCH_TABLES.items()
+            if table_name in existing and ensure_search_index(conn, table_name, settings['columns'])]
+
+
+def _fts_query(terms: List[str]) -> str:
+    """把检索词转为 FTS5 查询：每个词作为短语，多个词之间为 AND"""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _clip(text: Any, term: str, width: int = 24) -> Optional[str]:
+    """截取检索词附近的片段，命中部分用 [] 标出"""
+    if not isinstance(text, str):
+        return None
+    position = text.lower().find(term.lower())
+    if position < 0:
+        return None
+    start = max(0, position - width // 2)
+    end = min(len(text), position + len(term) + width // 2)
+    return (
+        ('…' if start > 0 else '') + text[start:position] + '[' + text[position:position + len(term)] + ']'
+        + text[position + len(term):end] + ('…' if end < len(text) else '')
+    )
+
+
+def search_table(conn: sqlite3.Connection, catalog: SchemaCatalog, table_name: str, query: str,
+                 limit: int = 10) -> List[Dict[str, Any]]:
+    """在单张表中检索，返回按相关度排序的命中结果
+
+    检索词均不少于 3 个字符且索引存在时使用 FTS5（bm25 排序），否则退化为 LIKE 匹配。
+    """
+    settings = SEARCH_TABLES.get(table_name)
+    if settings is None:
+        raise ValueError(f"表 {table_name} 不支持全文检索，可检索的表: {', '.join(SEARCH_TABLES)}")
+    info = catalog.require_table(conn, table_name)
+    columns = [column for column in settings['columns'] if column in info.types]
+    display = [column for column in settings['display'] if column in info.types]
+    terms = query.split()
+    if not terms:
+        return []
+
+    table = quote_identifier(table_name)
+    selected = ", ".join(f"t.{quote_identifier(column)}" for column in ['id'] + display)
+    fts = fts_table_name(table_name)
+    indexed = catalog.has_table(conn, fts)
+    if not indexed and table_name not in _missing_warned:
+        _missing_warned.add(table_name)
+        logger.warning(f"表 {table_name} 没有全文索引，检索使用 LIKE；"
+                       f"执行 python -m src.database.migrations 建立索引")
+    use_fts = indexed and all(len(term) >= MIN_TRIGRAM_LENGTH for term in terms)
+
+    hits = []
+    if use_fts:
+        fts_quoted = quote_identifier(fts)
+        rows = conn.execute(
+            f"""SELECT {selected}, snippet({fts_quoted}, -1, '[', ']', '…', 16), bm25({fts_quoted})
+                FROM {fts_quoted} JOIN {table} AS t ON t.id = {fts_quoted}.rowid
+                WHERE {fts_quoted} MATCH ?
+                ORDER BY bm25({fts_quoted})
+                LIMIT ?""",
+            (_fts_query(terms), limit)
+        ).fetchall()
+        for row in rows:
+            hits.append({
+                'table': table_name,
+                'id': row[0],
+                'score': round(-row[-1], 4),
+                'snippet': row[-2],
+                'row': dict(zip(display, row[1:-2]))
+            })
+        return hits
+
+    # 短词：每个词需要在任一检索列中出现
+    text_columns = ", ".join(f"t.{quote_identifier(column)}" for column in columns)
+    where = " AND ".join(
+        "(" + " OR ".join(f"t.{quote_identifier(column)} LIKE ? ESCAPE '\\'" for column in columns) + ")"
+        for _ in terms
+    )
+    params: List[Any] = [_like_pattern(term) for term in terms for _ in columns]
+    rows = conn.execute(
+        f"SELECT {selected}, {text_columns} FROM {table} AS t WHERE {where} ORDER BY t.id LIMIT ?",
+        params + [limit]
+    ).fetchall()
+    for row in rows:
+        texts = row[1 + len(display):]
+        snippet = next((clip for clip in (_clip(text, terms[0]) for text in texts) if clip), None)
+        hits.append({
+            'table': table_name,
+            'id': row[0],
+            'score': None,
+            'snippet': snippet,
+            'row': dict(zip(display, row[1:1 + len(display)]))
+        })
+    return hits
+
+
+def search(conn: sqlite3.Connection, catalog: SchemaCatalog, query: str, table_name: str = None,
+           limit: int = 10) -> List[Dict[str, Any]]:
+    """在一张或所有可检索的表中检索
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接
+        catalog (SchemaCatalog): 表结构目录
+        query (str): 检索词，多个词用空格分隔（需同时命中）
+        table_name (str, optional): 只检索指定的表
+        limit (int): 最多返回的命中数
+    """
+    tables = [table_name] if table_name else [name for name in SEARCH_TABLES if catalog.has_table(conn, name)]
+    hits = []
+    for table in tables:
+        hits.extend(search_table(conn, catalog, table, query, limit))
+    # FTS 命中按相关度排在前面，LIKE 命中保持原顺序
+    hits.sort(key=lambda hit: -hit['score'] if hit['score'] is not None else float('inf'))
+    return hits[:limit]
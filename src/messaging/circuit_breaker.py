@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """外部接口熔断器
+
+    closed: 正常放行，连续失败达到 failure_threshold 次后打开
+    open: 直接拒绝请求（快速失败），经过 reset_timeout 秒或健康探测成功后进入半开
+    half_open: 只放行 half_open_max_calls 个试探请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 30,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._to_half_open_locked()
+        return self._state
+
+    def _to_half_open_locked(self):
+        self._state = self.HALF_OPEN
+        self._half_open_calls = 0
+        logger.info(f"熔断器 {self.name} 进入半开状态")
+
+    def allow_request(self) -> bool:
+        """判断是否放行一次请求，熔断打开时立即返回 False"""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"熔断器 {self.name} 已关闭，接口恢复正常")
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        """记录一次失败调用"""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    logger.warning(f"熔断器 {self.name} 已打开，{self.reset_timeout} 秒内快速失败")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def probe_succeeded(self):
+        """健康探测成功，提前进入半开状态放行试探请求"""
+        with self._lock:
+            if self._state == self.OPEN:
+                self._to_half_open_locked()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取熔断器状态"""
+        with self._lock:
+            state = self._current_state_locked()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'open_seconds': round(time.monotonic() - self._opened_at, 1) if state == self.OPEN else 0,
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
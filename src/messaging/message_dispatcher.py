@@ -0,0 +1,308 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from src.messaging.circuit_breaker import CircuitBreaker
+from src.messaging.message_outbox import MessageOutbox
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDispatcher:
+    """外部消息后台投递器
+
+    消息流转分两步：
+    1. 写入线程把内存队列中积攒的消息在一个事务中写入发件箱（组提交），
+       调用方可以等到所在批次提交完成再返回，也可以（在事件循环中）入队后立即返回；
+    2. 投递线程按写入顺序从发件箱取出待投递消息，通过长连接 (keep-alive) 的 httpx
+       客户端投递，成功后标记已投递；失败时按带抖动的指数退避重试，保证至少投递一次。
+    每条消息带有唯一的 message_id（同时作为 Idempotency-Key 请求头），接收方可据此去重。
+    Web 服务连续失败时熔断器打开，投递线程不再发起连接，由健康探测线程定期检查恢复情况。
+    """
+
+    def __init__(self, endpoint: str, settings: Dict[str, Any] = None, db_path: str = None,
+                 health_url: str = None):
+        """初始化投递器
+
+        Args:
+            endpoint (str): 单条消息接口地址
+            settings (Dict[str, Any]): external_message 配置
+            db_path (str): 发件箱所在的数据库文件路径
+            health_url (str): 健康探测地址，默认使用消息接口地址
+        """
+        settings = settings or {}
+        outbox_settings = settings.get('outbox', {})
+        breaker_settings = settings.get('circuit_breaker', {})
+        self.endpoint = endpoint
+        self.health_url = health_url or endpoint
+        # 可选的批量接口，配置后一批消息只发送一次请求
+        self.batch_endpoint = settings.get('batch_endpoint')
+        self.timeout = settings.get('timeout', 10)
+        self.flush_interval = settings.get('flush_interval', 0.2)
+        self.batch_size = settings.get('batch_size', 20)
+        self.initial_backoff = settings.get('initial_backoff', 0.5)
+        self.max_backoff = settings.get('max_backoff', 30)
+        self.max_connections = settings.get('max_connections', 4)
+        self.commit_timeout = outbox_settings.get('commit_timeout', 1.0)
+        self.retention_hours = outbox_settings.get('retention_hours', 72)
+        self.probe_interval = breaker_settings.get('probe_interval', 5)
+        self.probe_timeout = breaker_settings.get('probe_timeout', 1)
+        self.breaker = CircuitBreaker(
+            "external_message",
+            failure_threshold=breaker_settings.get('failure_threshold', 3),
+            reset_timeout=breaker_settings.get('reset_timeout', 30)
+        )
+
+        self.db_path = db_path
+        self.outbox: Optional[MessageOutbox] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.get('max_queue', 1000))
+        self._client: Optional[httpx.Client] = None
+        self._writer: Optional[threading.Thread] = None
+        self._drainer: Optional[threading.Thread] = None
+        self._prober: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._has_pending = threading.Event()
+        self._recovered = threading.Event()
+        self._lock = threading.Lock()
+
+        self.enqueued = 0
+        self.delivered = 0
+        self.rejected = 0
+        self.retries = 0
+        self.dropped = 0
+        self.commits = 0
+        self.committed_messages = 0
+
+        # 进程退出前尽量把队列中的消息写入发件箱
+        atexit.register(self.stop)
+
+    def start(self):
+        """打开发件箱并启动写入/投递线程（重复调用无副作用）
+
+        服务器在 main() 中启动；启动前入队的消息留在内存队列中，启动后写入发件箱。
+        """
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._stop.clear()
+            if self.outbox is None:
+                self.outbox = MessageOutbox(self.db_path)
+            self._client = httpx.Client(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._writer = threading.Thread(target=self._run_writer, name="external-message-writer", daemon=True)
+            self._drainer = threading.Thread(target=self._run_drainer, name="external-message-drainer", daemon=True)
+            self._prober = threading.Thread(target=self._run_prober, name="external-message-prober", daemon=True)
+            self._writer.start()
+            self._drainer.start()
+            self._prober.start()
+            # 启动时发件箱中可能留有上次未投递的消息，立即重放
+            self._has_pending.set()
+            logger.info(f"外部消息投递线程已启动: {self.endpoint}")
+
+    def stop(self, timeout: float = 5.0):
+        """停止写入/投递线程，未投递的消息保留在发件箱中，下次启动时重放"""
+        if self._writer is None:
+            return
+        self._stop.set()
+        self._has_pending.set()
+        self._recovered.set()
+        self._writer.join(timeout)
+        self._drainer.join(timeout)
+        self._prober.join(timeout)
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            self._writer = None
+            self._drainer = None
+            self._prober = None
+
+    def enqueue(self, message: str, sender: str = "算法系统", message_type: str = "info",
+                wait: bool = True) -> Dict[str, Any]:
+        """将消息放入投递队列
+
+        不打开数据库、不发起连接；在事件循环中调用时应传 wait=False。
+
+        Args:
+            message (str): 消息内容
+            sender (str): 发送者名称
+            message_type (str): 消息类型 (info, success, warning, error)
+            wait (bool): 是否等所在批次写入发件箱（最多 commit_timeout 秒）后返回
+
+        Returns:
+            Dict[str, Any]: 入队结果，包含消息ID；durable 表示返回时是否已写入发件箱
+        """
+        data = {
+            "message_id": uuid.uuid4().hex,
+            "message": message,
+            "sender": sender,
+            "type": message_type,
+            "timestamp": datetime.now().isoformat()
+        }
+        committed = threading.Event()
+        try:
+            self._queue.put_nowait((data, committed))
+        except queue.Full:
+            self.dropped += 1
+            logger.error(f"外部消息队列已满，丢弃消息: {data['message_id']}")
+            return {"queued": False, "message_id": data["message_id"], "error": "消息队列已满"}
+
+        self.enqueued += 1
+        writer = self._writer
+        if not wait or writer is None or not writer.is_alive():
+            return {"queued": True, "durable": committed.is_set(), "message_id": data["message_id"]}
+        durable = committed.wait(self.commit_timeout)
+        return {"queued": True, "durable": durable, "message_id": data["message_id"]}
+
+    def _run_writer(self):
+        """组提交：把队列中积攒的消息一次性写入发件箱"""
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self.outbox.append_many([data for data, _ in items])
+            except Exception as e:
+                # 写入失败时放回队列，稍后重试
+                logger.error(f"写入消息发件箱失败: {e}")
+                for item in items:
+                    try:
+                        self._queue.put_nowait(item)
+                    except queue.Full:
+                        self.dropped += 1
+                self._stop.wait(self.flush_interval)
+                continue
+
+            self.commits += 1
+            self.committed_messages += len(items)
+            for _, committed in items:
+                committed.set()
+            self._has_pending.set()
+
+    def _run_drainer(self):
+        """按顺序投递发件箱中的消息"""
+        attempt = 0
+        last_purge = time.monotonic()
+        while not self._stop.is_set():
+            self._has_pending.wait(self.flush_interval)
+            self._has_pending.clear()
+            # 留出一个投递窗口，让同一窗口内的消息一起投递
+            self._stop.wait(self.flush_interval)
+
+            while not self._stop.is_set():
+                batch = self.outbox.fetch_pending(self.batch_size)
+                if not batch:
+                    attempt = 0
+                    break
+                if not self.breaker.allow_request():
+                    # 熔断打开时不发起连接，消息留在发件箱中等待健康探测恢复
+                    self._recovered.wait(self.probe_interval)
+                    self._recovered.clear()
+                    continue
+                if self._deliver(batch):
+                    attempt = 0
+                    continue
+
+                # 指数退避 + 随机抖动，避免 Web 服务恢复时被集中重试压垮
+                backoff = min(self.initial_backoff * (2 ** attempt), self.max_backoff)
+                wait_time = backoff * (0.5 + random.random() / 2)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"外部消息投递失败，{wait_time:.2f} 秒后第 {attempt} 次重试")
+                self._stop.wait(wait_time)
+
+            if time.monotonic() - last_purge > 600:
+                last_purge = time.monotonic()
+                self.outbox.purge_delivered(self.retention_hours)
+
+    def _run_prober(self):
+        """熔断打开期间定期探测 Web 服务是否恢复"""
+        with httpx.Client(timeout=self.probe_timeout) as client:
+            while not self._stop.wait(self.probe_interval):
+                if self.breaker.state != CircuitBreaker.OPEN:
+                    continue
+                try:
+                    response = client.get(self.health_url)
+                except httpx.HTTPError:
+                    continue
+                if response.status_code < 500:
+                    logger.info(f"健康探测成功: {self.health_url}")
+                    self.breaker.probe_succeeded()
+                    self._recovered.set()
+
+    def _deliver(self, batch: List[Dict[str, Any]]) -> bool:
+        """按顺序投递一批消息，遇到失败即停止，返回是否全部处理完成"""
+        if self.batch_endpoint:
+            ids = [data['message_id'] for data in batch]
+            return self._post(self.batch_endpoint, {"messages": batch}, ids, ids[0])
+
+        for data in batch:
+            if not self._post(self.endpoint, data, [data['message_id']], data['message_id']):
+                return False
+        return True
+
+    def _post(self, url: str, payload: Any, message_ids: List[str], idempotency_key: str) -> bool:
+        """发送一次请求并更新发件箱状态，返回 False 表示需要重试"""
+        try:
+            response = self._client.post(url, json=payload, headers={"Idempotency-Key": idempotency_key})
+        except httpx.HTTPError as e:
+            logger.warning(f"连接外部消息接口失败: {url}, {e}")
+            self.breaker.record_failure()
+            self.outbox.record_failure(message_ids, str(e))
+            return False
+
+        if response.status_code < 500:
+            self.breaker.record_success()
+
+        if 200 <= response.status_code < 300:
+            self.outbox.mark_delivered(message_ids)
+            self.delivered += len(message_ids)
+            logger.info(f"✅ 外部消息发送成功: {len(message_ids)} 条")
+            return True
+
+        if 400 <= response.status_code < 500:
+            # 客户端错误重试也不会成功，标记后跳过，避免阻塞后续消息
+            self.outbox.mark_rejected(message_ids, f"HTTP {response.status_code}: {response.text[:200]}")
+            self.rejected += len(message_ids)
+            logger.error(f"❌ 外部消息被拒绝 ({response.status_code}): {response.text[:200]}")
+            return True
+
+        logger.warning(f"外部消息接口返回错误 ({response.status_code})")
+        self.breaker.record_failure()
+        self.outbox.record_failure(message_ids, f"HTTP {response.status_code}")
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """获取投递统计"""
+        return {
+            'queue_depth': self._queue.qsize(),
+            'outbox_pending': self.outbox.pending_count() if self.outbox else 0,
+            'enqueued': self.enqueued,
+            'delivered': self.delivered,
+            'rejected': self.rejected,
+            'retries': self.retries,
+            'dropped': self.dropped,
+            'commits': self.commits,
+            'avg_commit_size': round(self.committed_messages / self.commits, 2) if self.commits else 0.0,
+            'circuit': self.breaker.stats()
+        }
@@ -0,0 +1,135 @@
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_TABLE = "_message_outbox"
+
+
+class MessageOutbox:
+    """外部消息发件箱（存放在项目数据库中）
+
+    消息先写入发件箱再投递，Web 服务不可用或进程重启后仍可按顺序重放。
+    状态: pending（待投递）、delivered（已投递）、rejected（被接口拒绝，不再重试）
+    """
+
+    def __init__(self, db_path: str):
+        """初始化发件箱
+
+        Args:
+            db_path (str): 数据库文件路径
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        # WAL + synchronous=NORMAL：提交时不强制 fsync，配合批量提交降低写入开销
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self._create_table()
+
+    def _create_table(self):
+        with self._lock:
+            self.conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {OUTBOX_TABLE} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message_id TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    delivered_at TIMESTAMP
+                )
+            """)
+            self.conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS idx{OUTBOX_TABLE}_status
+                ON {OUTBOX_TABLE} (status, id)
+            """)
+
+    def append_many(self, messages: List[Dict[str, Any]]) -> int:
+        """在一个事务中追加多条消息（组提交）
+
+        重复的 message_id 会被忽略，保证重复入队时幂等。
+
+        Returns:
+            int: 实际写入的条数
+        """
+        if not messages:
+            return 0
+        rows = [(m['message_id'], json.dumps(m, ensure_ascii=False)) for m in messages]
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self.conn.executemany(
+                    f"INSERT OR IGNORE INTO {OUTBOX_TABLE} (message_id, payload) VALUES (?, ?)",
+                    rows
+                )
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount
+
+    def fetch_pending(self, limit: int) -> List[Dict[str, Any]]:
+        """按写入顺序获取待投递的消息"""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT payload FROM {OUTBOX_TABLE} WHERE status = 'pending' ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _set_status(self, message_ids: List[str], status: str, error: str = None):
+        if not message_ids:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    f"""UPDATE {OUTBOX_TABLE}
+                        SET status = ?, attempts = attempts + 1, last_error = ?,
+                            delivered_at = CASE WHEN ? = 'delivered' THEN CURRENT_TIMESTAMP ELSE delivered_at END
+                        WHERE message_id = ?""",
+                    [(status, error, status, message_id) for message_id in message_ids]
+                )
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def mark_delivered(self, message_ids: List[str]):
+        """标记消息已投递"""
+        self._set_status(message_ids, 'delivered')
+
+    def mark_rejected(self, message_ids: List[str], error: str):
+        """标记消息被接口拒绝，不再重试"""
+        self._set_status(message_ids, 'rejected', error)
+
+    def record_failure(self, message_ids: List[str], error: str):
+        """记录一次投递失败，消息保持待投递状态"""
+        self._set_status(message_ids, 'pending', error)
+
+    def pending_count(self) -> int:
+        """待投递的消息数量"""
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM {OUTBOX_TABLE} WHERE status = 'pending'"
+            ).fetchone()[0]
+
+    def purge_delivered(self, retention_hours: float) -> int:
+        """删除超过保留时间的已投递消息"""
+        with self._lock:
+            cursor = self.conn.execute(
+                f"DELETE FROM {OUTBOX_TABLE} WHERE status = 'delivered' AND delivered_at < datetime('now', ?)",
+                (f"-{retention_hours} hours",)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def call_key(tool_name: str, arguments: Dict[str, Any], ignore: Iterable[str] = ()) -> str:
+    """根据工具名和规范化后的参数计算调用哈希
+
+    Args:
+        tool_name (str): 工具名称
+        arguments (Dict[str, Any]): 调用参数
+        ignore (Iterable[str]): 不影响执行结果、不参与哈希的参数名（如 userName）
+    """
+    ignored = set(ignore)
+    payload = {
+        'tool': tool_name,
+        'arguments': {k: v for k, v in arguments.items() if k not in ignored}
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """合并同时进行中的相同调用
+
+    第一个调用者负责真正执行，执行期间到达的相同调用直接等待同一个结果。
+    执行放在独立的任务中，某个调用者取消不会影响其他等待者。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """执行（或加入正在进行的）调用
+
+        Args:
+            key (str): 调用哈希，相同哈希的调用会被合并
+            func (Callable[[], Awaitable[Any]]): 返回协程的工厂函数，仅由第一个调用者执行
+
+        Returns:
+            Any: 共享的执行结果
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(f"合并进行中的调用: {key[:12]}")
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(func())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # 所有调用者都已取消时，避免"异常未被获取"的警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取合并统计"""
+        return {
+            'inflight': len(self._inflight),
+            'executions': self.executions,
+            'coalesced': self.coalesced
+        }
@@ -0,0 +1,206 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.config.config_loader import ConfigLoader
+
+logger = logging.getLogger(__name__)
+
+# 默认执行参数，配置文件中未指定时使用
+DEFAULT_POOLS = {
+    'io': {'type': 'thread', 'max_workers': 16}
+}
+DEFAULT_TOOL_SETTINGS = {
+    'pool': 'io',
+    'max_concurrency': 4,
+    'max_queue': 32,
+    'timeout': 30
+}
+
+
+class ToolRejectedError(RuntimeError):
+    """工具排队数量超过上限时抛出"""
+
+
+class ToolTimeoutError(TimeoutError):
+    """工具执行超时时抛出"""
+
+
+class _ToolLimiter:
+    """单个工具的并发/排队限制与统计"""
+
+    def __init__(self, name: str, settings: Dict[str, Any]):
+        self.name = name
+        self.pool = settings['pool']
+        self.max_concurrency = max(1, int(settings['max_concurrency']))
+        self.max_queue = max(0, int(settings['max_queue']))
+        self.timeout = settings.get('timeout')
+        self.semaphore = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        # 信号量需要在事件循环内创建
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.semaphore
+
+    def record(self, elapsed: float, ok: bool):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            'pool': self.pool,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'timeout': self.timeout,
+            'running': self.running,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'avg_seconds': round(self.total_seconds / finished, 4) if finished else 0.0,
+            'max_seconds': round(self.max_seconds, 4)
+        }
+
+
+class ToolExecutor:
+    """把阻塞的工具函数分派到线程池/进程池中执行，避免阻塞 SSE 事件循环
+
+    每个工具可以在配置文件 executor.tools 中单独设置:
+        pool: 使用的执行池名称（对应 executor.pools）
+        max_concurrency: 同时执行的最大数量
+        max_queue: 等待执行的最大排队数量，超过后直接拒绝
+        timeout: 从排队开始计算的超时时间（秒）
+    """
+
+    def __init__(self, executor_config: Dict[str, Any] = None):
+        if executor_config is None:
+            executor_config = ConfigLoader().executor_config
+
+        self._pool_settings = executor_config.get('pools') or DEFAULT_POOLS
+        self._defaults = {**DEFAULT_TOOL_SETTINGS, **executor_config.get('defaults', {})}
+        self._tool_settings = executor_config.get('tools', {})
+        self._pools = {}
+        self._limiters: Dict[str, _ToolLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, name: str):
+        """获取（按需创建）执行池"""
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is not None:
+                return pool
+
+            if name not in self._pool_settings:
+                raise ValueError(f"未配置的执行池: {name}")
+            settings = self._pool_settings[name]
+            pool_type = settings.get('type', 'thread')
+            max_workers = settings.get('max_workers')
+
+            if pool_type == 'process':
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            elif pool_type == 'thread':
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"mcp-{name}")
+            else:
+                raise ValueError(f"不支持的执行池类型: {pool_type}")
+
+            self._pools[name] = pool
+            logger.info(f"创建执行池 {name}: type={pool_type}, max_workers={max_workers}")
+            return pool
+
+    def _get_limiter(self, tool_name: str) -> _ToolLimiter:
+        limiter = self._limiters.get(tool_name)
+        if limiter is None:
+            settings = {**self._defaults, **self._tool_settings.get(tool_name, {})}
+            limiter = _ToolLimiter(tool_name, settings)
+            self._limiters[tool_name] = limiter
+        return limiter
+
+    async def run(self, tool_name: str, func: Callable, *args, **kwargs) -> Any:
+        """在执行池中运行工具函数
+
+        Args:
+            tool_name (str): 工具名称，用于查找并发限制配置
+            func (Callable): 要执行的阻塞函数（进程池要求可序列化）
+
+        Returns:
+            Any: 工具函数的返回值
+
+        Raises:
+            ToolRejectedError: 排队数量超过 max_queue
+            ToolTimeoutError: 超过 timeout 仍未完成
+        """
+        limiter = self._get_limiter(tool_name)
+        semaphore = limiter.get_semaphore()
+
+        if semaphore.locked() and limiter.waiting >= limiter.max_queue:
+            limiter.rejected += 1
+            raise ToolRejectedError(f"工具 {tool_name} 排队已满 ({limiter.waiting}/{limiter.max_queue})，请稍后重试")
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        deadline = started + limiter.timeout if limiter.timeout else None
+
+        # 排队等待执行名额
+        limiter.waiting += 1
+        try:
+            if deadline is None:
+                await semaphore.acquire()
+            else:
+                await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - time.perf_counter()))
+        except asyncio.TimeoutError:
+            limiter.timeouts += 1
+            raise ToolTimeoutError(f"工具 {tool_name} 排队超时 ({limiter.timeout}s)")
+        finally:
+            limiter.waiting -= 1
+
+        limiter.running += 1
+        pool = self._get_pool(limiter.pool)
+        future = loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+        def _release(fut):
+            # 执行名额在任务真正结束时才释放，超时的任务仍会占用名额
+            limiter.running -= 1
+            limiter.record(time.perf_counter() - started, not fut.cancelled() and fut.exception() is None)
+            semaphore.release()
+
+        future.add_done_callback(_release)
+
+        if deadline is None:
+            return await future
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=max(0.0, deadline - time.perf_counter()))
+        except asyncio.TimeoutError:
+            limiter.timeouts += 1
+            raise ToolTimeoutError(f"工具 {tool_name} 执行超时 ({limiter.timeout}s)")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取各工具的执行统计"""
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+    def shutdown(self, wait: bool = True):
+        """关闭所有执行池"""
+        with self._lock:
+            for name, pool in self._pools.items():
+                pool.shutdown(wait=wait)
+                logger.info(f"执行池已关闭: {name}")
+            self._pools.clear()
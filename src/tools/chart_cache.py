@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def _canonicalize(value: Any) -> Any:
+    """规范化输入数据，使语义相同的输入得到相同的哈希"""
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def cache_version(parts: Sequence[str]) -> str:
+    """由模板版本、脚本地址、地图数据源等配置计算缓存版本，任一变化时旧文件不再命中"""
+    return hashlib.sha256("\x00".join(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def chart_cache_key(data: Dict[str, Any], title: str, x_label: str, version: str = "") -> str:
+    """根据规范化后的图表输入和缓存版本计算内容哈希"""
+    payload = {'data': _canonicalize(data), 'title': title, 'x_label': x_label, 'version': version}
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+# 文件名中保留的哈希长度；索引按这一前缀登记，重启后可以从文件名恢复
+KEY_LENGTH = 12
+FILE_PATTERN = re.compile(r"^dynamic_chart_\d{8}_\d{6}_(?P<key>[0-9a-f]{%d})\.html$" % KEY_LENGTH)
+
+
+def chart_file_name(key: str, timestamp: str) -> str:
+    """图表文件名：dynamic_chart_<时间>_<哈希前缀>.html"""
+    return f"dynamic_chart_{timestamp}_{key[:KEY_LENGTH]}.html"
+
+
+class ChartCache:
+    """图表文件缓存（LRU），按内容哈希索引已生成的 HTML 文件
+
+    超过 max_entries / max_bytes 时淘汰最久未使用的条目，超过 max_age_seconds 的条目
+    在访问或写入时清理，淘汰时同时删除 output_dir 中对应的文件。
+    索引只在内存中，启动时用 load_directory 按文件名和修改时间从 output_dir 重建，
+    重启前生成的文件同样参与淘汰。
+    """
+
+    def __init__(self, max_entries: int = 200, max_bytes: int = 50 * 1024 * 1024,
+                 max_age_seconds: float = 24 * 3600, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> "ChartCache":
+        """根据 charts.cache 配置创建缓存"""
+        return cls(
+            max_entries=cache_config.get('max_entries', 200),
+            max_bytes=cache_config.get('max_bytes', 50 * 1024 * 1024),
+            max_age_seconds=cache_config.get('max_age_seconds', 24 * 3600),
+            enabled=cache_config.get('enabled', True)
+        )
+
+    def load_directory(self, directory: str) -> int:
+        """从输出目录重建索引：按文件名识别图表文件，修改时间作为创建和访问时间
+
+        过期或超出上限的文件随即删除。
+
+        Returns:
+            int: 登记的文件数
+        """
+        if not self.enabled or not os.path.isdir(directory):
+            return 0
+
+        files = []
+        for entry in os.scandir(directory):
+            match = FILE_PATTERN.match(entry.name)
+            if match is None or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, match.group('key'), os.path.join(directory, entry.name), stat.st_size))
+
+        with self._lock:
+            # 按修改时间从旧到新登记，LRU 顺序与生成顺序一致；同一哈希的旧文件直接删除
+            for mtime, key, path, size in sorted(files):
+                self._remove_locked(key, delete_file=True)
+                self._entries[key] = {'path': path, 'size': size, 'created_at': mtime, 'last_access': mtime}
+                self._total_bytes += size
+            self._expire_locked()
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove_locked(next(iter(self._entries)), delete_file=True)
+                self.evictions += 1
+            loaded = len(self._entries)
+        logger.info(f"图表缓存从 {directory} 恢复 {loaded} 个文件")
+        return loaded
+
+    def get(self, key: str) -> Optional[str]:
+        """查找缓存的图表文件路径（key 为 chart_cache_key 的结果），未命中返回 None"""
+        if not self.enabled:
+            return None
+
+        key = key[:KEY_LENGTH]
+        with self._lock:
+            self._expire_locked()
+            entry = self._entries.get(key)
+            if entry is None or not os.path.exists(entry['path']):
+                if entry is not None:
+                    # 文件已被外部删除，索引失效
+                    self._remove_locked(key, delete_file=False)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry['last_access'] = time.time()
+            self.hits += 1
+            return entry['path']
+
+    def put(self, key: str, path: str):
+        """登记新生成的图表文件（文件名应由 chart_file_name 生成，重启后才能恢复）"""
+        if not self.enabled:
+            return
+
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        key = key[:KEY_LENGTH]
+        with self._lock:
+            if key in self._entries:
+                old = self._entries[key]
+                if old['path'] != path:
+                    self._remove_locked(key, delete_file=True)
+                else:
+                    self._remove_locked(key, delete_file=False)
+
+            now = time.time()
+            self._entries[key] = {'path': path, 'size': size, 'created_at': now, 'last_access': now}
+            self._total_bytes += size
+            self._expire_locked()
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                if oldest == key:
+                    break
+                self._remove_locked(oldest, delete_file=True)
+                self.evictions += 1
+
+    def _expire_locked(self):
+        """清理超过最大存活时间的条目"""
+        if not self.max_age_seconds:
+            return
+        cutoff = time.time() - self.max_age_seconds
+        expired = [key for key, entry in self._entries.items() if entry['created_at'] < cutoff]
+        for key in expired:
+            self._remove_locked(key, delete_file=True)
+            self.evictions += 1
+
+    def _remove_locked(self, key: str, delete_file: bool):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry['size']
+        if delete_file:
+            try:
+                os.remove(entry['path'])
+                logger.info(f"图表缓存淘汰文件: {entry['path']}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"删除缓存图表文件失败: {entry['path']}, {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
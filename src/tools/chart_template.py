@@ -0,0 +1,444 @@
+import hashlib
+import html
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.tools.gazetteer import region_for_map
+from src.tools.geo_store import GeoStore, remote_urls
+from src.tools.vendor_assets import ASSETS
+
+# 图表 HTML 模板
+#
+# 页面中与具体图表无关的部分（样式、按钮、主题切换和下载脚本、地图加载脚本）在导入时拼好，
+# 每次生成图表只插入标题、地图类型、地图数据（地址或内嵌数据）和序列化一次的 ECharts 配置，结果以片段列表返回，
+# 调用方用 writelines 直接写入文件。非地图图表不包含地图数据源和地图加载脚本。
+
+_HEAD = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>"""
+
+_TITLE_TO_SCRIPTS = """</title>
+"""
+
+_STYLE_AND_BODY = """    <style>
+        body {
+            margin: 0;
+            padding: 20px;
+            background: linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%);
+            font-family: 'Microsoft YaHei', Arial, sans-serif;
+            min-height: 100vh;
+        }
+
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: rgba(255, 255, 255, 0.05);
+            border-radius: 15px;
+            padding: 20px;
+            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
+            backdrop-filter: blur(10px);
+            border: 1px solid rgba(255, 255, 255, 0.1);
+            animation: fadeIn 0.8s ease-out;
+        }
+
+        #chart {
+            width: 100%;
+            height: 600px;
+            border-radius: 10px;
+            background: rgba(0, 0, 0, 0.2);
+        }
+
+        .info {
+            text-align: center;
+            color: #ffffff;
+            margin-bottom: 20px;
+            font-size: 14px;
+            opacity: 0.8;
+        }
+
+        .controls {
+            display: flex;
+            justify-content: center;
+            gap: 15px;
+            margin-top: 20px;
+        }
+
+        .btn {
+            padding: 10px 20px;
+            border: none;
+            border-radius: 25px;
+            background: linear-gradient(45deg, #00ff9f, #00cc7f);
+            color: white;
+            cursor: pointer;
+            font-size: 14px;
+            transition: all 0.3s ease;
+            box-shadow: 0 4px 15px rgba(0, 255, 159, 0.3);
+        }
+
+        .btn:hover {
+            transform: translateY(-2px);
+            box-shadow: 0 6px 20px rgba(0, 255, 159, 0.4);
+        }
+
+        .btn:active {
+            transform: translateY(0);
+        }
+
+        @keyframes fadeIn {
+            from {
+                opacity: 0;
+                transform: translateY(20px);
+            }
+            to {
+                opacity: 1;
+                transform: translateY(0);
+            }
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="info">
+            <h2 style="color: #00ff9f; margin: 0;">"""
+
+_BODY_TO_OPTION = """</h2>
+            <p>动态交互式图表 - 鼠标悬停查看详细数据</p>
+        </div>
+
+        <div id="chart"></div>
+
+        <div class="controls">
+            <button class="btn" onclick="refreshChart()">刷新动画</button>
+            <button class="btn" onclick="downloadChart()">下载图片</button>
+            <button class="btn" onclick="toggleTheme()">切换主题</button>
+        </div>
+    </div>
+
+    <script>
+        // 图表配置
+        const option = """
+
+_OPTION_TO_TITLE = """;
+        const chartTitle = """
+
+# 非地图图表：直接渲染
+_PLAIN_RENDER = """;
+
+        function renderChart(myChart) {
+            myChart.setOption(option);
+            console.log('图表初始化成功');
+        }
+"""
+
+# 地图图表：先加载 GeoJSON 并注册地图，再渲染
+_MAP_RENDER_PREFIX = """;
+        const mapType = """
+
+_MAP_TO_URLS = """;
+        // 地图数据：inlineMap 为内嵌的边界数据，没有时依次尝试 mapUrls
+        const mapUrls = """
+
+_MAP_TO_INLINE = """;
+        const inlineMap = """
+
+_MAP_RENDER = """;
+
+        // 把数据中的地名对齐到地图要素名称（如 "武侯" -> "武侯区"）
+        function normalizeRegionNames(geoData) {
+            const strip = name => name.replace(/(特别行政区|维吾尔自治区|壮族自治区|回族自治区|自治区|自治州|自治县|地区|新区|林区|省|市|区|县|盟|旗)$/, '');
+            const featureNames = new Set();
+            const byShortName = {};
+            (geoData.features || []).forEach(feature => {
+                const name = feature.properties && feature.properties.name;
+                if (name) {
+                    featureNames.add(name);
+                    byShortName[strip(name)] = name;
+                }
+            });
+            const resolve = name => (typeof name !== 'string' || featureNames.has(name))
+                ? name : (byShortName[name] || byShortName[strip(name)] || name);
+            const series = Array.isArray(option.series) ? option.series : [option.series];
+            series.forEach(item => {
+                if (item && item.type === 'map' && Array.isArray(item.data)) {
+                    item.data.forEach(entry => { entry.name = resolve(entry.name); });
+                }
+            });
+            if (option.geo && Array.isArray(option.geo.regions)) {
+                option.geo.regions.forEach(region => { region.name = resolve(region.name); });
+            }
+        }
+
+        function showMap(myChart, geoData) {
+            echarts.registerMap(mapType, geoData);
+            normalizeRegionNames(geoData);
+            myChart.setOption(option);
+        }
+
+        function renderChart(myChart) {
+            if (inlineMap) {
+                showMap(myChart, inlineMap);
+                console.log('使用内嵌地图数据:', mapType);
+                return;
+            }
+
+            function tryLoadMapData(index) {
+                if (index >= mapUrls.length) {
+                    console.warn('地图数据加载失败，使用默认配置渲染');
+                    myChart.setOption(option);
+                    return;
+                }
+
+                console.log('尝试加载地图数据:', mapUrls[index]);
+
+                fetch(mapUrls[index])
+                    .then(response => {
+                        if (!response.ok) {
+                            throw new Error('HTTP ' + response.status);
+                        }
+                        return response.json();
+                    })
+                    .then(geoData => {
+                        showMap(myChart, geoData);
+                        console.log('地图数据加载成功:', mapType);
+                    })
+                    .catch(error => {
+                        console.warn('地图数据加载失败:', mapUrls[index], error.message);
+                        tryLoadMapData(index + 1);
+                    });
+            }
+
+            try {
+                tryLoadMapData(0);
+            } catch (mapError) {
+                handleError(mapError, '地图数据加载');
+            }
+        }
+"""
+
+_SCRIPT_TAIL = """
+        // 错误处理函数
+        function handleError(error, context) {
+            console.error('图表错误 (' + context + '):', error);
+            const chartDom = document.getElementById('chart');
+            chartDom.innerHTML = '<div style="display: flex; align-items: center; justify-content: center; height: 100%; color: #ff6b6b; text-align: center; flex-direction: column;">' +
+                '<h3>图表加载失败</h3>' +
+                '<p>错误信息: ' + (error.message || error) + '</p>' +
+                '<p>上下文: ' + context + '</p>' +
+                '<p>请检查网络连接或刷新页面重试</p>' +
+                '</div>';
+        }
+
+        // 配置的副本（setOption 可能修改传入的对象）
+        function cloneOption() {
+            return JSON.parse(JSON.stringify(option));
+        }
+
+        // 等待资源加载完成
+        function initChart() {
+            try {
+                // 检查ECharts是否加载
+                if (typeof echarts === 'undefined') {
+                    throw new Error('ECharts未加载');
+                }
+
+                const myChart = echarts.init(document.getElementById('chart'));
+                renderChart(myChart);
+
+                // 监听图表错误
+                myChart.on('error', function(params) {
+                    handleError(params, '图表渲染');
+                });
+
+                // 存储图表实例供其他函数使用
+                window.myChart = myChart;
+
+            } catch (error) {
+                handleError(error, '图表初始化');
+            }
+        }
+
+        // 页面加载完成后初始化
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', initChart);
+        } else {
+            initChart();
+        }
+
+        // 响应式
+        window.addEventListener('resize', function() {
+            if (window.myChart) {
+                window.myChart.resize();
+            }
+        });
+
+        // 刷新动画
+        function refreshChart() {
+            if (window.myChart) {
+                window.myChart.clear();
+                window.myChart.setOption(cloneOption());
+            }
+        }
+
+        // 下载图片
+        function downloadChart() {
+            if (window.myChart) {
+                const url = window.myChart.getDataURL({
+                    type: 'png',
+                    pixelRatio: 2,
+                    backgroundColor: '#1a1a1a'
+                });
+                const link = document.createElement('a');
+                link.download = chartTitle + '_' + new Date().toISOString().slice(0, 19).replace(/:/g, '-') + '.png';
+                link.href = url;
+                link.click();
+            }
+        }
+
+        // 切换主题
+        let isDarkTheme = true;
+        function toggleTheme() {
+            if (window.myChart) {
+                isDarkTheme = !isDarkTheme;
+                const newOption = cloneOption();
+
+                if (isDarkTheme) {
+                    newOption.backgroundColor = '#1a1a1a';
+                    document.body.style.background = 'linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%)';
+                } else {
+                    newOption.backgroundColor = '#ffffff';
+                    if (newOption.title) newOption.title.textStyle.color = '#333333';
+                    if (newOption.legend) newOption.legend.textStyle.color = '#333333';
+                    if (newOption.xAxis) {
+                        newOption.xAxis.nameTextStyle.color = '#333333';
+                        newOption.xAxis.axisLine.lineStyle.color = '#333333';
+                        newOption.xAxis.axisLabel.color = '#333333';
+                    }
+                    if (newOption.yAxis && Array.isArray(newOption.yAxis)) {
+                        newOption.yAxis.forEach(axis => {
+                            axis.nameTextStyle.color = '#333333';
+                            axis.axisLine.lineStyle.color = '#333333';
+                            axis.axisLabel.color = '#333333';
+                        });
+                    }
+                    document.body.style.background = 'linear-gradient(135deg, #f5f5f5 0%, #e8e8e8 100%)';
+                }
+
+                window.myChart.setOption(newOption);
+            }
+        }
+
+        // 添加事件监听器
+        function addEventListeners() {
+            if (window.myChart) {
+                window.myChart.on('click', function(params) {
+                    console.log('点击了:', params);
+                });
+                window.myChart.on('datazoom', function(params) {
+                    console.log('数据缩放:', params);
+                });
+            }
+        }
+
+        // 延迟添加事件监听器
+        setTimeout(addEventListeners, 1500);
+    </script>
+</body>
+</html>"""
+
+# 模板版本：静态片段的哈希，参与图表缓存键，模板修改后不再复用旧文件
+TEMPLATE_VERSION = hashlib.sha256("".join((
+    _HEAD, _TITLE_TO_SCRIPTS, _STYLE_AND_BODY, _BODY_TO_OPTION, _OPTION_TO_TITLE, _PLAIN_RENDER,
+    _MAP_RENDER_PREFIX, _MAP_TO_URLS, _MAP_TO_INLINE, _MAP_RENDER, _SCRIPT_TAIL
+)).encode('utf-8')).hexdigest()[:12]
+
+# 配置序列化参数：紧凑格式，中文不转义
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def script_json(value: Any) -> str:
+    """序列化为可以直接嵌入 <script> 的 JSON（转义 "</" 防止提前结束脚本）"""
+    return _json_encoder.encode(value).replace('</', '<\\/')
+
+
+def script_tags(scripts: Iterable[Tuple[str, str]]) -> str:
+    """生成页面引用的脚本标签
+
+    Args:
+        scripts: (地址, CDN 地址) 列表；地址与 CDN 不同时，本地地址加载失败后改从 CDN 加载
+
+    Returns:
+        str: 插入 <head> 的脚本标签
+    """
+    tags = []
+    for url, cdn_url in scripts:
+        if url == cdn_url:
+            tags.append(f'    <script src="{html.escape(url)}"></script>\n')
+            continue
+        tags.append(f'    <script src="{html.escape(url)}" onerror="this.dataset.failed = 1"></script>\n')
+        tags.append("    <script>document.currentScript.previousElementSibling.dataset.failed && "
+                    f"document.write('<script src=\"' + {script_json(cdn_url)} + '\"><\\/script>');</script>\n")
+    return "".join(tags)
+
+
+# 默认直接从 CDN 加载
+DEFAULT_SCRIPTS = script_tags((url, url) for url in ASSETS.values())
+
+
+def is_map_option(echarts_config: Dict[str, Any]) -> bool:
+    """配置中是否包含地图（map 系列或 geo 组件）"""
+    if 'geo' in echarts_config:
+        return True
+    series = echarts_config.get('series') or []
+    if isinstance(series, dict):
+        series = [series]
+    return any(isinstance(item, dict) and item.get('type') == 'map' for item in series)
+
+
+def option_map_type(echarts_config: Dict[str, Any]) -> str:
+    """配置中使用的地图名（geo 组件或第一个 map 系列），没有地图时为 china"""
+    geo = echarts_config.get('geo')
+    if isinstance(geo, dict) and geo.get('map'):
+        return geo['map']
+    series = echarts_config.get('series') or []
+    if isinstance(series, dict):
+        series = [series]
+    for item in series:
+        if isinstance(item, dict) and item.get('type') == 'map' and item.get('map'):
+            return item['map']
+    return "china"
+
+
+def render_chart_html(echarts_config: Dict[str, Any], title: str = "动态图表", map_type: str = "china",
+                      geo_store: Optional[GeoStore] = None, scripts: str = DEFAULT_SCRIPTS) -> List[str]:
+    """生成图表页面
+
+    Args:
+        echarts_config (Dict[str, Any]): ECharts 配置
+        title (str): 页面标题
+        map_type (str): 地图类型（拼音或行政区划代码），仅在配置包含地图时使用
+        geo_store (GeoStore, optional): 本地地图数据，未提供时页面从在线数据源加载
+        scripts (str): script_tags 生成的脚本标签，默认从 CDN 加载
+
+    Returns:
+        List[str]: 页面文本片段，按顺序拼接（或 writelines 写入）即为完整页面
+    """
+    escaped_title = html.escape(title)
+    parts = [
+        _HEAD, escaped_title, _TITLE_TO_SCRIPTS, scripts, _STYLE_AND_BODY, escaped_title, _BODY_TO_OPTION,
+        script_json(echarts_config), _OPTION_TO_TITLE, script_json(title)
+    ]
+    if is_map_option(echarts_config):
+        region = region_for_map(map_type)
+        if geo_store is not None:
+            map_urls, inline_map = geo_store.map_source(region)
+        else:
+            map_urls, inline_map = remote_urls(region.code), None
+        parts += [_MAP_RENDER_PREFIX, script_json(map_type), _MAP_TO_URLS, script_json(map_urls),
+                  _MAP_TO_INLINE, inline_map or "null", _MAP_RENDER]
+    else:
+        parts.append(_PLAIN_RENDER)
+    parts.append(_SCRIPT_TAIL)
+    return parts
@@ -0,0 +1,374 @@
+import json
+import os
+import re
+import sys
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# 地名索引
+#
+# 国家和省级行政区的规范记录在导入时构建一次，之后只读。每条记录的全称、简称、
+# 拼音（地图类型名）和单字简称都登记为别名，查找地名是一次字典访问。
+#
+# 地级行政区（直辖市、特别行政区为区县）和各城市的区县按省份存放在 gazetteer_data/<省级代码>.json 中，
+# 导入时只读取名称索引 gazetteer_data/index.json（城市、区县的简称和拼音 -> 所在省份），
+# 按名称或行政区划代码查找时只加载所在省份的文件。每个城市、区县都可以用行政区划代码作为地图类型。
+# 区县数据来自 2018 年前后的行政区划，之后撤并或新设的区县可能缺失。
+
+
+class Region(NamedTuple):
+    """行政区记录"""
+    code: Optional[str]                    # 行政区划代码，如 "370000"
+    level: str                             # country / province / city / district
+    parent: Optional[str]                  # 上级行政区划代码
+    name: str                              # 地图数据中的名称（全称），如 "山东省"
+    short_name: str                        # 简称，如 "山东"
+    map_type: Optional[str]                # 对应的 ECharts 地图名，城市默认为行政区划代码
+    center: Optional[Tuple[float, float]]  # 地图中心点，None 表示自动适配
+    zoom: Optional[float]                  # 地图缩放级别，None 表示不缩放
+    pinyin: Optional[str] = None           # 简称的拼音（小写、不带声调），如 "chengdu"
+
+
+COUNTRY_CODE = "100000"
+
+# (代码, 全称, 简称, 地图类型, 单字简称, 中心点, 缩放级别)
+_PROVINCES = (
+    ("110000", "北京市", "北京", "beijing", "京", (116.383331, 39.916668), 2.5),
+    ("120000", "天津市", "天津", "tianjin", "津", (117.190182, 39.125596), 2.5),
+    ("130000", "河北省", "河北", "hebei", "冀", (114.502461, 38.045474), 1.6),
+    ("140000", "山西省", "山西", "shanxi", "晋", (112.549248, 37.857014), 1.8),
+    ("150000", "内蒙古自治区", "内蒙古", "neimenggu", "蒙", (111.670801, 40.818311), 1.2),
+    ("210000", "辽宁省", "辽宁", "liaoning", "辽", (123.429096, 41.796767), 1.8),
+    ("220000", "吉林省", "吉林", "jilin", "吉", (125.3245, 43.886841), 1.8),
+    ("230000", "黑龙江省", "黑龙江", "heilongjiang", "黑", (126.642464, 45.756967), 1.5),
+    ("310000", "上海市", "上海", "shanghai", "沪", (121.472644, 31.231706), 2.5),
+    ("320000", "江苏省", "江苏", "jiangsu", "苏", (118.767413, 32.041544), 1.8),
+    ("330000", "浙江省", "浙江", "zhejiang", "浙", (120.153576, 30.287459), 1.8),
+    ("340000", "安徽省", "安徽", "anhui", "皖", (117.283042, 31.86119), 1.8),
+    ("350000", "福建省", "福建", "fujian", "闽", (119.306239, 26.075302), 2.0),
+    ("360000", "江西省", "江西", "jiangxi", "赣", (115.892151, 28.676493), 1.8),
+    ("370000", "山东省", "山东", "shandong", "鲁", (117.000923, 36.675807), 1.8),
+    ("410000", "河南省", "河南", "henan", "豫", (113.665412, 34.757975), 1.6),
+    ("420000", "湖北省", "湖北", "hubei", "鄂", (114.298572, 30.584355), 1.8),
+    ("430000", "湖南省", "湖南", "hunan", "湘", (112.982279, 28.19409), 1.8),
+    ("440000", "广东省", "广东", "guangdong", "粤", (113.280637, 23.125178), 1.8),
+    ("450000", "广西壮族自治区", "广西", "guangxi", "桂", (108.320004, 22.82402), 1.6),
+    ("460000", "海南省", "海南", "hainan", "琼", (110.33119, 20.031971), 2.2),
+    ("500000", "重庆市", "重庆", "chongqing", "渝", (106.504962, 29.533155), 2.2),
+    ("510000", "四川省", "四川", "sichuan", "川", (104.065735, 30.659462), 1.5),
+    ("520000", "贵州省", "贵州", "guizhou", "黔", (106.713478, 26.578343), 1.8),
+    ("530000", "云南省", "云南", "yunnan", "滇", (102.712251, 25.040609), 1.5),
+    ("540000", "西藏自治区", "西藏", "xizang", "藏", (91.132212, 29.660361), 1.0),
+    ("610000", "陕西省", "陕西", "shaanxi", "陕", (108.948024, 34.263161), 1.6),
+    ("620000", "甘肃省", "甘肃", "gansu", "甘", (103.823557, 36.058039), 1.3),
+    ("630000", "青海省", "青海", "qinghai", "青", (101.778916, 36.623178), 1.3),
+    ("640000", "宁夏回族自治区", "宁夏", "ningxia", "宁", (106.278179, 38.46637), 2.2),
+    ("650000", "新疆维吾尔自治区", "新疆", "xinjiang", "新", (87.617733, 43.792818), 1.0),
+    ("710000", "台湾省", "台湾", "taiwan", "台", (121.509062, 25.044332), 2.0),
+    ("810000", "香港特别行政区", "香港", "xianggang", "港", (114.173355, 22.320048), 1.2),
+    ("820000", "澳门特别行政区", "澳门", "aomen", "澳", (113.54909, 22.198951), 1.2),
+)
+
+# 下级为区县的省级行政区（直辖市和特别行政区）
+_MUNICIPALITIES = frozenset(("110000", "120000", "310000", "500000", "810000", "820000"))
+
+# 保留拼音地图类型和中心点的城市：(代码, 简称, 地图类型, 中心点)
+_MAPPED_CITIES = (
+    ("370100", "济南", "jinan", (117.000923, 36.675807)),
+    ("370200", "青岛", "qingdao", (120.355173, 36.082982)),
+    ("370300", "淄博", "zibo", (118.047648, 36.814939)),
+    ("370400", "枣庄", "zaozhuang", (117.557964, 34.856424)),
+    ("370500", "东营", "dongying", (118.49642, 37.461266)),
+    ("370600", "烟台", "yantai", (121.391382, 37.539297)),
+    ("370700", "潍坊", "weifang", (119.107078, 36.70925)),
+    ("370800", "济宁", "jining", (116.587245, 35.415393)),
+    ("370900", "泰安", "taian", (117.129063, 36.194968)),
+    ("371000", "威海", "weihai", (122.116394, 37.513068)),
+    ("371100", "日照", "rizhao", (119.461208, 35.428588)),
+    ("371300", "临沂", "linyi", (118.326443, 35.065282)),
+    ("371400", "德州", "dezhou", (116.307428, 37.453968)),
+    ("371500", "聊城", "liaocheng", (115.980367, 36.456013)),
+    ("371600", "滨州", "binzhou", (118.016974, 37.383542)),
+    ("371700", "菏泽", "heze", (115.469381, 35.246531)),
+)
+_CITY_ZOOM = 2.5
+
+# 查找时依次去掉的行政区后缀
+_SUFFIXES = ("维吾尔自治区", "壮族自治区", "回族自治区", "特别行政区", "自治区", "自治州", "自治县", "地区", "新区",
+             "林区", "省", "市", "区", "县", "盟", "州")
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer_data")
+_CODE = re.compile(r"\d{6}")
+
+_SPACES = re.compile(r"\s+")
+
+
+def _build() -> Tuple[Mapping[str, Region], Mapping[str, Region], Mapping[str, Region], Tuple[Region, ...]]:
+    """构建只读的国家、省级记录表和别名索引"""
+    regions: List[Region] = [
+        Region(COUNTRY_CODE, "country", None, "中国", "中国", "china", (104.114129, 37.550339), 1.2, "zhongguo")
+    ]
+    abbreviations: Dict[str, str] = {}
+    for code, name, short_name, map_type, abbreviation, center, zoom in _PROVINCES:
+        regions.append(Region(code, "province", COUNTRY_CODE, name, short_name, map_type, center, zoom, map_type))
+        abbreviations[abbreviation] = code
+
+    by_code = {region.code: region for region in regions}
+    by_map_type = {region.map_type: region for region in regions}
+    aliases: Dict[str, Region] = {}
+    for region in regions:
+        for alias in (region.name, region.short_name, region.map_type, region.pinyin, region.code):
+            aliases.setdefault(alias, region)
+    for abbreviation, code in abbreviations.items():
+        aliases.setdefault(abbreviation, by_code[code])
+    aliases.setdefault("China", by_code[COUNTRY_CODE])
+    return (MappingProxyType(by_code), MappingProxyType(by_map_type), MappingProxyType(aliases),
+            tuple(regions))
+
+
+REGIONS_BY_CODE, REGIONS_BY_MAP_TYPE, ALIASES, REGIONS = _build()
+CHINA = REGIONS_BY_CODE[COUNTRY_CODE]
+
+# 城市代码 -> (地图类型, 中心点)；拼音地图类型 -> 城市代码
+_CITY_VIEWS = {code: (map_type, center) for code, _, map_type, center in _MAPPED_CITIES}
+_CITY_MAP_TYPES = {map_type: code for code, _, map_type, _ in _MAPPED_CITIES}
+
+_INDEX_PATH = os.path.join(_DATA_DIR, "index.json")
+
+# 同名时的优先顺序：地级行政区优先于区县（如 "朝阳"），可用全称 "朝阳区" 区分
+_LEVEL_ORDER = {"province": 0, "city": 1, "district": 2}
+
+
+def _read_index() -> Mapping[str, str]:
+    """读取名称索引：{简称或拼音: "省级代码前两位,..."}，同名的区县可能属于多个省份
+
+    全称为 简称 + 行政区后缀 时不单独登记（如 "武侯区"），其余全称（如 "阿坝藏族羌族自治州"）也登记。
+    """
+    if not os.path.exists(_INDEX_PATH):
+        return MappingProxyType({})
+    with open(_INDEX_PATH, "r", encoding="utf-8") as f:
+        return MappingProxyType(json.load(f))
+
+
+# 名称 -> 所在省级行政区代码的前两位（逗号分隔）
+NAME_INDEX = _read_index()
+
+# 按省份加载的下级行政区，只增不改：上级代码 -> 下级（省 -> 城市，城市 -> 区县）
+_load_lock = threading.Lock()
+_loaded: set = set()
+_children: Dict[str, Tuple[Region, ...]] = {}
+_children_by_code: Dict[str, Region] = {}
+_children_aliases: Dict[str, List[Region]] = {}
+
+
+def _read_province(province: Region) -> Dict[str, List[List[str]]]:
+    """读取一个省级行政区的数据文件：{"children": [[代码, 全称, 简称, 拼音], ...], "districts": {城市代码: [...]}}"""
+    path = os.path.join(_DATA_DIR, province.code + ".json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _register(parent: str, regions: List[Region]) -> None:
+    _children[parent] = tuple(regions)
+    for region in regions:
+        _children_by_code[region.code] = region
+        for alias in {region.name, region.short_name, region.map_type, region.pinyin}:
+            if alias != region.code:
+                _children_aliases.setdefault(alias, []).append(region)
+
+
+def _load_province(code: str) -> None:
+    """加载省级行政区的下级行政区和区县（每个省份只加载一次）"""
+    if code in _loaded:
+        return
+    province = REGIONS_BY_CODE.get(code)
+    if province is None or province.level != "province":
+        return
+    with _load_lock:
+        if code in _loaded:
+            return
+        data = _read_province(province)
+        level = "district" if code in _MUNICIPALITIES else "city"
+        regions = []
+        for child_code, name, short_name, pinyin in data.get("children", ()):
+            map_type, center = _CITY_VIEWS.get(child_code, (child_code, None))
+            regions.append(Region(child_code, level, code, name, short_name, map_type, center,
+                                  _CITY_ZOOM if center else None, pinyin))
+        _register(code, regions)
+        for city_code, rows in data.get("districts", {}).items():
+            _register(city_code, [Region(district_code, "district", city_code, name, short_name, district_code,
+                                         None, None, pinyin)
+                                  for district_code, name, short_name, pinyin in rows])
+        for aliases in _children_aliases.values():
+            aliases.sort(key=lambda region: _LEVEL_ORDER[region.level])
+        _loaded.add(code)
+
+
+def _province_of(code: str) -> Optional[str]:
+    return code[:2] + "0000" if isinstance(code, str) and _CODE.fullmatch(code) else None
+
+
+def children(code: str) -> Tuple[Region, ...]:
+    """下级行政区：省级为地级行政区（直辖市和特别行政区为区县），城市为区县，首次访问时加载所在省份"""
+    regions = _children.get(code)
+    if regions is not None:
+        return regions
+    province = _province_of(code)
+    if province is None:
+        return ()
+    _load_province(province)
+    return _children.get(code, ())
+
+
+def region_by_code(code: str) -> Optional[Region]:
+    """按行政区划代码查找行政区，城市和区县只加载所在省份的数据"""
+    region = REGIONS_BY_CODE.get(code)
+    if region is None and _province_of(code) is not None:
+        _load_province(_province_of(code))
+        region = _children_by_code.get(code)
+    return region
+
+
+def _index_provinces(key: str) -> Tuple[str, ...]:
+    """名称可能所在的省份；索引中只有简称时去掉行政区后缀再查"""
+    prefixes = NAME_INDEX.get(key) or NAME_INDEX.get(key.lower())
+    if not prefixes:
+        for suffix in _SUFFIXES:
+            if key.endswith(suffix) and len(key) > len(suffix):
+                prefixes = NAME_INDEX.get(key[:-len(suffix)])
+                if prefixes:
+                    break
+    return tuple(prefix + "0000" for prefix in prefixes.split(",")) if prefixes else ()
+
+
+def _find(key: str) -> List[Region]:
+    region = ALIASES.get(key) or ALIASES.get(key.lower())
+    if region is not None:
+        return [region]
+    if _CODE.fullmatch(key):
+        region = region_by_code(key)
+        return [region] if region is not None else []
+    provinces = _index_provinces(key)
+    if not provinces:
+        return []
+    for code in provinces:
+        _load_province(code)
+    return list(_children_aliases.get(key) or _children_aliases.get(key.lower()) or ())
+
+
+def candidates(name: str) -> List[Region]:
+    """按名称查找所有同名的行政区，按省、市、区县排序，找不到时返回空列表"""
+    if not isinstance(name, str):
+        return []
+    key = _SPACES.sub("", name)
+    if not key:
+        return []
+    regions = _find(key)
+    if regions:
+        return regions
+    for suffix in _SUFFIXES:
+        if key.endswith(suffix) and len(key) > len(suffix):
+            regions = _find(key[:-len(suffix)])
+            if regions:
+                return regions
+    return []
+
+
+def lookup(name: str) -> Optional[Region]:
+    """按名称查找行政区（全称、简称、拼音、单字简称或行政区划代码），找不到时返回 None
+
+    同名时省级优先于城市、城市优先于区县；需要区分时使用全称或 candidates。
+    """
+    regions = candidates(name)
+    return regions[0] if regions else None
+
+
+def build_index() -> Dict[str, str]:
+    """由各省份数据文件生成名称索引 {名称: "省级代码前两位,..."}"""
+    index: Dict[str, List[str]] = {}
+    for province in REGIONS:
+        if province.level != "province":
+            continue
+        data = _read_province(province)
+        rows = list(data.get("children", ()))
+        for district_rows in data.get("districts", {}).values():
+            rows.extend(district_rows)
+        for row in rows:
+            name, short_name, pinyin = row[1], row[2], row[3]
+            # 全称为 简称 + 行政区后缀 时只登记简称，查找时去掉后缀再查索引
+            aliases = [short_name, pinyin]
+            if not any(name == short_name + suffix for suffix in _SUFFIXES):
+                aliases.append(name)
+            for alias in aliases:
+                prefixes = index.setdefault(alias, [])
+                if province.code[:2] not in prefixes:
+                    prefixes.append(province.code[:2])
+    return {alias: ",".join(prefixes) for alias, prefixes in sorted(index.items())}
+
+
+def region_for_map(map_type: str) -> Region:
+    """地图类型（拼音或行政区划代码）对应的行政区，未知的地图类型返回全国"""
+    region = REGIONS_BY_MAP_TYPE.get(map_type)
+    if region is None and isinstance(map_type, str):
+        region = region_by_code(_CITY_MAP_TYPES.get(map_type, map_type))
+    return region or CHINA
+
+
+def map_type_for(value: str) -> str:
+    """把地图类型参数（拼音、行政区划代码或地名）转为地图类型，无法识别时为 china"""
+    region = REGIONS_BY_MAP_TYPE.get(value) or lookup(value)
+    return region.map_type if region is not None and region.map_type else CHINA.map_type
+
+
+def detect_map_region(names: Iterable[str]) -> Region:
+    """根据数据中的地名选择地图
+
+    - 单个省级行政区或城市：该省或该市的地图
+    - 区县都属于同一城市（可以同时包含该城市）：该市地图
+    - 城市（或直辖市的区）都属于同一省级行政区：该省地图
+    - 其他情况（多个省份、无法识别）：全国地图
+    同名的地名（如 "鼓楼"）取所有地名共同所属的行政区。
+    """
+    matches = [candidates(name) for name in names]
+    known = [regions for regions in matches if regions]
+    if len(matches) == 1 and known and known[0][0].level in ("province", "city"):
+        return known[0][0]
+
+    # 每个地名可能所属的行政区：上级，城市还包括自身
+    containers = []
+    for regions in known:
+        codes = {region.parent for region in regions if region.level in ("city", "district")}
+        codes |= {region.code for region in regions if region.level == "city"}
+        if codes:
+            containers.append(codes)
+    if containers:
+        common = set.intersection(*containers)
+        if len(common) == 1:
+            return region_by_code(common.pop()) or CHINA
+    return CHINA
+
+
+def display_name(name: str, map_type: str) -> str:
+    """把数据中的地名转为地图数据中的名称（只转换该地图的直接下级，如省地图上的城市、市地图上的区县）"""
+    parent = region_for_map(map_type)
+    for region in candidates(name):
+        if region.parent == parent.code:
+            return region.name
+    return name
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：python -m src.tools.gazetteer，修改 gazetteer_data 中的数据文件后重新生成名称索引"""
+    index = build_index()
+    with open(_INDEX_PATH, "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(f"  {json.dumps(alias, ensure_ascii=False)}: {json.dumps(provinces)}"
+                                    for alias, provinces in index.items()) + "\n}\n")
+    print(f"名称索引已写入 {_INDEX_PATH}: {len(index)} 个名称")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
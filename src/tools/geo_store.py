@@ -0,0 +1,352 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.config.config_loader import ConfigLoader
+from src.tools.gazetteer import REGIONS, Region, children
+
+logger = logging.getLogger(__name__)
+
+# 本地地图边界数据
+#
+# 全国、省级和地级行政区的 GeoJSON 按几个精度级别预先简化（Douglas-Peucker）并量化为
+# ECharts 的压缩格式（UTF8Encoding：坐标按 1/1024 度取整、差分、ZigZag 后编码为字符），
+# 存放在 <dir>/<级别>/<行政区划代码>.json。生成图表时优先把对应级别的数据内嵌到页面，
+# 也可以由 MCP 服务器的 /geo 路由提供；本地没有数据时退回到在线数据源。
+
+REMOTE_URL = "https://geo.datav.aliyun.com/areas_v3/bound"
+
+# 精度级别 -> 简化容差（度）
+TOLERANCES = {"high": 0.001, "medium": 0.005, "low": 0.02}
+
+# 行政区级别 -> 默认精度级别：地图范围越大，可以用越粗的边界
+DEFAULT_LEVELS = {"country": "low", "province": "medium", "city": "high", "district": "high"}
+
+ENCODE_SCALE = 1024
+# 编码后的字符需低于 UTF-16 代理区（0xD800），相邻点坐标差超过该值时插入中间点
+_MAX_DELTA = (0xD800 - 64) // 2 - 1
+
+_CODE = re.compile(r"\d{6}")
+
+
+def simplify_line(points: Sequence[Sequence[float]], tolerance: float) -> List[Sequence[float]]:
+    """Douglas-Peucker 简化（非递归），首尾点始终保留；闭合环按到首点的距离选取分割点"""
+    count = len(points)
+    if count <= 4 or tolerance <= 0:
+        return list(points)
+    tolerance_sq = tolerance * tolerance
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        ax, ay = points[start][0], points[start][1]
+        dx, dy = points[end][0] - ax, points[end][1] - ay
+        length_sq = dx * dx + dy * dy
+        max_distance, index = -1.0, -1
+        for i in range(start + 1, end):
+            px, py = points[i][0] - ax, points[i][1] - ay
+            if length_sq > 0:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+                px, py = px - t * dx, py - t * dy
+            distance = px * px + py * py
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index > 0 and max_distance > tolerance_sq:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 31)
+
+
+def encode_line(points: Sequence[Sequence[float]]) -> Tuple[str, List[int]]:
+    """把一条线（或环）量化编码为 ECharts 压缩格式，返回 (编码字符串, 起点偏移)"""
+    quantized: List[Tuple[int, int]] = []
+    for point in points:
+        xy = (int(round(point[0] * ENCODE_SCALE)), int(round(point[1] * ENCODE_SCALE)))
+        if not quantized or xy != quantized[-1]:
+            quantized.append(xy)
+    offsets = list(quantized[0])
+    prev_x, prev_y = offsets
+    chars = []
+    for x, y in quantized:
+        dx, dy = x - prev_x, y - prev_y
+        steps = max(1, -(-max(abs(dx), abs(dy)) // _MAX_DELTA))
+        start_x, start_y = prev_x, prev_y
+        for step in range(1, steps + 1):
+            next_x, next_y = start_x + dx * step // steps, start_y + dy * step // steps
+            chars.append(chr(_zigzag(next_x - prev_x) + 64))
+            chars.append(chr(_zigzag(next_y - prev_y) + 64))
+            prev_x, prev_y = next_x, next_y
+    return "".join(chars), offsets
+
+
+def _encode_parts(parts: Sequence[Sequence[Sequence[float]]], tolerance: float, closed: bool):
+    """简化并编码一组环（多边形）或线，退化的部分丢弃"""
+    min_points = 4 if closed else 2
+    encoded, offsets = [], []
+    for index, part in enumerate(parts):
+        simplified = simplify_line(part, tolerance)
+        if len(simplified) < min_points:
+            # 多边形的外环退化时整个多边形丢弃，内环（洞）直接丢弃
+            if closed and index == 0:
+                return [], []
+            continue
+        text, offset = encode_line(simplified)
+        if len(text) < min_points * 2:
+            if closed and index == 0:
+                return [], []
+            continue
+        encoded.append(text)
+        offsets.append(offset)
+    return encoded, offsets
+
+
+def compress_geometry(geometry: Dict[str, Any], tolerance: float) -> Optional[Dict[str, Any]]:
+    """简化并压缩一个几何对象，不支持的类型原样返回，全部退化时返回 None"""
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    if kind == "Polygon":
+        encoded, offsets = _encode_parts(coordinates, tolerance, closed=True)
+    elif kind == "MultiPolygon":
+        encoded, offsets = [], []
+        for polygon in coordinates:
+            rings, ring_offsets = _encode_parts(polygon, tolerance, closed=True)
+            if rings:
+                encoded.append(rings)
+                offsets.append(ring_offsets)
+    elif kind == "LineString":
+        lines, line_offsets = _encode_parts([coordinates], tolerance, closed=False)
+        encoded, offsets = (lines[0], line_offsets[0]) if lines else ([], [])
+    elif kind == "MultiLineString":
+        encoded, offsets = _encode_parts(coordinates, tolerance, closed=False)
+    else:
+        return geometry
+    if not encoded:
+        return None
+    return {"type": kind, "coordinates": encoded, "encodeOffsets": offsets}
+
+
+def compress_geojson(geojson: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """把 GeoJSON FeatureCollection 简化并压缩，要素属性只保留名称、代码和标签位置"""
+    features = []
+    for feature in geojson.get("features") or []:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        compressed = compress_geometry(geometry, tolerance)
+        if compressed is None:
+            # 小于容差的要素（如小岛）用原始几何，保证地图上每个区域都在
+            compressed = compress_geometry(geometry, 0)
+            if compressed is None:
+                continue
+        properties = feature.get("properties") or {}
+        kept = {"name": properties.get("name", ""), "adcode": properties.get("adcode")}
+        label = properties.get("centroid") or properties.get("center")
+        if label:
+            kept["cp"] = [round(label[0], 3), round(label[1], 3)]
+        features.append({"type": "Feature", "properties": kept, "geometry": compressed})
+    return {"type": "FeatureCollection", "UTF8Encoding": True, "features": features}
+
+
+def remote_urls(code: str, remote_url: str = REMOTE_URL) -> List[str]:
+    """在线数据源地址：先取包含下级区域的数据，没有下级时退回到该区域的轮廓"""
+    return [f"{remote_url}/{code}_full.json", f"{remote_url}/{code}.json"]
+
+
+def default_codes() -> List[str]:
+    """需要生成数据的行政区：全国、省级和全部地级行政区（直辖市为区县）"""
+    codes = []
+    for region in REGIONS:
+        codes.append(region.code)
+        if region.level == "province":
+            codes.extend(child.code for child in children(region.code))
+    return codes
+
+
+class GeoStore:
+    """本地地图边界数据，按 (精度级别, 行政区划代码) 读取，最近读取的文件内容常驻内存"""
+
+    def __init__(self, directory: str, levels: Optional[Dict[str, str]] = None, inline: bool = True,
+                 inline_max_bytes: int = 512 * 1024, base_url: Optional[str] = None,
+                 remote_url: str = REMOTE_URL, max_entries: int = 64):
+        self.directory = directory
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self.inline = inline
+        self.inline_max_bytes = inline_max_bytes
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.remote_url = remote_url.rstrip('/')
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.inlined = 0
+        self.remote = 0
+
+    @classmethod
+    def from_config(cls, geo_config: Dict[str, Any]) -> "GeoStore":
+        """根据 charts.geo 配置创建数据存储，相对路径从项目根目录开始，base_url 未配置时使用本服务器的 /geo 路由"""
+        directory = geo_config.get('dir', 'src/tools/geo_data')
+        if not os.path.isabs(directory):
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            directory = os.path.join(project_root, directory)
+        return cls(
+            directory,
+            levels=geo_config.get('levels'),
+            inline=geo_config.get('inline', True),
+            inline_max_bytes=geo_config.get('inline_max_bytes', 512 * 1024),
+            base_url=ConfigLoader().route_url(geo_config.get('base_url'), "/geo"),
+            remote_url=geo_config.get('remote_url', REMOTE_URL)
+        )
+
+    def path(self, code: str, level: str) -> Optional[str]:
+        """数据文件路径，代码或级别不合法时返回 None"""
+        if level not in TOLERANCES or not isinstance(code, str) or not _CODE.fullmatch(code):
+            return None
+        return os.path.join(self.directory, level, code + ".json")
+
+    def read(self, code: str, level: str) -> Optional[Tuple[bytes, str]]:
+        """读取数据文件，返回 (内容, ETag)，文件不存在时返回 None"""
+        path = self.path(code, level)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.misses += 1
+            return None
+        key = (level, code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = f'"{stat.st_mtime_ns:x}-{len(body):x}"'
+        with self._lock:
+            self._entries[key] = (stat.st_mtime_ns, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.misses += 1
+        return body, etag
+
+    def map_source(self, region: Region) -> Tuple[List[str], Optional[str]]:
+        """页面加载地图数据的方式：(依次尝试的地址, 内嵌的数据或 None)"""
+        level = self.levels.get(region.level, "medium")
+        urls = remote_urls(region.code, self.remote_url)
+        path = self.path(region.code, level)
+        if path is not None and os.path.exists(path):
+            if self.inline:
+                entry = self.read(region.code, level)
+                if entry is not None and len(entry[0]) <= self.inline_max_bytes:
+                    self.inlined += 1
+                    return [], entry[0].decode("utf-8").replace("</", "<\\/")
+            if self.base_url:
+                return [f"{self.base_url}/{level}/{region.code}.json"] + urls, None
+        self.remote += 1
+        return urls, None
+
+    def build(self, codes: Iterable[str], source: Optional[str] = None,
+              levels: Sequence[str] = tuple(TOLERANCES)) -> Dict[str, int]:
+        """生成数据文件
+
+        Args:
+            codes: 行政区划代码
+            source: 原始 GeoJSON 所在目录（<代码>_full.json 或 <代码>.json），默认从在线数据源下载
+            levels: 要生成的精度级别
+
+        Returns:
+            Dict[str, int]: 各精度级别生成的文件总字节数
+        """
+        sizes = {level: 0 for level in levels}
+        for level in levels:
+            os.makedirs(os.path.join(self.directory, level), exist_ok=True)
+        for code in codes:
+            geojson = self._load_source(code, source)
+            if geojson is None:
+                logger.warning(f"没有找到 {code} 的边界数据，跳过")
+                continue
+            for level in levels:
+                text = json.dumps(compress_geojson(geojson, TOLERANCES[level]),
+                                  ensure_ascii=False, separators=(',', ':'))
+                path = self.path(code, level)
+                temp_path = path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(temp_path, path)
+                sizes[level] += os.path.getsize(path)
+            logger.info(f"已生成 {code} 的边界数据")
+        return sizes
+
+    def _load_source(self, code: str, source: Optional[str]) -> Optional[Dict[str, Any]]:
+        if source and not source.startswith(("http://", "https://")):
+            for name in (f"{code}_full.json", f"{code}.json"):
+                path = os.path.join(source, name)
+                if os.path.exists(path):
+                    with open(path, "r", encoding="utf-8") as f:
+                        return json.load(f)
+            return None
+        for url in remote_urls(code, (source or self.remote_url).rstrip('/')):
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    return json.loads(response.read().decode("utf-8"))
+            except (urllib.error.URLError, ValueError) as e:
+                logger.debug(f"下载失败 {url}: {e}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cached_bytes = sum(len(entry[1]) for entry in self._entries.values())
+            return {
+                "directory": self.directory,
+                "entries": len(self._entries),
+                "cached_bytes": cached_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inlined": self.inlined,
+                "remote": self.remote
+            }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：python -m src.tools.geo_store [--source 目录] [--codes 代码1,代码2]"""
+    parser = argparse.ArgumentParser(description="生成本地地图边界数据（简化并压缩的 GeoJSON）")
+    parser.add_argument('--source', help="原始 GeoJSON 所在目录或在线数据源地址，默认从在线数据源下载")
+    parser.add_argument('--codes', help="行政区划代码，逗号分隔，默认全国、省级和全部地级行政区")
+    parser.add_argument('--levels', default=",".join(TOLERANCES), help="精度级别，逗号分隔")
+    parser.add_argument('--dir', help="输出目录，默认使用配置中的 charts.geo.dir")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from src.config.config_loader import ConfigLoader
+    geo_config = dict(ConfigLoader().charts_config.get('geo', {}))
+    if args.dir:
+        geo_config['dir'] = args.dir
+    store = GeoStore.from_config(geo_config)
+
+    codes = [code for code in (args.codes or '').split(',') if code] or default_codes()
+    levels = [level for level in args.levels.split(',') if level in TOLERANCES]
+    sizes = store.build(codes, args.source, levels)
+    for level, size in sizes.items():
+        print(f"{level}: {size / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,11 @@ import json
 import os
 from datetime import datetime
 from src.config.config_loader import ConfigLoader
+from src.tools.chart_cache import ChartCache, cache_version, chart_cache_key, chart_file_name
+from src.tools.chart_template import TEMPLATE_VERSION, option_map_type, render_chart_html, script_tags
+from src.tools.gazetteer import detect_map_region, display_name, map_type_for, region_for_map
+from src.tools.geo_store import GeoStore
+from src.tools.vendor_assets import VendorAssets
 import subprocess
 import platform
 
@@ -11,17 +16,38 @@ logger = logging.getLogger(__name__)
 # 获取配置
 config = ConfigLoader()
 
-def ensure_output_dir():
-    """
-    确保输出目录存在
-    """
+def output_dir_path():
+    """图表输出目录的绝对路径（相对路径从项目根目录开始）"""
     output_dir = config.charts_config.get('output_dir', 'charts')
-    
-    # 如果是相对路径，从项目根目录开始
     if not os.path.isabs(output_dir):
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         output_dir = os.path.join(project_root, output_dir)
-    
+    return output_dir
+
+# 本地地图边界数据，有数据时内嵌到地图页面
+geo_store = GeoStore.from_config(config.charts_config.get('geo', {}))
+
+# 页面引用的 echarts 脚本，配置 charts.asset_base_url 后从本地路由加载
+vendor_assets = VendorAssets.from_config(config.charts_config)
+chart_scripts = script_tags(vendor_assets.script_urls())
+
+# 图表文件缓存，相同输入直接复用已生成的文件；索引从输出目录中已有的文件重建
+cache_config = config.charts_config.get('cache', {})
+chart_cache = ChartCache.from_config(cache_config)
+chart_cache.load_directory(output_dir_path())
+
+# 缓存版本：模板、脚本地址、地图数据源或 charts.cache.version 变化后，旧文件不再命中
+chart_cache_version = cache_version([
+    TEMPLATE_VERSION, chart_scripts, str(cache_config.get('version', '')),
+    geo_store.base_url or '', geo_store.remote_url, str(geo_store.inline), str(geo_store.inline_max_bytes),
+    json.dumps(geo_store.levels, sort_keys=True)
+])
+
+def ensure_output_dir():
+    """
+    确保输出目录存在
+    """
+    output_dir = output_dir_path()
     os.makedirs(output_dir, exist_ok=True)
     return output_dir
 
@@ -618,418 +644,26 @@ def detect_map_type(region_names):
     """
     根据地名列表智能检测地图类型
     """
-    # 省份/直辖市映射
-    province_map_types = {
-        '山东': 'shandong',
-        '北京': 'beijing', 
-        '上海': 'shanghai',
-        '广东': 'guangdong',
-        '四川': 'sichuan',
-        '江苏': 'jiangsu',
-        '浙江': 'zhejiang',
-        '河北': 'hebei',
-        '河南': 'henan',
-        '湖北': 'hubei',
-        '湖南': 'hunan',
-        '安徽': 'anhui',
-        '福建': 'fujian',
-        '江西': 'jiangxi',
-        '辽宁': 'liaoning',
-        '吉林': 'jilin',
-        '黑龙江': 'heilongjiang',
-        '内蒙古': 'neimenggu',
-        '山西': 'shanxi',
-        '陕西': 'shaanxi',
-        '甘肃': 'gansu',
-        '青海': 'qinghai',
-        '宁夏': 'ningxia',
-        '新疆': 'xinjiang',
-        '西藏': 'xizang',
-        '云南': 'yunnan',
-        '贵州': 'guizhou',
-        '重庆': 'chongqing',
-        '天津': 'tianjin',
-        '广西': 'guangxi',
-        '海南': 'hainan'
-    }
-    
-    # 山东省城市映射
-    shandong_cities = {
-        '济南': 'jinan',
-        '青岛': 'qingdao', 
-        '烟台': 'yantai',
-        '潍坊': 'weifang',
-        '临沂': 'linyi',
-        '淄博': 'zibo',
-        '济宁': 'jining',
-        '泰安': 'taian',
-        '聊城': 'liaocheng',
-        '威海': 'weihai',
-        '枣庄': 'zaozhuang',
-        '德州': 'dezhou',
-        '东营': 'dongying',
-        '菏泽': 'heze',
-        '日照': 'rizhao',
-        '滨州': 'binzhou'
-    }
-    
-    # 其他省份主要城市映射
-    city_to_province = {
-        # 广东省城市
-        '广州': 'guangdong', '深圳': 'guangdong', '珠海': 'guangdong', '佛山': 'guangdong',
-        '韶关': 'guangdong', '湛江': 'guangdong', '肇庆': 'guangdong', '江门': 'guangdong',
-        '茂名': 'guangdong', '惠州': 'guangdong', '梅州': 'guangdong', '汕尾': 'guangdong',
-        '河源': 'guangdong', '阳江': 'guangdong', '清远': 'guangdong', '东莞': 'guangdong',
-        '中山': 'guangdong', '潮州': 'guangdong', '揭阳': 'guangdong', '云浮': 'guangdong',
-        '汕头': 'guangdong',
-        
-        # 江苏省城市
-        '南京': 'jiangsu', '苏州': 'jiangsu', '无锡': 'jiangsu', '常州': 'jiangsu',
-        '镇江': 'jiangsu', '南通': 'jiangsu', '泰州': 'jiangsu', '扬州': 'jiangsu',
-        '盐城': 'jiangsu', '连云港': 'jiangsu', '徐州': 'jiangsu', '淮安': 'jiangsu',
-        '宿迁': 'jiangsu',
-        
-        # 浙江省城市
-        '杭州': 'zhejiang', '宁波': 'zhejiang', '温州': 'zhejiang', '嘉兴': 'zhejiang',
-        '湖州': 'zhejiang', '绍兴': 'zhejiang', '金华': 'zhejiang', '衢州': 'zhejiang',
-        '舟山': 'zhejiang', '台州': 'zhejiang', '丽水': 'zhejiang',
-        
-        # 河北省城市
-        '石家庄': 'hebei', '唐山': 'hebei', '秦皇岛': 'hebei', '邯郸': 'hebei',
-        '邢台': 'hebei', '保定': 'hebei', '张家口': 'hebei', '承德': 'hebei',
-        '沧州': 'hebei', '廊坊': 'hebei', '衡水': 'hebei',
-        
-        # 河南省城市
-        '郑州': 'henan', '开封': 'henan', '洛阳': 'henan', '平顶山': 'henan',
-        '安阳': 'henan', '鹤壁': 'henan', '新乡': 'henan', '焦作': 'henan',
-        '濮阳': 'henan', '许昌': 'henan', '漯河': 'henan', '三门峡': 'henan',
-        '南阳': 'henan', '商丘': 'henan', '信阳': 'henan', '周口': 'henan',
-        '驻马店': 'henan',
-        
-        # 四川省城市
-        '成都': 'sichuan', '自贡': 'sichuan', '攀枝花': 'sichuan', '泸州': 'sichuan',
-        '德阳': 'sichuan', '绵阳': 'sichuan', '广元': 'sichuan', '遂宁': 'sichuan',
-        '内江': 'sichuan', '乐山': 'sichuan', '南充': 'sichuan', '眉山': 'sichuan',
-        '宜宾': 'sichuan', '广安': 'sichuan', '达州': 'sichuan', '雅安': 'sichuan',
-        '巴中': 'sichuan', '资阳': 'sichuan',
-        
-        # 湖北省城市
-        '武汉': 'hubei', '黄石': 'hubei', '十堰': 'hubei', '宜昌': 'hubei',
-        '襄阳': 'hubei', '鄂州': 'hubei', '荆门': 'hubei', '孝感': 'hubei',
-        '荆州': 'hubei', '黄冈': 'hubei', '咸宁': 'hubei', '随州': 'hubei',
-        
-        # 湖南省城市
-        '长沙': 'hunan', '株洲': 'hunan', '湘潭': 'hunan', '衡阳': 'hunan',
-        '邵阳': 'hunan', '岳阳': 'hunan', '常德': 'hunan', '张家界': 'hunan',
-        '益阳': 'hunan', '郴州': 'hunan', '永州': 'hunan', '怀化': 'hunan',
-        '娄底': 'hunan',
-        
-        # 安徽省城市
-        '合肥': 'anhui', '芜湖': 'anhui', '蚌埠': 'anhui', '淮南': 'anhui',
-        '马鞍山': 'anhui', '淮北': 'anhui', '铜陵': 'anhui', '安庆': 'anhui',
-        '黄山': 'anhui', '滁州': 'anhui', '阜阳': 'anhui', '宿州': 'anhui',
-        '六安': 'anhui', '亳州': 'anhui', '池州': 'anhui', '宣城': 'anhui',
-        
-        # 福建省城市
-        '福州': 'fujian', '厦门': 'fujian', '莆田': 'fujian', '三明': 'fujian',
-        '泉州': 'fujian', '漳州': 'fujian', '南平': 'fujian', '龙岩': 'fujian',
-        '宁德': 'fujian',
-        
-        # 江西省城市
-        '南昌': 'jiangxi', '景德镇': 'jiangxi', '萍乡': 'jiangxi', '九江': 'jiangxi',
-        '新余': 'jiangxi', '鹰潭': 'jiangxi', '赣州': 'jiangxi', '吉安': 'jiangxi',
-        '宜春': 'jiangxi', '抚州': 'jiangxi', '上饶': 'jiangxi',
-        
-        # 辽宁省城市
-        '沈阳': 'liaoning', '大连': 'liaoning', '鞍山': 'liaoning', '抚顺': 'liaoning',
-        '本溪': 'liaoning', '丹东': 'liaoning', '锦州': 'liaoning', '营口': 'liaoning',
-        '阜新': 'liaoning', '辽阳': 'liaoning', '盘锦': 'liaoning', '铁岭': 'liaoning',
-        '朝阳': 'liaoning', '葫芦岛': 'liaoning',
-        
-        # 吉林省城市
-        '长春': 'jilin', '吉林': 'jilin', '四平': 'jilin', '辽源': 'jilin',
-        '通化': 'jilin', '白山': 'jilin', '松原': 'jilin', '白城': 'jilin',
-        
-        # 黑龙江省城市
-        '哈尔滨': 'heilongjiang', '齐齐哈尔': 'heilongjiang', '鸡西': 'heilongjiang',
-        '鹤岗': 'heilongjiang', '双鸭山': 'heilongjiang', '大庆': 'heilongjiang',
-        '伊春': 'heilongjiang', '佳木斯': 'heilongjiang', '七台河': 'heilongjiang',
-        '牡丹江': 'heilongjiang', '黑河': 'heilongjiang', '绥化': 'heilongjiang',
-        
-        # 山西省城市
-        '太原': 'shanxi', '大同': 'shanxi', '阳泉': 'shanxi', '长治': 'shanxi',
-        '晋城': 'shanxi', '朔州': 'shanxi', '晋中': 'shanxi', '运城': 'shanxi',
-        '忻州': 'shanxi', '临汾': 'shanxi', '吕梁': 'shanxi',
-        
-        # 陕西省城市
-        '西安': 'shaanxi', '铜川': 'shaanxi', '宝鸡': 'shaanxi', '咸阳': 'shaanxi',
-        '渭南': 'shaanxi', '延安': 'shaanxi', '汉中': 'shaanxi', '榆林': 'shaanxi',
-        '安康': 'shaanxi', '商洛': 'shaanxi',
-        
-        # 甘肃省城市
-        '兰州': 'gansu', '嘉峪关': 'gansu', '金昌': 'gansu', '白银': 'gansu',
-        '天水': 'gansu', '武威': 'gansu', '张掖': 'gansu', '平凉': 'gansu',
-        '酒泉': 'gansu', '庆阳': 'gansu', '定西': 'gansu', '陇南': 'gansu',
-        
-        # 青海省城市
-        '西宁': 'qinghai', '海东': 'qinghai',
-        
-        # 宁夏城市
-        '银川': 'ningxia', '石嘴山': 'ningxia', '吴忠': 'ningxia', '固原': 'ningxia',
-        '中卫': 'ningxia',
-        
-        # 新疆城市
-        '乌鲁木齐': 'xinjiang', '克拉玛依': 'xinjiang', '吐鲁番': 'xinjiang',
-        '哈密': 'xinjiang',
-        
-        # 西藏城市
-        '拉萨': 'xizang', '日喀则': 'xizang', '昌都': 'xizang', '林芝': 'xizang',
-        '山南': 'xizang', '那曲': 'xizang',
-        
-        # 云南省城市
-        '昆明': 'yunnan', '曲靖': 'yunnan', '玉溪': 'yunnan', '保山': 'yunnan',
-        '昭通': 'yunnan', '丽江': 'yunnan', '普洱': 'yunnan', '临沧': 'yunnan',
-        
-        # 贵州省城市
-        '贵阳': 'guizhou', '六盘水': 'guizhou', '遵义': 'guizhou', '安顺': 'guizhou',
-        '毕节': 'guizhou', '铜仁': 'guizhou',
-        
-        # 广西城市
-        '南宁': 'guangxi', '柳州': 'guangxi', '桂林': 'guangxi', '梧州': 'guangxi',
-        '北海': 'guangxi', '防城港': 'guangxi', '钦州': 'guangxi', '贵港': 'guangxi',
-        '玉林': 'guangxi', '百色': 'guangxi', '贺州': 'guangxi', '河池': 'guangxi',
-        '来宾': 'guangxi', '崇左': 'guangxi',
-        
-        # 海南省城市
-        '海口': 'hainan', '三亚': 'hainan', '三沙': 'hainan', '儋州': 'hainan',
-        
-        # 内蒙古城市
-        '呼和浩特': 'neimenggu', '包头': 'neimenggu', '乌海': 'neimenggu',
-        '赤峰': 'neimenggu', '通辽': 'neimenggu', '鄂尔多斯': 'neimenggu',
-        '呼伦贝尔': 'neimenggu', '巴彦淖尔': 'neimenggu', '乌兰察布': 'neimenggu'
-    }
-    
-    # 1. 检查是否为单一省份
-    if len(region_names) == 1:
-        region_name = region_names[0]
-        if region_name in province_map_types:
-            return province_map_types[region_name]
-    
-    # 2. 检查是否为山东省城市
-    if all(name in shandong_cities for name in region_names):
-        if len(region_names) == 1:
-            # 单个山东城市，返回该城市的地图
-            return shandong_cities[region_names[0]]
-        else:
-            # 多个山东城市，返回山东省地图
-            return 'shandong'
-    
-    # 3. 检查是否为其他省份的城市
-    provinces_found = set()
-    for name in region_names:
-        if name in city_to_province:
-            provinces_found.add(city_to_province[name])
-    
-    if len(provinces_found) == 1:
-        # 所有城市都属于同一个省份
-        return provinces_found.pop()
-    
-    # 4. 检查是否为多个省份
-    provinces_in_data = set()
-    for name in region_names:
-        if name in province_map_types:
-            provinces_in_data.add(name)
-    
-    if len(provinces_in_data) >= 2:
-        # 多个省份，使用中国地图
-        return 'china'
-    
-    # 5. 默认返回中国地图
-    return 'china'
+    return detect_map_region(region_names).map_type
 
 def get_map_center(map_type):
-    """获取地图中心点坐标"""
-    centers = {
-        'china': [104.114129, 37.550339],  # 中国
-        # 省份中心点
-        'shandong': [117.000923, 36.675807],  # 山东
-        'beijing': [116.383331, 39.916668],  # 北京
-        'shanghai': [121.472644, 31.231706],  # 上海
-        'guangdong': [113.280637, 23.125178],  # 广东
-        'sichuan': [104.065735, 30.659462],  # 四川
-        'jiangsu': [118.767413, 32.041544],  # 江苏
-        'zhejiang': [120.153576, 30.287459],  # 浙江
-        'hebei': [114.502461, 38.045474],  # 河北
-        'henan': [113.665412, 34.757975],  # 河南
-        'hubei': [114.298572, 30.584355],  # 湖北
-        'hunan': [112.982279, 28.19409],   # 湖南
-        'anhui': [117.283042, 31.86119],   # 安徽
-        'fujian': [119.306239, 26.075302], # 福建
-        'jiangxi': [115.892151, 28.676493], # 江西
-        'liaoning': [123.429096, 41.796767], # 辽宁
-        'jilin': [125.3245, 43.886841],    # 吉林
-        'heilongjiang': [126.642464, 45.756967], # 黑龙江
-        'neimenggu': [111.670801, 40.818311], # 内蒙古
-        'shanxi': [112.549248, 37.857014],  # 山西
-        'shaanxi': [108.948024, 34.263161], # 陕西
-        'gansu': [103.823557, 36.058039],  # 甘肃
-        'qinghai': [101.778916, 36.623178], # 青海
-        'ningxia': [106.278179, 38.46637],  # 宁夏
-        'xinjiang': [87.617733, 43.792818], # 新疆
-        'xizang': [91.132212, 29.660361],   # 西藏
-        'yunnan': [102.712251, 25.040609],  # 云南
-        'guizhou': [106.713478, 26.578343], # 贵州
-        'chongqing': [106.504962, 29.533155], # 重庆
-        'tianjin': [117.190182, 39.125596], # 天津
-        'guangxi': [108.320004, 22.82402],  # 广西
-        'hainan': [110.33119, 20.031971],   # 海南
-        # 山东省城市中心点
-        'jinan': [117.000923, 36.675807],   # 济南
-        'qingdao': [120.355173, 36.082982], # 青岛
-        'yantai': [121.391382, 37.539297],  # 烟台
-        'weifang': [119.107078, 36.70925],  # 潍坊
-        'linyi': [118.326443, 35.065282],   # 临沂
-        'zibo': [118.047648, 36.814939],    # 淄博
-        'jining': [116.587245, 35.415393],  # 济宁
-        'taian': [117.129063, 36.194968],   # 泰安
-        'liaocheng': [115.980367, 36.456013], # 聊城
-        'weihai': [122.116394, 37.513068],  # 威海
-        'zaozhuang': [117.557964, 34.856424], # 枣庄
-        'dezhou': [116.307428, 37.453968],  # 德州
-        'dongying': [118.49642, 37.461266], # 东营
-        'heze': [115.469381, 35.246531],    # 菏泽
-        'rizhao': [119.461208, 35.428588],  # 日照
-        'binzhou': [118.016974, 37.383542]  # 滨州
-    }
-    return centers.get(map_type, centers['china'])
+    """获取地图中心点坐标，没有预设中心点时返回 None（由 ECharts 自动适配）"""
+    center = region_for_map(map_type).center
+    return list(center) if center else None
 
 def get_map_zoom(map_type):
     """获取地图缩放级别"""
-    zooms = {
-        'china': 1.2,      # 中国
-        # 省份缩放级别
-        'shandong': 1.8,   # 山东
-        'beijing': 2.5,    # 北京
-        'shanghai': 2.5,   # 上海
-        'guangdong': 1.8,  # 广东
-        'sichuan': 1.5,    # 四川
-        'jiangsu': 1.8,    # 江苏
-        'zhejiang': 1.8,   # 浙江
-        'hebei': 1.6,      # 河北
-        'henan': 1.6,      # 河南
-        'hubei': 1.8,      # 湖北
-        'hunan': 1.8,      # 湖南
-        'anhui': 1.8,      # 安徽
-        'fujian': 2.0,     # 福建
-        'jiangxi': 1.8,    # 江西
-        'liaoning': 1.8,   # 辽宁
-        'jilin': 1.8,      # 吉林
-        'heilongjiang': 1.5, # 黑龙江
-        'neimenggu': 1.2,  # 内蒙古
-        'shanxi': 1.8,     # 山西
-        'shaanxi': 1.6,    # 陕西
-        'gansu': 1.3,      # 甘肃
-        'qinghai': 1.3,    # 青海
-        'ningxia': 2.2,    # 宁夏
-        'xinjiang': 1.0,   # 新疆
-        'xizang': 1.0,     # 西藏
-        'yunnan': 1.5,     # 云南
-        'guizhou': 1.8,    # 贵州
-        'chongqing': 2.2,  # 重庆
-        'tianjin': 2.5,    # 天津
-        'guangxi': 1.6,    # 广西
-        'hainan': 2.2,     # 海南
-        # 山东省城市缩放级别
-        'jinan': 2.5,      # 济南
-        'qingdao': 2.5,    # 青岛
-        'yantai': 2.5,     # 烟台
-        'weifang': 2.5,    # 潍坊
-        'linyi': 2.5,      # 临沂
-        'zibo': 2.5,       # 淄博
-        'jining': 2.5,     # 济宁
-        'taian': 2.5,      # 泰安
-        'liaocheng': 2.5,  # 聊城
-        'weihai': 2.5,     # 威海
-        'zaozhuang': 2.5,  # 枣庄
-        'dezhou': 2.5,     # 德州
-        'dongying': 2.5,   # 东营
-        'heze': 2.5,       # 菏泽
-        'rizhao': 2.5,     # 日照
-        'binzhou': 2.5     # 滨州
-    }
-    return zooms.get(map_type, zooms['china'])
+    return region_for_map(map_type).zoom or 1
 
 def normalize_region_name(name, map_type):
     """
-    标准化区域名称，确保与地图数据中的名称匹配
+    标准化区域名称，确保与地图数据中的名称匹配（如山东省地图上的 "济南" -> "济南市"）
     """
-    # 山东省城市名称映射
-    shandong_city_mapping = {
-        '济南': '济南市',
-        '青岛': '青岛市', 
-        '烟台': '烟台市',
-        '潍坊': '潍坊市',
-        '临沂': '临沂市',
-        '淄博': '淄博市',
-        '济宁': '济宁市',
-        '泰安': '泰安市',
-        '聊城': '聊城市',
-        '威海': '威海市',
-        '枣庄': '枣庄市',
-        '德州': '德州市',
-        '东营': '东营市',
-        '菏泽': '菏泽市',
-        '日照': '日照市',
-        '滨州': '滨州市'
-    }
-    
-    # 省份名称映射
-    province_mapping = {
-        '山东': '山东省',
-        '北京': '北京市',
-        '上海': '上海市',
-        '天津': '天津市',
-        '重庆': '重庆市',
-        '河北': '河北省',
-        '山西': '山西省',
-        '辽宁': '辽宁省',
-        '吉林': '吉林省',
-        '黑龙江': '黑龙江省',
-        '江苏': '江苏省',
-        '浙江': '浙江省',
-        '安徽': '安徽省',
-        '福建': '福建省',
-        '江西': '江西省',
-        '河南': '河南省',
-        '湖北': '湖北省',
-        '湖南': '湖南省',
-        '广东': '广东省',
-        '海南': '海南省',
-        '四川': '四川省',
-        '贵州': '贵州省',
-        '云南': '云南省',
-        '陕西': '陕西省',
-        '甘肃': '甘肃省',
-        '青海': '青海省',
-        '宁夏': '宁夏回族自治区',
-        '新疆': '新疆维吾尔自治区',
-        '西藏': '西藏自治区',
-        '广西': '广西壮族自治区',
-        '内蒙古': '内蒙古自治区'
-    }
-    
-    # 根据地图类型选择映射
-    if map_type == 'shandong':
-        return shandong_city_mapping.get(name, name)
-    elif map_type == 'china':
-        return province_mapping.get(name, name)
-    else:
-        # 其他省份的城市，暂时直接返回原名称
-        return name
+    return display_name(name, map_type)
 
 def generate_map_config(data, title):
     """生成地图配置"""
-    map_type = data.get('map_type', 'china')  # 默认中国地图
+    map_type = map_type_for(data.get('map_type', 'china'))  # 默认中国地图，也可以传地名或行政区划代码
     
     # 智能检测地图类型
     if 'regions' in data and len(data['regions']) >= 1:
@@ -1245,401 +879,9 @@ def generate_map_config(data, title):
 
 def create_html_template(echarts_config, title="动态图表", map_type="china"):
     """
-    创建HTML模板
+    创建HTML模板（完整页面字符串，写文件时优先使用 render_chart_html 返回的片段）
     """
-    html_template = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <script src="https://unpkg.com/echarts@5.4.3/dist/echarts.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/echarts-wordcloud@2.0.0/dist/echarts-wordcloud.min.js"></script>
-    <style>
-        body {{
-            margin: 0;
-            padding: 20px;
-            background: linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%);
-            font-family: 'Microsoft YaHei', Arial, sans-serif;
-            min-height: 100vh;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 15px;
-            padding: 20px;
-            box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-            backdrop-filter: blur(10px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }}
-        
-        #chart {{
-            width: 100%;
-            height: 600px;
-            border-radius: 10px;
-            background: rgba(0, 0, 0, 0.2);
-        }}
-        
-        .info {{
-            text-align: center;
-            color: #ffffff;
-            margin-bottom: 20px;
-            font-size: 14px;
-            opacity: 0.8;
-        }}
-        
-        .controls {{
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-top: 20px;
-        }}
-        
-        .btn {{
-            padding: 10px 20px;
-            border: none;
-            border-radius: 25px;
-            background: linear-gradient(45deg, #00ff9f, #00cc7f);
-            color: white;
-            cursor: pointer;
-            font-size: 14px;
-            transition: all 0.3s ease;
-            box-shadow: 0 4px 15px rgba(0, 255, 159, 0.3);
-        }}
-        
-        .btn:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0, 255, 159, 0.4);
-        }}
-        
-        .btn:active {{
-            transform: translateY(0);
-        }}
-        
-        @keyframes fadeIn {{
-            from {{
-                opacity: 0;
-                transform: translateY(20px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-        
-        .container {{
-            animation: fadeIn 0.8s ease-out;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="info">
-            <h2 style="color: #00ff9f; margin: 0;">{title}</h2>
-            <p>动态交互式图表 - 鼠标悬停查看详细数据</p>
-        </div>
-        
-        <div id="chart"></div>
-        
-        <div class="controls">
-            <button class="btn" onclick="refreshChart()">刷新动画</button>
-            <button class="btn" onclick="downloadChart()">下载图片</button>
-            <button class="btn" onclick="toggleTheme()">切换主题</button>
-        </div>
-    </div>
-
-    <script>
-        // 错误处理函数
-        function handleError(error, context) {{
-            console.error('图表错误 (' + context + '):', error);
-            const chartDom = document.getElementById('chart');
-            chartDom.innerHTML = '<div style="display: flex; align-items: center; justify-content: center; height: 100%; color: #ff6b6b; text-align: center; flex-direction: column;">' +
-                '<h3>图表加载失败</h3>' +
-                '<p>错误信息: ' + (error.message || error) + '</p>' +
-                '<p>上下文: ' + context + '</p>' +
-                '<p>请检查网络连接或刷新页面重试</p>' +
-                '</div>';
-        }}
-        
-        // 等待资源加载完成
-        function initChart() {{
-            try {{
-                // 检查ECharts是否加载
-                if (typeof echarts === 'undefined') {{
-                    throw new Error('ECharts未加载');
-                }}
-                
-                // 初始化图表
-                const chartDom = document.getElementById('chart');
-                const myChart = echarts.init(chartDom);
-                
-                // 图表配置
-                const option = {json.dumps(echarts_config, ensure_ascii=False, indent=2)};
-                
-                // 地图加载状态
-                let mapLoaded = false;
-                
-                // 检查是否为地图类型
-                const isMapChart = option.series && option.series.some(s => s.type === 'map') || 
-                                  option.geo !== undefined;
-                
-                if (isMapChart) {{
-                    // 等待地图数据加载
-                    setTimeout(() => {{
-                        try {{
-                                                        // 根据地图类型选择数据源
-                            const mapType = '{map_type}';
-                            let mapUrls = [];
-                            
-                            // 地图数据源配置
-                            const mapDataSources = {{
-                                'china': ['https://geo.datav.aliyun.com/areas_v3/bound/100000_full.json'],
-                                // 省份地图
-                                'shandong': ['https://geo.datav.aliyun.com/areas_v3/bound/370000_full.json'],
-                                'beijing': ['https://geo.datav.aliyun.com/areas_v3/bound/110000_full.json'],
-                                'shanghai': ['https://geo.datav.aliyun.com/areas_v3/bound/310000_full.json'],
-                                'guangdong': ['https://geo.datav.aliyun.com/areas_v3/bound/440000_full.json'],
-                                'sichuan': ['https://geo.datav.aliyun.com/areas_v3/bound/510000_full.json'],
-                                'jiangsu': ['https://geo.datav.aliyun.com/areas_v3/bound/320000_full.json'],
-                                'zhejiang': ['https://geo.datav.aliyun.com/areas_v3/bound/330000_full.json'],
-                                'hebei': ['https://geo.datav.aliyun.com/areas_v3/bound/130000_full.json'],
-                                'henan': ['https://geo.datav.aliyun.com/areas_v3/bound/410000_full.json'],
-                                'hubei': ['https://geo.datav.aliyun.com/areas_v3/bound/420000_full.json'],
-                                'hunan': ['https://geo.datav.aliyun.com/areas_v3/bound/430000_full.json'],
-                                'anhui': ['https://geo.datav.aliyun.com/areas_v3/bound/340000_full.json'],
-                                'fujian': ['https://geo.datav.aliyun.com/areas_v3/bound/350000_full.json'],
-                                'jiangxi': ['https://geo.datav.aliyun.com/areas_v3/bound/360000_full.json'],
-                                'liaoning': ['https://geo.datav.aliyun.com/areas_v3/bound/210000_full.json'],
-                                'jilin': ['https://geo.datav.aliyun.com/areas_v3/bound/220000_full.json'],
-                                'heilongjiang': ['https://geo.datav.aliyun.com/areas_v3/bound/230000_full.json'],
-                                'neimenggu': ['https://geo.datav.aliyun.com/areas_v3/bound/150000_full.json'],
-                                'shanxi': ['https://geo.datav.aliyun.com/areas_v3/bound/140000_full.json'],
-                                'shaanxi': ['https://geo.datav.aliyun.com/areas_v3/bound/610000_full.json'],
-                                'gansu': ['https://geo.datav.aliyun.com/areas_v3/bound/620000_full.json'],
-                                'qinghai': ['https://geo.datav.aliyun.com/areas_v3/bound/630000_full.json'],
-                                'ningxia': ['https://geo.datav.aliyun.com/areas_v3/bound/640000_full.json'],
-                                'xinjiang': ['https://geo.datav.aliyun.com/areas_v3/bound/650000_full.json'],
-                                'xizang': ['https://geo.datav.aliyun.com/areas_v3/bound/540000_full.json'],
-                                'yunnan': ['https://geo.datav.aliyun.com/areas_v3/bound/530000_full.json'],
-                                'guizhou': ['https://geo.datav.aliyun.com/areas_v3/bound/520000_full.json'],
-                                'chongqing': ['https://geo.datav.aliyun.com/areas_v3/bound/500000_full.json'],
-                                'tianjin': ['https://geo.datav.aliyun.com/areas_v3/bound/120000_full.json'],
-                                'guangxi': ['https://geo.datav.aliyun.com/areas_v3/bound/450000_full.json'],
-                                'hainan': ['https://geo.datav.aliyun.com/areas_v3/bound/460000_full.json'],
-                                // 山东省城市地图
-                                'jinan': ['https://geo.datav.aliyun.com/areas_v3/bound/370100_full.json'],
-                                'qingdao': ['https://geo.datav.aliyun.com/areas_v3/bound/370200_full.json'],
-                                'yantai': ['https://geo.datav.aliyun.com/areas_v3/bound/370600_full.json'],
-                                'weifang': ['https://geo.datav.aliyun.com/areas_v3/bound/370700_full.json'],
-                                'linyi': ['https://geo.datav.aliyun.com/areas_v3/bound/371300_full.json'],
-                                'zibo': ['https://geo.datav.aliyun.com/areas_v3/bound/370300_full.json'],
-                                'jining': ['https://geo.datav.aliyun.com/areas_v3/bound/370800_full.json'],
-                                'taian': ['https://geo.datav.aliyun.com/areas_v3/bound/370900_full.json'],
-                                'liaocheng': ['https://geo.datav.aliyun.com/areas_v3/bound/371500_full.json'],
-                                'weihai': ['https://geo.datav.aliyun.com/areas_v3/bound/371000_full.json'],
-                                'zaozhuang': ['https://geo.datav.aliyun.com/areas_v3/bound/370400_full.json'],
-                                'dezhou': ['https://geo.datav.aliyun.com/areas_v3/bound/371400_full.json'],
-                                'dongying': ['https://geo.datav.aliyun.com/areas_v3/bound/370500_full.json'],
-                                'heze': ['https://geo.datav.aliyun.com/areas_v3/bound/371700_full.json'],
-                                'rizhao': ['https://geo.datav.aliyun.com/areas_v3/bound/371100_full.json'],
-                                'binzhou': ['https://geo.datav.aliyun.com/areas_v3/bound/371600_full.json']
-                            }};
-                            
-                            mapUrls = mapDataSources[mapType] || mapDataSources['china'];
-                            
-                            let loadSuccess = false;
-                            
-                            function tryLoadMapData(urls, index = 0) {{
-                                if (index >= urls.length) {{
-                                    console.warn('所有在线地图数据源加载失败，使用简化显示');
-                                    // 如果所有在线数据源都失败，直接渲染现有配置
-                                    myChart.setOption(option);
-                                    console.log('使用默认配置渲染地图');
-                                    return;
-                                }}
-                                
-                                console.log('尝试加载地图数据:', urls[index]);
-                                
-                                fetch(urls[index])
-                                    .then(response => {{
-                                        if (!response.ok) {{
-                                            throw new Error('HTTP ' + response.status);
-                                        }}
-                                        return response.json();
-                                    }})
-                                    .then(geoData => {{
-                                        // 处理不同格式的地理数据
-                                        let chinaData = geoData;
-                                        
-                                        // 如果是阿里云数据源，直接使用
-                                        if (urls[index].includes('datav.aliyun.com')) {{
-                                            echarts.registerMap(mapType, chinaData);
-                                            myChart.setOption(option);
-                                            console.log('阿里云地图数据加载成功:', mapType);
-                                            loadSuccess = true;
-                                            return;
-                                        }}
-                                        
-                                        // 如果是其他数据源，处理不同的数据格式
-                                        if (geoData.features) {{
-                                            let targetFeatures = [];
-                                            
-                                            if (mapType === 'china') {{
-                                                // 中国地图：过滤中国数据
-                                                targetFeatures = geoData.features.filter(feature => 
-                                                    feature.properties && 
-                                                    (feature.properties.NAME_ZH === '中国' || 
-                                                     feature.properties.name === '中国' ||
-                                                     feature.properties.NAME === 'China' ||
-                                                     feature.properties.name === 'China')
-                                                );
-                                            }} else {{
-                                                // 省级地图：直接使用所有特征
-                                                targetFeatures = geoData.features;
-                                            }}
-                                            
-                                            if (targetFeatures.length > 0) {{
-                                                chinaData = {{
-                                                    type: 'FeatureCollection',
-                                                    features: targetFeatures
-                                                }};
-                                                echarts.registerMap(mapType, chinaData);
-                                                myChart.setOption(option);
-                                                console.log('地图数据过滤并加载成功:', mapType);
-                                                loadSuccess = true;
-                                                return;
-                                            }}
-                                        }}
-                                        
-                                        // 如果无法识别格式，尝试下一个数据源
-                                        throw new Error('无法识别地图数据格式');
-                                    }})
-                                    .catch(error => {{
-                                        console.warn('地图数据加载失败:', urls[index], error.message);
-                                        tryLoadMapData(urls, index + 1);
-                                    }});
-                            }}
-                            
-                            // 开始尝试加载地图数据
-                            tryLoadMapData(mapUrls);
-                        }} catch (mapError) {{
-                            handleError(mapError, '地图数据加载');
-                        }}
-                    }}, 1000);
-                }} else {{
-                    // 非地图图表直接渲染
-                    myChart.setOption(option);
-                    console.log('图表初始化成功');
-                }}
-                
-                // 监听图表错误
-                myChart.on('error', function(params) {{
-                    handleError(params, '图表渲染');
-                }});
-                
-                // 存储图表实例供其他函数使用
-                window.myChart = myChart;
-                
-            }} catch (error) {{
-                handleError(error, '图表初始化');
-            }}
-        }}
-        
-        // 页面加载完成后初始化
-        if (document.readyState === 'loading') {{
-            document.addEventListener('DOMContentLoaded', initChart);
-        }} else {{
-            initChart();
-        }}
-        
-        // 响应式
-        window.addEventListener('resize', function() {{
-            if (window.myChart) {{
-                window.myChart.resize();
-            }}
-        }});
-        
-        // 刷新动画
-        function refreshChart() {{
-            if (window.myChart) {{
-                window.myChart.clear();
-                window.myChart.setOption({json.dumps(echarts_config, ensure_ascii=False)});
-            }}
-        }}
-        
-        // 下载图片
-        function downloadChart() {{
-            if (window.myChart) {{
-                const url = window.myChart.getDataURL({{
-                    type: 'png',
-                    pixelRatio: 2,
-                    backgroundColor: '#1a1a1a'
-                }});
-                const link = document.createElement('a');
-                link.download = '{title}_' + new Date().toISOString().slice(0, 19).replace(/:/g, '-') + '.png';
-                link.href = url;
-                link.click();
-            }}
-        }}
-        
-        // 切换主题
-        let isDarkTheme = true;
-        function toggleTheme() {{
-            if (window.myChart) {{
-                isDarkTheme = !isDarkTheme;
-                const newOption = JSON.parse(JSON.stringify({json.dumps(echarts_config, ensure_ascii=False)}));
-                
-                if (isDarkTheme) {{
-                    newOption.backgroundColor = '#1a1a1a';
-                    document.body.style.background = 'linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%)';
-                }} else {{
-                    newOption.backgroundColor = '#ffffff';
-                    if (newOption.title) newOption.title.textStyle.color = '#333333';
-                    if (newOption.legend) newOption.legend.textStyle.color = '#333333';
-                    if (newOption.xAxis) {{
-                        newOption.xAxis.nameTextStyle.color = '#333333';
-                        newOption.xAxis.axisLine.lineStyle.color = '#333333';
-                        newOption.xAxis.axisLabel.color = '#333333';
-                    }}
-                    if (newOption.yAxis && Array.isArray(newOption.yAxis)) {{
-                        newOption.yAxis.forEach(axis => {{
-                            axis.nameTextStyle.color = '#333333';
-                            axis.axisLine.lineStyle.color = '#333333';
-                            axis.axisLabel.color = '#333333';
-                        }});
-                    }}
-                    document.body.style.background = 'linear-gradient(135deg, #f5f5f5 0%, #e8e8e8 100%)';
-                }}
-                
-                window.myChart.setOption(newOption);
-            }}
-        }}
-        
-        // 添加事件监听器
-        function addEventListeners() {{
-            if (window.myChart) {{
-                // 添加点击事件
-                window.myChart.on('click', function(params) {{
-                    console.log('点击了:', params);
-                    // 可以在这里添加更多交互逻辑
-                }});
-                
-                // 添加数据缩放功能
-                window.myChart.on('datazoom', function(params) {{
-                    console.log('数据缩放:', params);
-                }});
-            }}
-        }}
-        
-        // 延迟添加事件监听器
-        setTimeout(addEventListeners, 1500);
-    </script>
-</body>
-</html>"""
-    
-    return html_template
+    return "".join(render_chart_html(echarts_config, title, map_type, geo_store, chart_scripts))
 
 def draw_html_chart(data_input, title="动态图表", x_label="X轴"):
     """
@@ -1671,31 +913,33 @@ def draw_html_chart(data_input, title="动态图表", x_label="X轴"):
         else:
             raise ValueError("不支持的数据输入格式")
         
+        # 相同输入命中缓存时直接返回已有文件，不再重新渲染
+        cache_key = chart_cache_key(data, title, x_label, chart_cache_version)
+        filepath = chart_cache.get(cache_key)
+        if filepath is not None:
+            logger.info(f"图表缓存命中: {filepath}")
+            open_html_file(filepath)
+            return f"动态图表 '{title}' 已生成！\n{filepath} \n请直接返回这个结果,不需要做任何额外处理,不要返回任何其他内容"
+        
         # 生成ECharts配置
         echarts_config = generate_echarts_config(data, title, x_label)
         
-        # 获取地图类型（如果是地图图表的话）
-        map_type = "china"  # 默认值
-        if data.get('chart_type') == 'map':
-            # 使用智能检测函数
-            if 'regions' in data and len(data['regions']) >= 1:
-                region_names = [region['name'] for region in data['regions']]
-                map_type = detect_map_type(region_names)
-            else:
-                map_type = data.get('map_type', 'china')
+        # 地图类型在生成配置时已检测过，直接从配置中读取
+        map_type = option_map_type(echarts_config)
         
-        # 创建HTML内容
-        html_content = create_html_template(echarts_config, title, map_type)
+        # 生成页面片段（静态部分在导入时已拼好，只插入标题、地图类型和配置）
+        html_parts = render_chart_html(echarts_config, title, map_type, geo_store, chart_scripts)
         
         # 生成文件名和路径
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_dir = ensure_output_dir()
-        filename = f"dynamic_chart_{timestamp}.html"
+        filename = chart_file_name(cache_key, timestamp)
         filepath = output_dir + '/' + filename
         
         # 保存HTML文件
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            f.writelines(html_parts)
+        chart_cache.put(cache_key, filepath)
         
         # 在浏览器中打开
         open_html_file(filepath)
@@ -0,0 +1,165 @@
+import bisect
+import difflib
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.database.db_reader import DatabaseReader
+
+logger = logging.getLogger(__name__)
+
+PAGE_TABLE = "sponge_city_urls"
+
+# 相似度匹配的最低分数
+SIMILARITY_CUTOFF = 0.5
+# 相似度最高的候选需要领先第二名这么多才会直接打开
+SIMILARITY_MARGIN = 0.1
+
+
+class PageEntry(NamedTuple):
+    """一个可打开的页面"""
+    id: int
+    page_name: str
+    subpage_name: Optional[str]
+    url: str
+    description: Optional[str]
+
+
+class PageMatch(NamedTuple):
+    """页面匹配结果"""
+    entry: PageEntry
+    match_type: str
+    score: float
+
+
+def normalize_name(text: Any) -> str:
+    """统一大小写，去掉空白和常见分隔符"""
+    return re.sub(r"[\s/\\\-_>·|]+", "", str(text or "")).lower()
+
+
+class _Snapshot:
+    """某一版本 sponge_city_urls 的内存索引（构建后只读）"""
+
+    def __init__(self, entries: List[PageEntry]):
+        self.entries = entries
+        self.exact: Dict[str, List[PageEntry]] = {}
+        for entry in entries:
+            for key in self._keys(entry):
+                bucket = self.exact.setdefault(key, [])
+                # 相同 url 的重复行只保留一条
+                if all(existing.url != entry.url for existing in bucket):
+                    bucket.append(entry)
+        self.sorted_keys = sorted(self.exact)
+        # 结果缓存按该值计入总字节数：页面文本和索引键的 UTF-8 字节数
+        self.nbytes = sum(len(str(value).encode('utf-8')) for entry in entries for value in entry[1:] if value)
+        self.nbytes += sum(len(key.encode('utf-8')) for key in self.sorted_keys)
+
+    @staticmethod
+    def _keys(entry: PageEntry) -> List[str]:
+        keys = [normalize_name(entry.page_name)]
+        if entry.subpage_name:
+            keys.append(normalize_name(entry.subpage_name))
+            keys.append(normalize_name(f"{entry.page_name}{entry.subpage_name}"))
+        return [key for key in keys if key]
+
+    def prefix(self, key: str) -> List[str]:
+        start = bisect.bisect_left(self.sorted_keys, key)
+        matches = []
+        for candidate in self.sorted_keys[start:]:
+            if not candidate.startswith(key):
+                break
+            matches.append(candidate)
+        return matches
+
+
+class PageIndex:
+    """sponge_city_urls 页面索引
+
+    支持精确匹配、前缀匹配和相似度匹配（difflib）。索引作为查询结果缓存中的一个条目保存，
+    表数据变化（表版本号改变）后下次查找时自动重建。
+    """
+
+    def __init__(self, result_cache=None):
+        """初始化页面索引
+
+        Args:
+            result_cache (ResultCache, optional): 查询结果缓存，用于在表变化时重建索引；为 None 时每次查找都重新读取
+        """
+        self.result_cache = result_cache
+        self.builds = 0
+
+    def _build(self) -> _Snapshot:
+        with DatabaseReader() as db:
+            rows = db.query_data(PAGE_TABLE, ['id', 'page_name', 'subpage_name', 'url', 'description'],
+                                 order_by=['id'])
+        self.builds += 1
+        logger.info(f"页面索引已构建: {len(rows)} 条")
+        return _Snapshot([PageEntry(*row) for row in rows])
+
+    def snapshot(self) -> _Snapshot:
+        """获取当前版本的索引"""
+        if self.result_cache is None:
+            return self._build()
+        return self.result_cache.get_or_load(PAGE_TABLE, {}, "page_index", self._build)
+
+    def resolve(self, query: str, limit: int = 5) -> List[PageMatch]:
+        """按名称查找页面，依次尝试精确匹配、前缀匹配、相似度匹配
+
+        Args:
+            query (str): 页面名、子页面名或描述性短语，如 "监测数据"、"项目管理 技术审查"
+            limit (int): 最多返回的候选数
+        """
+        key = normalize_name(query)
+        if not key:
+            return []
+        snapshot = self.snapshot()
+
+        exact = snapshot.exact.get(key)
+        if exact:
+            return [PageMatch(entry, 'exact', 1.0) for entry in exact[:limit]]
+
+        matches: List[PageMatch] = []
+        seen = set()
+
+        def add(entries: List[PageEntry], match_type: str, score: float):
+            for entry in entries:
+                if entry.url not in seen:
+                    seen.add(entry.url)
+                    matches.append(PageMatch(entry, match_type, round(score, 3)))
+
+        for candidate in snapshot.prefix(key):
+            add(snapshot.exact[candidate], 'prefix', len(key) / len(candidate))
+        if matches:
+            matches.sort(key=lambda match: -match.score)
+            return matches[:limit]
+
+        scored: List[Tuple[float, str]] = []
+        for candidate in snapshot.sorted_keys:
+            ratio = difflib.SequenceMatcher(None, key, candidate).ratio()
+            # 互相包含（如 "打开监测数据页面" 与 "监测数据"）视为高度相关
+            if candidate in key or key in candidate:
+                ratio = max(ratio, 0.8 * min(len(key), len(candidate)) / max(len(key), len(candidate)) + 0.2)
+            if ratio >= SIMILARITY_CUTOFF:
+                scored.append((ratio, candidate))
+        for ratio, candidate in sorted(scored, reverse=True):
+            add(snapshot.exact[candidate], 'similar', ratio)
+        return matches[:limit]
+
+    @staticmethod
+    def pick(matches: List[PageMatch]) -> Optional[PageMatch]:
+        """从候选中选出可以直接打开的页面，结果不明确时返回 None"""
+        if not matches:
+            return None
+        best = matches[0]
+        if len(matches) == 1:
+            return best
+        if best.match_type == 'exact':
+            # 名称对应多个页面（如只给出页面名、下面有多个子页面）时需要调用方进一步确认
+            return None
+        if best.score - matches[1].score >= SIMILARITY_MARGIN:
+            return best
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """获取索引统计"""
+        return {'builds': self.builds}
@@ -0,0 +1,117 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from src.database.db_reader import DatabaseReader
+from src.database.query_builder import AGGREGATE_FUNCTIONS, QueryError
+from src.tools.html_chart_utils import draw_html_chart
+
+logger = logging.getLogger(__name__)
+
+# 支持的图表类型：mixed 时第一个数值列为柱状图，其余为折线图
+SERIES_CHART_TYPES = ('bar', 'line', 'mixed')
+ITEM_CHART_TYPES = ('pie', 'rose', 'funnel')
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """将单元格转为数值，文本中的百分号和千分位会被去掉，无法转换时返回 None"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace('%', '').replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+def build_chart_data(table_name: str, x_column: str, value_columns: List[str],
+                     aggregation: Optional[str] = None, chart_type: str = 'bar',
+                     filters: Optional[List[Dict[str, Any]]] = None,
+                     order_by: Optional[List[str]] = None,
+                     limit: Optional[int] = None,
+                     y_unit: str = '数值') -> Dict[str, Any]:
+    """直接从数据表生成 drawChart 格式的图表数据
+
+    Args:
+        table_name (str): 表名
+        x_column (str): 作为 X 轴（饼图为名称）的列
+        value_columns (List[str]): 数值列，每列一个系列；饼图/漏斗图只使用第一列
+        aggregation (str, optional): 按 x_column 分组后的聚合函数（sum / avg / count / min / max），不指定时逐行取值
+        chart_type (str): bar / line / mixed / pie / rose / funnel
+        filters (List[Dict[str, Any]], optional): 结构化条件，格式同 queryTable
+        order_by (List[str], optional): 排序，"-" 前缀表示降序
+        limit (int, optional): 最大数据点数
+        y_unit (str): 数值单位
+
+    Returns:
+        Dict[str, Any]: 可直接传给 draw_html_chart 的数据
+    """
+    if chart_type not in SERIES_CHART_TYPES + ITEM_CHART_TYPES:
+        raise QueryError(f"不支持的图表类型: {chart_type}，可用: {', '.join(SERIES_CHART_TYPES + ITEM_CHART_TYPES)}")
+    if not value_columns:
+        raise QueryError("value_columns 至少需要一列")
+    if chart_type in ITEM_CHART_TYPES:
+        value_columns = value_columns[:1]
+
+    with DatabaseReader() as db:
+        if aggregation:
+            aggregation = aggregation.lower()
+            if aggregation not in AGGREGATE_FUNCTIONS:
+                raise QueryError(f"不支持的聚合函数: {aggregation}，可用: {', '.join(AGGREGATE_FUNCTIONS)}")
+            # 结果列以数值列命名；数值列同时是分组列（如按对接人统计对接人个数）时改用 "count(对接人)" 形式，避免与分组列重名
+            aliases = {column: f"{aggregation}({column})" if column == x_column else column
+                       for column in value_columns}
+            result = db.aggregate(
+                table_name,
+                group_by=[x_column],
+                aggregates=[{'func': aggregation, 'column': column, 'as': alias} for column, alias in aliases.items()],
+                filters=filters,
+                order_by=order_by,
+                limit=limit
+            )
+            x_data = result['data'][x_column]
+            value_columns = list(aliases.values())
+            values = {alias: result['data'][alias] for alias in value_columns}
+        else:
+            rows = db.query_data(table_name, [x_column] + list(value_columns), filters, order_by,
+                                 limit or db.max_page_size)
+            x_data = [row[0] for row in rows]
+            values = {
+                column: [_to_number(row[i + 1]) for row in rows]
+                for i, column in enumerate(value_columns)
+            }
+
+    x_data = ['' if x is None else str(x) for x in x_data]
+    if chart_type in ITEM_CHART_TYPES:
+        column = value_columns[0]
+        return {
+            'chart_type': chart_type,
+            'data': [{'name': name, 'value': value} for name, value in zip(x_data, values[column])]
+        }
+
+    series = []
+    for i, column in enumerate(value_columns):
+        if chart_type == 'mixed':
+            series_type = 'bar' if i == 0 else 'line'
+        else:
+            series_type = chart_type
+        series.append({'name': column, 'data': values[column], 'type': series_type, 'y_unit': y_unit})
+    return {'x_data': x_data, 'series': series}
+
+
+def draw_table_chart(table_name: str, x_column: str, value_columns: List[str],
+                     aggregation: Optional[str] = None, chart_type: str = 'bar',
+                     title: Optional[str] = None,
+                     filters: Optional[List[Dict[str, Any]]] = None,
+                     order_by: Optional[List[str]] = None,
+                     limit: Optional[int] = None,
+                     y_unit: str = '数值') -> str:
+    """查询数据表并直接绘制图表，数据不经过调用方转写
+
+    Returns:
+        str: draw_html_chart 的结果
+    """
+    data = build_chart_data(table_name, x_column, value_columns, aggregation, chart_type,
+                            filters, order_by, limit, y_unit)
+    if title is None:
+        title = f"{table_name} - {'、'.join(value_columns)}"
+    logger.info(f"从数据表 {table_name} 生成图表: {title}")
+    return draw_html_chart(data, title, x_column)
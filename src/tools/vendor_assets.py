@@ -0,0 +1,166 @@
+import argparse
+import gzip
+import logging
+import os
+import sys
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.config.config_loader import ConfigLoader
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：没有时只生成 .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 图表页面依赖的前端资源
+#
+# 固定版本的资源下载到 <dir>/<包名@版本>/<文件名>，同时预先压缩为 .gz（和 .br），
+# 由 MCP 服务器的 /vendor 路由按 Accept-Encoding 直接返回压缩文件。路径中带版本号，
+# 内容不会变化，可以使用 immutable 长期缓存。
+
+# 本地路径 -> CDN 地址，按页面加载顺序排列（词云插件依赖 echarts）
+ASSETS = {
+    "echarts@5.4.3/echarts.min.js": "https://unpkg.com/echarts@5.4.3/dist/echarts.min.js",
+    "echarts-wordcloud@2.0.0/echarts-wordcloud.min.js":
+        "https://cdn.jsdelivr.net/npm/echarts-wordcloud@2.0.0/dist/echarts-wordcloud.min.js",
+}
+
+# 压缩格式，按优先顺序：(Content-Encoding, 扩展名)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+CONTENT_TYPES = {".js": "application/javascript; charset=utf-8", ".css": "text/css; charset=utf-8"}
+
+
+def _accepted(accept_encoding: str) -> set:
+    """解析 Accept-Encoding，忽略 q=0 的编码"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        name, params = name.strip().lower(), params.strip().replace(" ", "")
+        quality = 1.0
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                pass
+        if name and quality > 0:
+            accepted.add(name)
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS)
+    return accepted
+
+
+class VendorAssets:
+    """本地前端资源目录"""
+
+    def __init__(self, directory: str, base_url: Optional[str] = None):
+        self.directory = directory
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.served = {"identity": 0, "gzip": 0, "br": 0}
+        self.redirects = 0
+
+    @classmethod
+    def from_config(cls, charts_config: Dict[str, Any]) -> "VendorAssets":
+        """根据 charts 配置创建：asset_dir 为资源目录，asset_base_url 为页面引用资源的地址（未配置时使用本服务器的 /vendor 路由）"""
+        directory = charts_config.get('asset_dir', 'src/tools/vendor')
+        if not os.path.isabs(directory):
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            directory = os.path.join(project_root, directory)
+        return cls(directory, ConfigLoader().route_url(charts_config.get('asset_base_url'), "/vendor"))
+
+    def script_urls(self) -> List[Tuple[str, str]]:
+        """页面脚本：(地址, CDN 地址)，没有本地地址（asset_base_url 设为空字符串）时直接使用 CDN"""
+        return [(f"{self.base_url}/{path}" if self.base_url else cdn_url, cdn_url)
+                for path, cdn_url in ASSETS.items()]
+
+    def resolve(self, path: str, accept_encoding: str = "") -> Optional[Tuple[str, Optional[str]]]:
+        """按请求路径和 Accept-Encoding 选择文件，返回 (文件路径, Content-Encoding)，不是已知资源或未下载时返回 None"""
+        if path not in ASSETS:
+            return None
+        file_path = os.path.join(self.directory, *path.split("/"))
+        accepted = _accepted(accept_encoding)
+        for encoding, extension in ENCODINGS:
+            if encoding in accepted and os.path.exists(file_path + extension):
+                self.served[encoding] += 1
+                return file_path + extension, encoding
+        if os.path.exists(file_path):
+            self.served["identity"] += 1
+            return file_path, None
+        self.redirects += 1
+        return None
+
+    def fetch(self, force: bool = False) -> Dict[str, Dict[str, int]]:
+        """下载全部资源并生成压缩文件，返回各资源原始和压缩后的字节数"""
+        sizes = {}
+        for path, url in ASSETS.items():
+            file_path = os.path.join(self.directory, *path.split("/"))
+            if force or not os.path.exists(file_path):
+                logger.info(f"下载 {url}")
+                try:
+                    with urllib.request.urlopen(url, timeout=60) as response:
+                        body = response.read()
+                except urllib.error.URLError as e:
+                    logger.error(f"下载失败 {url}: {e}")
+                    continue
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                self._write(file_path, body)
+            sizes[path] = self.precompress(file_path)
+        return sizes
+
+    def precompress(self, file_path: str) -> Dict[str, int]:
+        """生成 .gz（以及安装了 brotli 时的 .br）文件"""
+        with open(file_path, "rb") as f:
+            body = f.read()
+        sizes = {"identity": len(body)}
+        # mtime=0 使相同内容生成相同的 .gz
+        compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            compressed["br"] = brotli.compress(body, quality=11)
+        else:
+            logger.info("未安装 brotli，只生成 .gz 文件")
+        for encoding, extension in ENCODINGS:
+            if encoding in compressed:
+                self._write(file_path + extension, compressed[encoding])
+                sizes[encoding] = len(compressed[encoding])
+        return sizes
+
+    @staticmethod
+    def _write(path: str, body: bytes) -> None:
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(body)
+        os.replace(temp_path, path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "base_url": self.base_url,
+            "served": dict(self.served),
+            "redirects": self.redirects
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口：python -m src.tools.vendor_assets [--force]"""
+    parser = argparse.ArgumentParser(description="下载图表页面依赖的前端资源并预先压缩")
+    parser.add_argument('--force', action='store_true', help="重新下载已存在的资源")
+    parser.add_argument('--dir', help="资源目录，默认使用配置中的 charts.asset_dir")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    charts_config = dict(ConfigLoader().charts_config)
+    if args.dir:
+        charts_config['asset_dir'] = args.dir
+    assets = VendorAssets.from_config(charts_config)
+
+    for path, sizes in assets.fetch(args.force).items():
+        print(f"{path}: " + ", ".join(f"{encoding} {size / 1024:.1f} KB" for encoding, size in sizes.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
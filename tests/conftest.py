@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.config.config_loader import ConfigLoader
+from src.database.migrations import apply_migrations
+
+# 测试期间使用临时目录，不改动项目数据库和图表目录
+TEST_ROOT = tempfile.mkdtemp(prefix="mcpsse-tests-")
+_config = ConfigLoader()._config
+_config['database']['path'] = os.path.join(TEST_ROOT, "project_storage.db")
+_config['charts']['output_dir'] = os.path.join(TEST_ROOT, "charts")
+_config['charts']['asset_dir'] = os.path.join(TEST_ROOT, "vendor")
+_config['charts'].setdefault('geo', {})['dir'] = os.path.join(TEST_ROOT, "geo")
+
+
+@pytest.fixture(scope="session")
+def server_module():
+    """导入 server 模块（日志目录建在临时目录中）"""
+    cwd = os.getcwd()
+    os.chdir(TEST_ROOT)
+    try:
+        import server
+    finally:
+        os.chdir(cwd)
+    return server
+
+
+PROJECT_COLUMNS = ("项目名称", "项目简介", "项目投资金额", "开始时间", "结束时间",
+                   "项目难点", "对接人", "项目执行情况", "项目进度")
+PROJECT_ROWS = [
+    (f"项目{i:02d}", f"第 {i} 个水务项目的简介", 1000.0 + i * 100, f"2024-{i % 12 + 1:02d}-01", "2025-12-31",
+     "施工难度大", ["张工", "李工", "王工"][i % 3], "正常进行中", f"{i * 3}%")
+    for i in range(30)
+]
+
+
+def create_project_table(db_path, rows=PROJECT_ROWS):
+    """创建与 db_operations.main() 相同结构的项目统计表"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS 项目统计 (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                项目名称 TEXT NOT NULL,
+                项目简介 TEXT NOT NULL,
+                项目投资金额 REAL NOT NULL,
+                开始时间 DATE NOT NULL,
+                结束时间 DATE NOT NULL,
+                项目难点 TEXT,
+                对接人 TEXT,
+                项目执行情况 TEXT,
+                项目进度 TEXT
+            )
+        """)
+        conn.executemany(
+            f"INSERT INTO 项目统计 ({', '.join(PROJECT_COLUMNS)}) VALUES ({', '.join('?' * len(PROJECT_COLUMNS))})",
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def project_db(tmp_path):
+    """已执行迁移、带有项目统计表的临时数据库"""
+    db_path = str(tmp_path / "project_storage.db")
+    create_project_table(db_path)
+    apply_migrations(db_path)
+    return db_path
+
+
+@pytest.fixture(scope="session")
+def config_db():
+    """配置中的（临时）数据库：带有项目统计表并已执行迁移，供 DatabaseReader 等按配置打开数据库的代码使用"""
+    db_path = ConfigLoader().database_path
+    create_project_table(db_path, rows=[])
+    conn = sqlite3.connect(db_path)
+    empty = conn.execute("SELECT COUNT(*) FROM 项目统计").fetchone()[0] == 0
+    conn.close()
+    if empty:
+        create_project_table(db_path)
+    apply_migrations(db_path)
+    return db_path
@@ -0,0 +1,70 @@
+import csv
+import sqlite3
+
+import pytest
+
+from src.database import bulk_import
+from src.database.bulk_import import BulkImporter, key_index_name
+from src.database.migrations import DuplicateKeyError
+from tests.conftest import PROJECT_COLUMNS, PROJECT_ROWS
+
+
+def _write_csv(path, rows):
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PROJECT_COLUMNS)
+        writer.writerows(rows)
+
+
+def _rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT id, 项目名称, 项目投资金额 FROM 项目统计 ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def _indexes(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[1] for row in conn.execute("PRAGMA index_list(项目统计)")]
+    finally:
+        conn.close()
+
+
+def test_migrations_do_not_constrain_project_names(project_db):
+    assert _indexes(project_db) == []
+    conn = sqlite3.connect(project_db)
+    conn.execute(f"INSERT INTO 项目统计 ({', '.join(PROJECT_COLUMNS)}) VALUES ({', '.join('?' * len(PROJECT_COLUMNS))})",
+                 PROJECT_ROWS[0])
+    conn.commit()
+    conn.close()
+
+
+def test_cli_upsert_by_project_name_is_idempotent(project_db, tmp_path):
+    source = tmp_path / "projects.csv"
+    changed = list(PROJECT_ROWS[0])
+    changed[2] = 99999.0
+    _write_csv(source, [tuple(changed), ("新项目", "简介", 1.0, "2024-01-01", "2024-12-31", None, "张工", None, None)])
+
+    args = [str(source), "项目统计", "--key", "项目名称", "--db", project_db]
+    assert bulk_import.main(args) == 0
+    # --key 的唯一索引在导入时建立
+    assert key_index_name("项目统计", ["项目名称"]) in _indexes(project_db)
+    first = _rows(project_db)
+    assert len(first) == len(PROJECT_ROWS) + 1
+    assert first[0] == (1, PROJECT_ROWS[0][0], 99999.0)
+
+    # 第二次导入相同文件不改变任何行
+    report = BulkImporter(project_db).import_file("项目统计", str(source), key_columns=["项目名称"])
+    assert report.rows == 2 and report.changed == 0
+    assert _rows(project_db) == first
+
+
+def test_key_with_duplicate_values_is_rejected(project_db):
+    records = [{"项目名称": "x", "项目简介": "y", "项目投资金额": 1, "开始时间": "2024-01-01", "结束时间": "2024-01-02",
+                "对接人": "张工"}]
+    with pytest.raises(DuplicateKeyError, match="对接人"):
+        BulkImporter(project_db).import_records("项目统计", records, key_columns=["对接人"])
+    assert len(_rows(project_db)) == len(PROJECT_ROWS)
+    assert _indexes(project_db) == []
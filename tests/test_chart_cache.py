@@ -0,0 +1,50 @@
+import os
+import time
+
+from src.tools.chart_cache import ChartCache, chart_cache_key, chart_file_name
+
+
+def _write_chart(directory, key, timestamp, mtime, size=100):
+    path = os.path.join(directory, chart_file_name(key, timestamp))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_index_is_rebuilt_from_output_dir(tmp_path):
+    key = chart_cache_key({"x_data": ["a"]}, "标题", "X轴", "v1")
+    path = _write_chart(str(tmp_path), key, "20240101_000000", time.time())
+    (tmp_path / "notes.html").write_text("不是图表文件")
+
+    cache = ChartCache()
+    assert cache.load_directory(str(tmp_path)) == 1
+    assert cache.get(key) == path
+    assert cache.stats()["bytes"] == 100
+
+
+def test_files_from_before_restart_are_evicted(tmp_path):
+    now = time.time()
+    keys = [chart_cache_key({"x_data": [i]}, "标题", "X轴") for i in range(4)]
+    old = _write_chart(str(tmp_path), keys[0], "20240101_000000", now - 7200)
+    paths = [_write_chart(str(tmp_path), key, f"20240101_00000{i}", now - 300 + i) for i, key in enumerate(keys[1:])]
+
+    cache = ChartCache(max_entries=2, max_age_seconds=3600)
+    assert cache.load_directory(str(tmp_path)) == 2
+    # 过期文件和超出上限的最旧文件已删除
+    assert not os.path.exists(old)
+    assert not os.path.exists(paths[0])
+    assert cache.get(keys[3]) == paths[2]
+
+    new_path = str(tmp_path / chart_file_name("f" * 64, "20240101_000100"))
+    with open(new_path, "w") as f:
+        f.write("new")
+    cache.put("f" * 64, new_path)
+    assert not os.path.exists(paths[1])
+
+
+def test_version_changes_key():
+    data = {"x_data": ["a"], "series": [{"data": [1.0]}]}
+    assert chart_cache_key(data, "t", "x", "v1") != chart_cache_key(data, "t", "x", "v2")
+    assert chart_cache_key(data, "t", "x", "v1") == chart_cache_key({"x_data": [" a "], "series": [{"data": [1]}]},
+                                                                  "t", "x", "v1")
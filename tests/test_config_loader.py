@@ -0,0 +1,57 @@
+import pytest
+
+from src.config.config_loader import ConfigLoader
+from src.tools.geo_store import GeoStore
+from src.tools.vendor_assets import VendorAssets
+
+
+@pytest.fixture
+def server_section(monkeypatch):
+    config = ConfigLoader()
+    section = dict(config.server_config)
+    section.pop('public_url', None)
+    monkeypatch.setitem(config._config, 'server', section)
+    monkeypatch.delenv("MCP_HOST", raising=False)
+    monkeypatch.delenv("MCP_PORT", raising=False)
+    return section
+
+
+def test_server_url_uses_environment_and_replaces_wildcard_host(server_section, monkeypatch):
+    config = ConfigLoader()
+    server_section.update(host="0.0.0.0", port=8000)
+    assert config.server_url == "http://localhost:8000"
+
+    monkeypatch.setenv("MCP_HOST", "10.0.0.5")
+    monkeypatch.setenv("MCP_PORT", "8001")
+    assert config.server_url == "http://10.0.0.5:8001"
+
+    server_section["public_url"] = "https://charts.example.com/mcp/"
+    assert config.server_url == "https://charts.example.com/mcp"
+
+
+def test_route_url_defaults_to_server_and_empty_string_disables(server_section, monkeypatch):
+    config = ConfigLoader()
+    monkeypatch.setenv("MCP_PORT", "9000")
+
+    assert config.route_url(None, "/geo") == "http://localhost:9000/geo"
+    assert config.route_url("", "/geo") is None
+    assert config.route_url("http://cdn.example.com/geo/", "/geo") == "http://cdn.example.com/geo"
+
+
+def test_geo_store_defaults_to_server_geo_route(server_section, tmp_path):
+    server_section.update(host="127.0.0.1", port=8002)
+
+    assert GeoStore.from_config({"dir": str(tmp_path)}).base_url == "http://127.0.0.1:8002/geo"
+    assert GeoStore.from_config({"dir": str(tmp_path), "base_url": ""}).base_url is None
+
+
+def test_vendor_assets_default_to_server_vendor_route(server_section, monkeypatch, tmp_path):
+    monkeypatch.setenv("MCP_HOST", "192.168.1.20")
+    monkeypatch.setenv("MCP_PORT", "8100")
+
+    assets = VendorAssets.from_config({"asset_dir": str(tmp_path)})
+    assert assets.base_url == "http://192.168.1.20:8100/vendor"
+    assert all(url.startswith("http://192.168.1.20:8100/vendor/") for url, _ in assets.script_urls())
+
+    cdn = VendorAssets.from_config({"asset_dir": str(tmp_path), "asset_base_url": ""})
+    assert [url for url, _ in cdn.script_urls()] == [cdn_url for _, cdn_url in cdn.script_urls()]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from src.database.db_reader import DatabaseReader, encode_cursor
+from src.database.result_shaper import estimate_tokens, make_measure, shape_page, shape_stats
+from tests.conftest import PROJECT_COLUMNS, PROJECT_ROWS
+
+
+@pytest.fixture
+def reader(config_db):
+    with DatabaseReader() as db:
+        yield db
+
+
+def test_keyset_pages_cover_table_once(reader):
+    names, cursor, pages = [], None, 0
+    while True:
+        page = reader.read_page("项目统计", limit=7, cursor=cursor, columns=["项目名称"], output_format="json")
+        names += [row["项目名称"] for row in page["result"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert names == [row[0] for row in PROJECT_ROWS]
+    assert pages == 5
+
+
+def test_cursor_is_bound_to_table(reader):
+    with pytest.raises(ValueError):
+        reader.read_page("项目统计", cursor=encode_cursor("sponge_city_urls", 3))
+
+
+def _size(result):
+    return len(result if isinstance(result, str) else json.dumps(result, ensure_ascii=False, separators=(',', ':')))
+
+
+@pytest.mark.parametrize("max_chars", [20, 40, 60, 150, 300, 600, 1200, 5000])
+def test_budgeted_page_stays_within_max_chars(reader, max_chars):
+    page = reader.read_page("项目统计", limit=20, max_chars=max_chars)
+    assert _size(page["result"]) <= max_chars
+    if not isinstance(page["result"], str):
+        # 放不下时改为列统计，游标保持在本页开头
+        assert page["result"]["row_count"] == len(PROJECT_ROWS)
+        assert page["next_cursor"] is None
+        assert "超出预算" in page["elided"][0]
+
+
+def test_over_budget_returns_stats_and_keeps_the_incoming_cursor(reader):
+    first = reader.read_page("项目统计", limit=5, columns=["项目名称"])
+    page = reader.read_page("项目统计", limit=20, cursor=first["next_cursor"], max_chars=60)
+    assert page["result"] == {"row_count": len(PROJECT_ROWS), "columns": {}}
+    assert page["next_cursor"] == first["next_cursor"]
+    assert "已省略列: id" in page["elided"][1]
+
+    # 连行数都放不下时只返回说明
+    page = reader.read_page("项目统计", limit=20, cursor=first["next_cursor"], max_chars=20)
+    assert page["result"] == ""
+    assert page["next_cursor"] == first["next_cursor"]
+
+
+def test_stats_fallback_keeps_columns_that_fit(reader):
+    stats = reader.column_stats("项目统计", ["项目名称", "项目投资金额"])
+    assert stats["columns"]["项目投资金额"] == {"min": 1000.0, "max": 3900.0, "distinct": 30, "nulls": 0}
+
+    budget, measure = make_measure(_size(stats) - 1, None)
+    summary = shape_stats(stats, budget, measure, keep=["项目名称"])
+    # 先省略靠后的列，keep 中的列最后省略
+    assert list(summary["columns"]) == ["项目名称"]
+    assert summary["row_count"] == len(PROJECT_ROWS)
+
+
+def test_both_budgets_are_enforced_for_cjk_text():
+    text = "海绵城市项目" * 10
+    budget, measure = make_measure(100, 40)
+    # 60 个汉字不超过 max_chars，但约 60 个 token 超过 max_tokens
+    assert len(text) <= 100 and estimate_tokens(text) > 40
+    assert measure(text) > budget
+    assert measure("a" * 100) <= budget
+    assert measure("a" * 101) > budget
+
+
+@pytest.mark.parametrize("output_format", ["text", "json", "columnar", "csv"])
+@pytest.mark.parametrize("max_tokens", [80, 200, 500])
+def test_shape_page_respects_token_budget(output_format, max_tokens):
+    budget, measure = make_measure(None, max_tokens)
+    shaped = shape_page("项目统计", PROJECT_COLUMNS, PROJECT_ROWS, output_format, budget, measure, ["项目名称"])
+    if shaped is None:
+        return
+    text = shaped.output if isinstance(shaped.output, str) else json.dumps(shaped.output, ensure_ascii=False,
+                                                                            separators=(',', ':'))
+    assert estimate_tokens(text) <= max_tokens
+    assert "项目名称" in shaped.columns
+    assert shaped.row_count >= 3
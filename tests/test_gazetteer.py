@@ -0,0 +1,67 @@
+import pytest
+
+from src.tools import gazetteer
+from src.tools.gazetteer import candidates, detect_map_region, display_name, lookup, map_type_for
+
+
+@pytest.mark.parametrize("names, expected", [
+    (["武侯", "锦江"], "成都市"),
+    (["武侯区", "锦江区"], "成都市"),
+    (["成都", "武侯"], "成都市"),
+    (["朝阳", "海淀"], "北京市"),
+    (["济南", "青岛"], "山东省"),
+    (["日照"], "日照市"),
+    (["青海"], "青海省"),
+    (["山东", "广东"], "中国"),
+    (["鼓楼"], "中国"),
+])
+def test_detect_map_region(names, expected):
+    assert detect_map_region(names).name == expected
+
+
+def test_city_lookup_loads_only_its_province(monkeypatch):
+    monkeypatch.setattr(gazetteer, "_loaded", set())
+    monkeypatch.setattr(gazetteer, "_children", {})
+    monkeypatch.setattr(gazetteer, "_children_by_code", {})
+    monkeypatch.setattr(gazetteer, "_children_aliases", {})
+
+    assert lookup("延边").code == "222400"
+    assert gazetteer._loaded == {"220000"}
+    assert lookup("不存在的地名") is None
+    assert gazetteer._loaded == {"220000"}
+
+
+def test_same_name_prefers_city_and_full_name_disambiguates():
+    assert lookup("朝阳").level == "city"
+    assert {region.code for region in candidates("朝阳区")} >= {"110105", "220104"}
+    assert all(region.level == "district" for region in candidates("朝阳区"))
+
+
+def test_display_name_for_city_and_district_maps():
+    assert display_name("济南", "shandong") == "济南市"
+    assert display_name("武侯", map_type_for("成都")) == "武侯区"
+    assert display_name("朝阳", "beijing") == "朝阳区"
+    assert display_name("武侯", "shandong") == "武侯"
+
+
+@pytest.mark.parametrize("name, code", [
+    ("山东", "370000"), ("山东省", "370000"), ("shandong", "370000"), ("鲁", "370000"),
+    ("广西", "450000"), ("广西壮族自治区", "450000"), ("内蒙古自治区", "150000"),
+    ("北京市", "110000"), ("香港特别行政区", "810000"),
+    ("成都", "510100"), ("成都市", "510100"), ("chengdu", "510100"), ("Chengdu", "510100"),
+    ("延边", "222400"), ("延边朝鲜族自治州", "222400"), ("yanbian", "222400"),
+    ("阿坝州", "513200"), ("大兴安岭地区", "232700"),
+    ("海淀", "110108"), ("海淀区", "110108"), ("haidian", "110108"),
+    ("武侯", "510107"), ("武侯区", "510107"), ("wuhou", "510107"),
+    ("510100", "510100"),
+])
+def test_lookup_aliases(name, code):
+    assert lookup(name).code == code
+
+
+@pytest.mark.parametrize("value, map_type", [
+    ("chengdu", "510100"), ("成都市", "510100"), ("jinan", "jinan"), ("济南市", "jinan"),
+    ("sichuan", "sichuan"), ("四川省", "sichuan"), ("未知", "china"),
+])
+def test_map_type_for(value, map_type):
+    assert map_type_for(value) == map_type
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+
+from src.database.index_advisor import IndexAdvisor, get_advisor
+from src.database.schema_catalog import SchemaCatalog
+
+
+def _pattern(db_path, group_by):
+    for pattern in get_advisor(db_path).stats()['patterns']:
+        if pattern['group_by'] == group_by:
+            return pattern
+    return None
+
+
+def test_aggregate_hides_plan_and_counts_cache_hits(server_module, config_db):
+    arguments = {"table_name": "项目统计", "group_by": ["项目执行情况"],
+                 "filters": [{"column": "对接人", "op": "=", "value": "张工"}]}
+
+    first = asyncio.run(server_module.aggregateTable.fn(**arguments))
+    second = asyncio.run(server_module.aggregateTable.fn(**arguments))
+
+    assert first["success"] and second == first
+    assert "plan" not in first
+    pattern = _pattern(config_db, ["项目执行情况"])
+    assert pattern["hits"] == 2
+    assert pattern["cache_hits"] == 1
+    assert pattern["full_scans"] == 1
+
+
+def test_query_table_hides_plan(server_module, config_db):
+    result = asyncio.run(server_module.queryTable.fn("项目统计", columns=["项目名称"], limit=3))
+
+    assert result["success"]
+    assert set(result) == {"success", "result", "truncated"}
+
+
+def test_record_hit_ignores_unseen_patterns(tmp_path):
+    advisor = get_advisor(str(tmp_path / "unused.db"))
+
+    assert advisor.record_hit("项目统计", [{"column": "对接人", "op": "=", "value": "李工"}]) is False
+    assert advisor.stats()['patterns'] == []
+
+
+def test_row_count_runs_on_write_connection_once_per_table_version(project_db):
+    advisor = IndexAdvisor(project_db, {'enabled': True, 'min_hits': 1, 'min_rows': 31})
+    counted = []
+    row_count = advisor._row_count
+
+    def counting(conn, table_name):
+        counted.append(conn)
+        return row_count(conn, table_name)
+
+    advisor._row_count = counting
+    conn = sqlite3.connect(project_db)
+    info = SchemaCatalog(project_db).require_table(conn, "项目统计")
+    sql = "SELECT 项目名称 FROM 项目统计 WHERE 对接人 = ?"
+    filters = [{"column": "对接人", "op": "=", "value": "张工"}]
+    try:
+        for _ in range(3):
+            plan = advisor.observe(conn, info, sql, ["张工"], filters=filters, columns=["项目名称"])
+            assert plan.full_scan and plan.suggestion
+        # 30 行少于 min_rows：只在写连接上计数一次，之后按表版本号跳过
+        assert len(counted) == 1
+        assert counted[0] is not conn
+        assert advisor.created == []
+
+        conn.execute("INSERT INTO 项目统计 (项目名称, 项目简介, 项目投资金额, 开始时间, 结束时间, 对接人) "
+                     "VALUES ('新项目', '简介', 1, '2024-01-01', '2024-12-31', '张工')")
+        conn.commit()
+
+        plan = advisor.observe(conn, info, sql, ["张工"], filters=filters, columns=["项目名称"])
+        assert len(counted) == 2
+        assert advisor.created == ["ix_项目统计_对接人_项目名称"]
+        assert not plan.full_scan and plan.suggestion is None
+    finally:
+        conn.close()
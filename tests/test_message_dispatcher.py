@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.messaging import message_dispatcher
+from src.messaging.circuit_breaker import CircuitBreaker
+from src.messaging.message_dispatcher import MessageDispatcher
+from src.messaging.message_outbox import MessageOutbox
+
+SETTINGS = {"flush_interval": 0.05, "initial_backoff": 0.05, "max_backoff": 0.2,
+            "circuit_breaker": {"probe_interval": 0.1}}
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+class SlowOutbox(MessageOutbox):
+    """每次提交耗时 delay 秒的发件箱"""
+
+    def __init__(self, db_path, delay):
+        super().__init__(db_path)
+        self.delay = delay
+
+    def append_many(self, messages):
+        time.sleep(self.delay)
+        return super().append_many(messages)
+
+
+def test_draw_chart_does_not_wait_for_outbox_commit(server_module, tmp_path, monkeypatch):
+    dispatcher = server_module.dispatcher
+    dispatcher.stop()
+    monkeypatch.setattr(dispatcher, "outbox", SlowOutbox(str(tmp_path / "outbox.db"), delay=1.5))
+    monkeypatch.setattr(dispatcher, "endpoint", "http://127.0.0.1:9/api/external-message")
+    monkeypatch.setattr(server_module, "draw_html_chart", lambda *args: "/tmp/chart.html")
+    dispatcher.start()
+    try:
+        started = time.perf_counter()
+        result = asyncio.run(server_module.drawChart.fn({"x_data": ["a"], "series": []}, "慢提交"))
+        elapsed = time.perf_counter() - started
+
+        assert result == {"success": True, "result": "/tmp/chart.html"}
+        assert elapsed < 0.5
+        # 消息仍会在后台写入发件箱
+        assert _wait_until(lambda: dispatcher.outbox.pending_count() + dispatcher.delivered >= 1)
+    finally:
+        dispatcher.stop()
+        dispatcher.outbox.close()
+
+
+def test_enqueue_before_start_is_committed_on_start(tmp_path):
+    dispatcher = MessageDispatcher("http://127.0.0.1:9/api/external-message", SETTINGS,
+                                   str(tmp_path / "outbox.db"))
+    result = dispatcher.enqueue("启动前的消息", wait=True)
+    assert result["queued"] and not result["durable"]
+    assert dispatcher.outbox is None
+
+    dispatcher.start()
+    try:
+        assert _wait_until(lambda: dispatcher.committed_messages == 1)
+    finally:
+        dispatcher.stop()
+
+
+def test_pending_messages_are_redelivered_after_restart(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "outbox.db")
+    first = MessageDispatcher("http://127.0.0.1:9/api/external-message", SETTINGS, db_path)
+    first.start()
+    sent = first.enqueue("重启前未投递的消息", "算法系统", "success")
+    first.stop()
+    assert sent["durable"]
+    assert MessageOutbox(db_path).pending_count() == 1
+
+    received = []
+
+    def handler(request):
+        received.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    client_class = httpx.Client
+    monkeypatch.setattr(message_dispatcher.httpx, "Client",
+                        lambda **kwargs: client_class(transport=httpx.MockTransport(handler), **kwargs))
+    second = MessageDispatcher("http://web/api/external-message", SETTINGS, db_path)
+    second.start()
+    try:
+        assert _wait_until(lambda: second.delivered == 1)
+    finally:
+        second.stop()
+
+    assert len(received) == 1
+    assert received[0].headers["Idempotency-Key"] == sent["message_id"]
+    assert second.outbox.pending_count() == 0
+
+
+@pytest.mark.parametrize("status", [201, 202, 204])
+def test_any_2xx_response_counts_as_delivered(tmp_path, monkeypatch, status):
+    received = []
+
+    def handler(request):
+        received.append(request)
+        return httpx.Response(status)
+
+    client_class = httpx.Client
+    monkeypatch.setattr(message_dispatcher.httpx, "Client",
+                        lambda **kwargs: client_class(transport=httpx.MockTransport(handler), **kwargs))
+    dispatcher = MessageDispatcher("http://web/api/external-message", SETTINGS, str(tmp_path / "outbox.db"))
+    dispatcher.start()
+    try:
+        dispatcher.enqueue("已受理的消息", "算法系统", "success")
+        assert _wait_until(lambda: dispatcher.delivered == 1)
+        time.sleep(0.2)
+    finally:
+        dispatcher.stop()
+
+    assert len(received) == 1
+    assert dispatcher.outbox.pending_count() == 0
+    assert dispatcher.breaker.state == CircuitBreaker.CLOSED
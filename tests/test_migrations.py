@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+from src.database import migrations
+from src.database.migrations import DuplicateKeyError, apply_migrations, dedupe_natural_key, natural_key_index_name
+
+URL_ROWS = [
+    ("首页", "登录页面", "http://a/login"),
+    ("项目管理", "技术审查", "http://a/review"),
+    ("首页", "登录页面", "http://a/login-old"),
+]
+
+
+def _create_urls(db_path, rows=URL_ROWS):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE sponge_city_urls (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                 "page_name TEXT NOT NULL, subpage_name TEXT, url TEXT NOT NULL, description TEXT, remarks TEXT)")
+    conn.executemany("INSERT INTO sponge_city_urls (page_name, subpage_name, url) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def _user_version(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_duplicate_natural_keys_fail_migration_without_deleting(tmp_path):
+    db_path = str(tmp_path / "dup.db")
+    _create_urls(db_path)
+
+    with pytest.raises(DuplicateKeyError, match="登录页面"):
+        apply_migrations(db_path)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM sponge_city_urls").fetchone()[0] == 3
+    conn.close()
+    # 前两个迁移已提交，迁移 3 整体回滚
+    assert _user_version(db_path) == 2
+
+
+def test_explicit_dedupe_then_migrate(tmp_path):
+    db_path = str(tmp_path / "dup.db")
+    _create_urls(db_path)
+
+    assert migrations.main(["--db", db_path, "--dedupe"]) == 0
+    assert _user_version(db_path) == migrations.SCHEMA_VERSION
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT page_name, subpage_name, url FROM sponge_city_urls ORDER BY id").fetchall()
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(sponge_city_urls)")]
+    conn.close()
+    assert rows == URL_ROWS[:2]
+    assert natural_key_index_name("sponge_city_urls") in indexes
+
+
+def test_dedupe_keeps_lowest_id(tmp_path):
+    db_path = str(tmp_path / "dup.db")
+    _create_urls(db_path)
+    conn = sqlite3.connect(db_path)
+    assert dedupe_natural_key(conn, "sponge_city_urls", ("page_name", "subpage_name")) == 1
+    assert dedupe_natural_key(conn, "sponge_city_urls", ("page_name", "subpage_name")) == 0
+    assert conn.execute("SELECT url FROM sponge_city_urls WHERE subpage_name = '登录页面'").fetchall() == [
+        ("http://a/login",)
+    ]
+    conn.close()
+
+
+# 旧版 createSpongeCityTable.py 的表结构和插入方式：显式插入 NULL 时间戳，每运行一次整表重复插入一遍
+OLD_SEED_ROWS = [
+    (None, "首页", "登录页面", "http://a/#/login", "平台登录入口", "需要账号密码", None, None),
+    (None, "项目管理", "项目库管理", "http://a/#/project/library", "项目信息管理", "包含项目基本信息", None, None),
+    (None, "问禹AI", "问禹AI", "http://localhost:5000/modern-full", "AI助手", None, None, None),
+]
+
+
+def _seed_like_old_script(db_path, runs):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE IF NOT EXISTS sponge_city_urls (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                 "page_name TEXT NOT NULL, subpage_name TEXT, url TEXT NOT NULL, description TEXT, remarks TEXT, "
+                 "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    for _ in range(runs):
+        conn.executemany("INSERT INTO sponge_city_urls VALUES (?, ?, ?, ?, ?, ?, ?, ?)", OLD_SEED_ROWS)
+    conn.commit()
+    conn.close()
+
+
+def test_migration_merges_rows_duplicated_by_old_seed_script(tmp_path):
+    db_path = str(tmp_path / "old_seed.db")
+    _seed_like_old_script(db_path, runs=3)
+
+    assert apply_migrations(db_path) == migrations.SCHEMA_VERSION
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT id, page_name, subpage_name, url FROM sponge_city_urls ORDER BY id").fetchall()
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list(sponge_city_urls)")]
+    conn.close()
+    assert rows == [(index + 1,) + row[1:4] for index, row in enumerate(OLD_SEED_ROWS)]
+    assert natural_key_index_name("sponge_city_urls") in indexes
+
+
+def test_rows_with_same_key_but_different_content_still_fail(tmp_path):
+    db_path = str(tmp_path / "old_seed.db")
+    _seed_like_old_script(db_path, runs=2)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE sponge_city_urls SET url = 'http://a/#/login-new' WHERE id = 4")
+    conn.commit()
+    conn.close()
+
+    with pytest.raises(DuplicateKeyError, match="登录页面"):
+        apply_migrations(db_path)
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM sponge_city_urls").fetchone()[0] == 6
+    conn.close()
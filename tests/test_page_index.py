@@ -0,0 +1,127 @@
+import sqlite3
+
+import pytest
+
+from src.database.migrations import apply_migrations
+from src.database.result_cache import ResultCache
+from src.tools.page_index import PageEntry, PageIndex, _Snapshot
+
+PAGES = [
+    PageEntry(1, "首页", "登录页面", "http://example.com/login", None),
+    PageEntry(2, "项目管理", "项目库管理", "http://example.com/library", None),
+    PageEntry(3, "项目管理", "技术审查", "http://example.com/review", None),
+    PageEntry(4, "监测监控", "监测数据", "http://example.com/data", None),
+    PageEntry(5, "监测监控", "数据分析", "http://example.com/analysis", None),
+]
+
+
+class _StaticIndex(PageIndex):
+    """不读数据库、使用固定页面列表的索引"""
+
+    def _build(self):
+        self.builds += 1
+        return _Snapshot(PAGES)
+
+
+def _resolve(query):
+    index = _StaticIndex()
+    matches = index.resolve(query)
+    return [(match.entry.id, match.match_type) for match in matches], index.pick(matches)
+
+
+def test_exact_match_on_subpage_name():
+    matches, picked = _resolve("监测数据")
+    assert matches == [(4, "exact")]
+    assert picked.entry.id == 4
+
+
+def test_exact_match_on_page_and_subpage_name():
+    matches, picked = _resolve("项目管理 技术审查")
+    assert matches == [(3, "exact")]
+    assert picked.entry.id == 3
+
+
+def test_prefix_match():
+    matches, picked = _resolve("技术")
+    assert matches == [(3, "prefix")]
+    assert picked.entry.id == 3
+
+
+def test_similar_match_picks_clear_winner():
+    matches, picked = _resolve("打开监测数据页面")
+    assert matches[0] == (4, "similar")
+    assert all(match_type == "similar" for _, match_type in matches)
+    assert picked.entry.id == 4
+
+
+def test_similar_match_tolerates_typos():
+    matches, picked = _resolve("登陆页面")
+    assert matches == [(1, "similar")]
+    assert picked.entry.id == 1
+
+
+@pytest.mark.parametrize("query", [
+    "项目管理",      # 页面名对应两个子页面，都是精确匹配
+    "管理",          # 两个相似度相同的候选
+    "监测数据分析",  # 最高分领先不足 SIMILARITY_MARGIN
+])
+def test_pick_returns_none_when_ambiguous(query):
+    matches, picked = _resolve(query)
+    assert len(matches) > 1
+    assert picked is None
+
+
+def test_no_match():
+    assert _resolve("xyz") == ([], None)
+    assert _resolve("  ") == ([], None)
+
+
+@pytest.fixture
+def page_table(config_db):
+    """配置数据库中的 sponge_city_urls 表（测试结束后删除）"""
+    conn = sqlite3.connect(config_db)
+    conn.execute("""
+        CREATE TABLE sponge_city_urls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            page_name TEXT NOT NULL,
+            subpage_name TEXT,
+            url TEXT NOT NULL,
+            description TEXT,
+            remarks TEXT
+        )
+    """)
+    conn.executemany("INSERT INTO sponge_city_urls (page_name, subpage_name, url) VALUES (?, ?, ?)",
+                     [(page.page_name, page.subpage_name, page.url) for page in PAGES])
+    conn.commit()
+    conn.close()
+    # 为新表建立变更触发器，结果缓存才能感知写入
+    apply_migrations(config_db)
+    yield config_db
+    conn = sqlite3.connect(config_db)
+    conn.execute("DROP TABLE sponge_city_urls")
+    conn.commit()
+    conn.close()
+
+
+def test_index_is_rebuilt_after_table_changes(page_table):
+    cache = ResultCache(page_table)
+    index = PageIndex(cache)
+    try:
+        assert index.resolve("监测数据")[0].entry.id == 4
+        assert index.resolve("数据分析")[0].entry.id == 5
+        assert index.builds == 1
+        assert index.resolve("雨水管网") == []
+        assert index.builds == 1
+
+        conn = sqlite3.connect(page_table)
+        conn.execute("INSERT INTO sponge_city_urls (page_name, subpage_name, url) "
+                     "VALUES ('监测监控', '雨水管网', 'http://example.com/pipes')")
+        conn.commit()
+        conn.close()
+
+        matches = index.resolve("雨水管网")
+        assert index.builds == 2
+        assert [(match.entry.url, match.match_type) for match in matches] == [("http://example.com/pipes", "exact")]
+        assert index.pick(matches).entry.page_name == "监测监控"
+    finally:
+        cache.close()
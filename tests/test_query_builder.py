@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+from src.database.query_builder import QueryError, build_aggregate, build_select, compile_filters
+from src.database.schema_catalog import TableInfo, UnknownColumnError
+
+INFO = TableInfo("项目统计", ("id", "项目名称", "项目投资金额", "对接人", "项目进度"),
+                 {"id": "INTEGER", "项目名称": "TEXT", "项目投资金额": "REAL", "对接人": "TEXT", "项目进度": "TEXT"},
+                 "id")
+
+
+@pytest.mark.parametrize("call", [
+    lambda: build_select(INFO, columns=["项目名称", "不存在"]),
+    lambda: build_select(INFO, filters=[{"column": "不存在", "op": "=", "value": 1}]),
+    lambda: build_select(INFO, order_by=["-不存在"]),
+    lambda: build_select(INFO, filters=[{"column": ["对接人"], "op": "=", "value": 1}]),
+    lambda: build_aggregate(INFO, group_by=["不存在"]),
+    lambda: build_aggregate(INFO, aggregates=[{"func": "sum", "column": "不存在"}]),
+])
+def test_unknown_columns_are_rejected(call):
+    with pytest.raises(UnknownColumnError):
+        call()
+
+
+@pytest.mark.parametrize("op", ["~", "regexp", "= 1 OR 1", "glob"])
+def test_unknown_operators_are_rejected(op):
+    with pytest.raises(QueryError, match="不支持的条件运算符"):
+        compile_filters(INFO, [{"column": "对接人", "op": op, "value": "张工"}])
+
+
+def test_filter_values_are_bound_as_parameters():
+    sql, params, columns = build_select(INFO, ["项目名称"], [{"column": "对接人", "op": "=", "value": "张工' OR 1=1"}],
+                                        ["-项目投资金额"], 5)
+
+    assert "张工" not in sql
+    assert params == ["张工' OR 1=1", 5]
+    assert columns == ["项目名称"]
+
+
+def test_unknown_aggregate_function_is_rejected():
+    with pytest.raises(QueryError, match="不支持的聚合函数"):
+        build_aggregate(INFO, aggregates=[{"func": "group_concat", "column": "项目名称"}])
+
+
+@pytest.mark.parametrize("alias", [1, ["总投资"], {"name": "总投资"}, "", "  "])
+def test_aggregate_alias_must_be_a_non_empty_string(alias):
+    with pytest.raises(QueryError, match="as"):
+        build_aggregate(INFO, ["对接人"], [{"func": "sum", "column": "项目投资金额", "as": alias}])
+
+
+def test_aggregate_alias_is_quoted_and_returned():
+    sql, params, columns = build_aggregate(INFO, ["对接人"],
+                                           [{"func": "sum", "column": "项目投资金额", "as": '总"投资'}, {"func": "count"}],
+                                           limit=10)
+    assert columns == ["对接人", '总"投资', "count"]
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE 项目统计 (id INTEGER PRIMARY KEY, 项目名称 TEXT, 项目投资金额 REAL, 对接人 TEXT, 项目进度 TEXT)')
+    conn.executemany("INSERT INTO 项目统计 (项目名称, 项目投资金额, 对接人) VALUES (?, ?, ?)",
+                     [("a", 1.0, "张工"), ("b", 2.0, "张工"), ("c", 5.0, "李工")])
+    # 默认按分组列排序
+    assert conn.execute(sql, params).fetchall() == [("张工", 3.0, 2), ("李工", 5.0, 1)]
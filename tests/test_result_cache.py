@@ -0,0 +1,135 @@
+import json
+import sqlite3
+
+import pytest
+
+from src.database.connection_pool import get_pool
+from src.database.migrations import SCHEMA_VERSION, SchemaVersionError, apply_migrations
+from src.database.result_cache import ResultCache, result_size
+from src.tools.page_index import PageEntry, _Snapshot
+from tests.conftest import create_project_table
+
+
+def _count_loader(db_path, calls):
+    def load():
+        calls.append(1)
+        conn = sqlite3.connect(db_path)
+        try:
+            return str(conn.execute("SELECT COUNT(*) FROM 项目统计").fetchone()[0])
+        finally:
+            conn.close()
+    return load
+
+
+def test_hit_until_table_is_written(project_db):
+    cache = ResultCache(project_db)
+    calls = []
+    params = {"limit": 10}
+    try:
+        assert cache.get_or_load("项目统计", params, "text", _count_loader(project_db, calls)) == "30"
+        assert cache.get_or_load("项目统计", params, "text", _count_loader(project_db, calls)) == "30"
+        assert len(calls) == 1
+
+        conn = sqlite3.connect(project_db)
+        conn.execute("INSERT INTO 项目统计 (项目名称, 项目简介, 项目投资金额, 开始时间, 结束时间) "
+                     "VALUES ('新项目', '简介', 1, '2024-01-01', '2024-12-31')")
+        conn.commit()
+        conn.close()
+
+        assert cache.get_or_load("项目统计", params, "text", _count_loader(project_db, calls)) == "31"
+        assert len(calls) == 2
+        assert cache.stats()["invalidations"] == 1
+    finally:
+        cache.close()
+
+
+def test_write_to_other_table_keeps_entry(project_db):
+    conn = sqlite3.connect(project_db)
+    conn.execute("CREATE TABLE 其他 (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    apply_migrations(project_db)
+
+    cache = ResultCache(project_db)
+    calls = []
+    try:
+        cache.get_or_load("项目统计", {}, "text", _count_loader(project_db, calls))
+        conn = sqlite3.connect(project_db)
+        conn.execute("INSERT INTO 其他 (name) VALUES ('x')")
+        conn.commit()
+        conn.close()
+        cache.get_or_load("项目统计", {}, "text", _count_loader(project_db, calls))
+        assert len(calls) == 1
+    finally:
+        cache.close()
+
+
+def test_reads_fail_when_schema_is_behind(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    create_project_table(db_path)
+
+    with pytest.raises(SchemaVersionError):
+        get_pool(db_path)
+    cache = ResultCache(db_path)
+    with pytest.raises(SchemaVersionError):
+        cache.get_or_load("项目统计", {}, "text", lambda: "unused")
+    # 读路径不执行迁移
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
+    assert apply_migrations(db_path) == SCHEMA_VERSION
+    assert get_pool(db_path).db_path == db_path
+
+
+def test_entry_size_is_encoded_result_size(project_db):
+    cache = ResultCache(project_db)
+    result = {"columns": ["对接人"], "data": {"对接人": ["张工", "李工"]}, "row_count": 2}
+    try:
+        cache.get_or_load("项目统计", {}, "columnar", lambda: result)
+        assert cache.stats()["bytes"] == result_size(result)
+        assert result_size(result) == len(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        assert result_size("张工") == 6
+    finally:
+        cache.close()
+
+
+def test_page_index_snapshot_is_sized_by_its_text():
+    snapshot = _Snapshot([PageEntry(1, "监测数据", None, "http://example.com/a", None)])
+
+    # 页面名 + url + 索引键 "监测数据"
+    assert result_size(snapshot) == 12 + 20 + 12
+
+
+def test_new_table_is_not_cached_until_triggers_exist(project_db):
+    cache = ResultCache(project_db)
+    calls = []
+
+    def load():
+        calls.append(1)
+        return "rows"
+
+    try:
+        cache.get_or_load("项目统计", {}, "text", lambda: "warm")
+        conn = sqlite3.connect(project_db)
+        conn.execute("CREATE TABLE 新表 (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.commit()
+        conn.close()
+
+        cache.get_or_load("新表", {}, "text", load)
+        cache.get_or_load("新表", {}, "text", load)
+        assert len(calls) == 2
+
+        # 读路径不执行 DDL
+        conn = sqlite3.connect(project_db)
+        triggers = conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = '新表'").fetchall()
+        conn.close()
+        assert triggers == []
+
+        # 写路径（迁移/建表/导入）补建触发器后开始缓存
+        apply_migrations(project_db)
+        cache.get_or_load("新表", {}, "text", load)
+        cache.get_or_load("新表", {}, "text", load)
+        assert len(calls) == 3
+    finally:
+        cache.close()
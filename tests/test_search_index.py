@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+from src.database import search_index
+from src.database.migrations import apply_migrations
+from src.database.schema_catalog import SchemaCatalog
+from src.database.search_index import fts_table_name, search, search_table
+from tests.conftest import PROJECT_COLUMNS
+
+
+@pytest.fixture
+def conn(project_db):
+    connection = sqlite3.connect(project_db, isolation_level=None)
+    yield connection
+    connection.close()
+
+
+def _catalog(conn):
+    return SchemaCatalog(conn.execute("PRAGMA database_list").fetchone()[2])
+
+
+def _search(conn, query, table_name="项目统计"):
+    return search_table(conn, _catalog(conn), table_name, query)
+
+
+def _insert_project(conn, name, summary):
+    values = (name, summary, 1.0, "2024-01-01", "2024-12-31", None, "赵工", None, None)
+    return conn.execute(
+        f"INSERT INTO 项目统计 ({', '.join(PROJECT_COLUMNS)}) VALUES ({', '.join('?' * len(PROJECT_COLUMNS))})", values
+    ).lastrowid
+
+
+def test_trigram_match_is_ranked_with_snippet(conn):
+    hits = _search(conn, "水务项目")
+
+    assert len(hits) == 10
+    assert all(hit["score"] is not None for hit in hits)
+    assert "[水务项目]" in hits[0]["snippet"]
+    assert set(hits[0]["row"]) == {"项目名称", "对接人", "项目进度"}
+
+
+def test_short_terms_fall_back_to_like(conn):
+    hits = _search(conn, "张工")
+
+    assert hits and all(hit["score"] is None for hit in hits)
+    assert all(hit["row"]["对接人"] == "张工" for hit in hits)
+    assert "[张工]" in hits[0]["snippet"]
+
+
+def test_index_follows_insert_update_delete(conn):
+    row_id = _insert_project(conn, "透水铺装试点", "人行道透水铺装改造")
+    assert [hit["id"] for hit in _search(conn, "透水铺装")] == [row_id]
+
+    conn.execute("UPDATE 项目统计 SET 项目名称 = '雨水花园试点', 项目简介 = '小区雨水花园建设' WHERE id = ?", (row_id,))
+    assert _search(conn, "透水铺装") == []
+    assert [hit["id"] for hit in _search(conn, "雨水花园")] == [row_id]
+
+    conn.execute("DELETE FROM 项目统计 WHERE id = ?", (row_id,))
+    assert _search(conn, "雨水花园") == []
+
+
+def test_table_created_after_migration_gets_an_index(project_db, conn):
+    conn.execute("CREATE TABLE sponge_city_urls (id INTEGER PRIMARY KEY AUTOINCREMENT, page_name TEXT NOT NULL, "
+                 "subpage_name TEXT, url TEXT NOT NULL, description TEXT, remarks TEXT)")
+    conn.execute("INSERT INTO sponge_city_urls (page_name, subpage_name, url, description) "
+                 "VALUES ('监测监控', '监测数据', 'http://a/#/monitor', '实时监测数据')")
+
+    # 启动、建表和导入时都会补建索引
+    apply_migrations(project_db)
+
+    hits = search(conn, _catalog(conn), "监测数据")
+    assert [hit["table"] for hit in hits] == ["sponge_city_urls"]
+    assert hits[0]["score"] is not None
+
+
+def test_old_sqlite_skips_the_index_and_uses_like(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, "TRIGRAM_AVAILABLE", False)
+    db_path = str(tmp_path / "old.db")
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    connection.execute("CREATE TABLE 项目统计 (id INTEGER PRIMARY KEY, 项目名称 TEXT, 项目简介 TEXT, 对接人 TEXT)")
+    connection.execute("INSERT INTO 项目统计 (项目名称, 项目简介, 对接人) VALUES ('海绵公园', '第 1 个水务项目', '张工')")
+
+    assert apply_migrations(db_path) == 3
+    assert not connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?",
+                                  (fts_table_name("项目统计"),)).fetchone()
+    hits = _search(connection, "水务项目")
+    assert [hit["score"] for hit in hits] == [None]
+    connection.close()
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+from src.runtime.singleflight import call_key
+
+
+def test_call_key_ignores_listed_arguments():
+    arguments = {"title": "投资", "data_input": {"x_data": ["a"]}}
+
+    assert call_key("drawChart", dict(arguments, userName="甲"), ignore=("userName",)) == \
+        call_key("drawChart", dict(arguments, userName="乙"), ignore=("userName",))
+    assert call_key("drawChart", dict(arguments, userName="甲")) != \
+        call_key("drawChart", dict(arguments, userName="乙"))
+
+
+def test_draw_chart_coalesces_callers_with_different_user_names(server_module, monkeypatch):
+    renders, notified = [], []
+
+    def render(*args):
+        renders.append(args)
+        time.sleep(0.2)
+        return "/tmp/chart.html"
+
+    monkeypatch.setattr(server_module, "draw_html_chart", render)
+    monkeypatch.setattr(server_module, "send_external_message",
+                        lambda result, user_name, status, wait=True: notified.append(user_name))
+
+    async def draw_twice():
+        data = {"x_data": ["a"], "series": [{"name": "s", "data": [1]}]}
+        return await asyncio.gather(server_module.drawChart.fn(data, "合并", userName="甲"),
+                                    server_module.drawChart.fn(data, "合并", userName="乙"))
+
+    results = asyncio.run(draw_twice())
+
+    assert [result["result"] for result in results] == ["/tmp/chart.html"] * 2
+    assert len(renders) == 1
+    assert sorted(notified) == ["乙", "甲"]
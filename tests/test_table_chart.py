@@ -0,0 +1,15 @@
+from src.tools.table_chart import build_chart_data
+
+
+def test_x_column_can_be_counted_as_a_value_column(config_db):
+    chart = build_chart_data("项目统计", "对接人", ["对接人", "项目投资金额"], aggregation="count")
+
+    assert sorted(chart["x_data"]) == sorted(["张工", "李工", "王工"])
+    assert [series["name"] for series in chart["series"]] == ["count(对接人)", "项目投资金额"]
+    assert chart["series"][0]["data"] == [10, 10, 10]
+
+
+def test_pie_of_counted_x_column(config_db):
+    chart = build_chart_data("项目统计", "对接人", ["对接人"], aggregation="COUNT", chart_type="pie")
+
+    assert sorted(item["value"] for item in chart["data"]) == [10, 10, 10]
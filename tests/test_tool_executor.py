@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.runtime.tool_executor import ToolExecutor, ToolRejectedError, ToolTimeoutError
+
+
+def _executor(**tool_settings):
+    return ToolExecutor({
+        "pools": {"io": {"type": "thread", "max_workers": 4}},
+        "defaults": {"pool": "io", "max_concurrency": 1, "max_queue": 1, "timeout": 5},
+        "tools": {"slow": tool_settings}
+    })
+
+
+def test_rejects_when_queue_is_full():
+    executor = _executor()
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run("slow", release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(executor.run("slow", lambda: "queued"))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ToolRejectedError):
+            await executor.run("slow", lambda: "rejected")
+        release.set()
+        return await running, await queued
+
+    try:
+        assert asyncio.run(scenario()) == (True, "queued")
+        stats = executor.stats()["slow"]
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+        assert stats["running"] == 0 and stats["waiting"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_execution_timeout_keeps_slot_until_function_returns():
+    executor = _executor(timeout=0.1, max_queue=4)
+    release = threading.Event()
+
+    async def scenario():
+        with pytest.raises(ToolTimeoutError, match="执行超时"):
+            await executor.run("slow", release.wait, 5)
+        # 超时的函数仍在运行并占用唯一的执行名额，后来的调用只能排队直到超时
+        with pytest.raises(ToolTimeoutError, match="排队超时"):
+            await executor.run("slow", lambda: "late")
+        release.set()
+        await asyncio.sleep(0.05)
+        return await executor.run("slow", lambda: "after")
+
+    try:
+        assert asyncio.run(scenario()) == "after"
+        stats = executor.stats()["slow"]
+        assert stats["timeouts"] == 2
+        assert stats["running"] == 0
+    finally:
+        release.set()
+        executor.shutdown()